@@ -0,0 +1,37 @@
+"""Add sentiment_cache table
+
+Revision ID: 3b9d2f6c1a47
+Revises: 05315e3d4268
+Create Date: 2026-10-18 09:12:31.402113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b9d2f6c1a47'
+down_revision: Union[str, None] = '05315e3d4268'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('sentiment_cache',
+    sa.Column('text_hash', sa.LargeBinary(length=16), nullable=False),
+    sa.Column('model_name', sa.String(length=50), nullable=False),
+    sa.Column('model_version', sa.String(length=50), nullable=False),
+    sa.Column('sentiment_label', sa.String(length=20), nullable=False),
+    sa.Column('confidence_score', sa.Float(), nullable=True),
+    sa.Column('is_sarcastic', sa.Boolean(), nullable=True),
+    sa.Column('sarcasm_score', sa.Float(), nullable=True),
+    sa.Column('emotions', sa.JSON(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('text_hash', 'model_name', 'model_version')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('sentiment_cache')
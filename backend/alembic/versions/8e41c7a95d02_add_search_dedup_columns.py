@@ -0,0 +1,35 @@
+"""Add dedup_key and shared_from_id to searches for single-flight analyses
+
+Revision ID: 8e41c7a95d02
+Revises: 3b9d2f6c1a47
+Create Date: 2026-10-18 10:03:17.558920
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8e41c7a95d02'
+down_revision: Union[str, None] = '3b9d2f6c1a47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('searches', sa.Column('dedup_key', sa.String(length=64), nullable=True))
+    op.add_column('searches', sa.Column('shared_from_id', sa.UUID(), nullable=True))
+    op.create_foreign_key(
+        'fk_searches_shared_from_id', 'searches', 'searches',
+        ['shared_from_id'], ['id'], ondelete='SET NULL'
+    )
+    op.create_index('ix_searches_dedup_key_created_at', 'searches', ['dedup_key', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_searches_dedup_key_created_at', table_name='searches')
+    op.drop_constraint('fk_searches_shared_from_id', 'searches', type_='foreignkey')
+    op.drop_column('searches', 'shared_from_id')
+    op.drop_column('searches', 'dedup_key')
@@ -0,0 +1,27 @@
+"""Add sentiments.model_version
+
+Revision ID: a4f8c2e6d9b1
+Revises: d7b3a5e9f1c6
+Create Date: 2026-10-18 22:04:11.382915
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4f8c2e6d9b1'
+down_revision: Union[str, None] = 'd7b3a5e9f1c6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Existing rows keep NULL: the version that produced them is unknown, so they are rescored when reused
+    op.add_column('sentiments', sa.Column('model_version', sa.String(length=50), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('sentiments', 'model_version')
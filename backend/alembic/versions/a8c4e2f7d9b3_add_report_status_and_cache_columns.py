@@ -0,0 +1,36 @@
+"""Add status and cache key columns to reports
+
+Revision ID: a8c4e2f7d9b3
+Revises: f3b7d1a9c6e2
+Create Date: 2026-10-18 16:03:21.847190
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a8c4e2f7d9b3'
+down_revision: Union[str, None] = 'f3b7d1a9c6e2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('reports', sa.Column('status', sa.String(length=20), server_default='pending', nullable=True))
+    op.add_column('reports', sa.Column('source_completed_at', sa.DateTime(), nullable=True))
+    # Reports from before background generation have their file already
+    op.execute("UPDATE reports SET status = 'completed' WHERE file_url IS NOT NULL")
+    op.create_index(
+        'ix_reports_search_id_format', 'reports', ['search_id', 'format', 'source_completed_at'], unique=False
+    )
+    op.create_index('ix_reports_expires_at', 'reports', ['expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_reports_expires_at', table_name='reports')
+    op.drop_index('ix_reports_search_id_format', table_name='reports')
+    op.drop_column('reports', 'source_completed_at')
+    op.drop_column('reports', 'status')
@@ -0,0 +1,72 @@
+"""Add sentiment_rollups table and backfill it from existing tweets
+
+Revision ID: b2d6f8a1c3e5
+Revises: a8c4e2f7d9b3
+Create Date: 2026-10-18 17:26:54.310482
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b2d6f8a1c3e5'
+down_revision: Union[str, None] = 'a8c4e2f7d9b3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+EMOTIONS = ('joy', 'anger', 'fear', 'surprise', 'sadness')
+
+
+def upgrade() -> None:
+    op.create_table(
+        'sentiment_rollups',
+        sa.Column('search_id', sa.UUID(), nullable=False),
+        sa.Column('granularity', sa.String(length=2), nullable=False),
+        sa.Column('bucket_start', sa.DateTime(), nullable=False),
+        sa.Column('tweet_count', sa.Integer(), nullable=False),
+        sa.Column('positive', sa.Integer(), nullable=False),
+        sa.Column('negative', sa.Integer(), nullable=False),
+        sa.Column('neutral', sa.Integer(), nullable=False),
+        sa.Column('sarcastic', sa.Integer(), nullable=False),
+        sa.Column('emotion_count', sa.Integer(), nullable=False),
+        *(sa.Column(f'{emotion}_sum', sa.Float(), nullable=False) for emotion in EMOTIONS),
+        sa.ForeignKeyConstraint(['search_id'], ['searches.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('search_id', 'granularity', 'bucket_start')
+    )
+
+    # Backfill; labels come from each tweet's first sentiment, as in app.db.rollups
+    emotion_sums = ", ".join(
+        f"COALESCE(SUM((s.emotions ->> '{emotion}')::float), 0)" for emotion in EMOTIONS
+    )
+    op.execute(f"""
+        INSERT INTO sentiment_rollups (
+            search_id, granularity, bucket_start, tweet_count, positive, negative, neutral,
+            sarcastic, emotion_count, {", ".join(f"{emotion}_sum" for emotion in EMOTIONS)}
+        )
+        SELECT
+            t.search_id, g.granularity, date_trunc(g.unit, t.created_at_twitter),
+            COUNT(*),
+            COUNT(*) FILTER (WHERE s.sentiment_label = 'positive'),
+            COUNT(*) FILTER (WHERE s.sentiment_label = 'negative'),
+            COUNT(*) FILTER (WHERE s.sentiment_label = 'neutral'),
+            COUNT(*) FILTER (WHERE s.is_sarcastic),
+            COUNT(s.emotions),
+            {emotion_sums}
+        FROM tweets t
+        LEFT JOIN LATERAL (
+            SELECT sentiment_label, is_sarcastic, emotions FROM sentiments
+            WHERE sentiments.tweet_id = t.id
+            ORDER BY created_at
+            LIMIT 1
+        ) s ON true
+        CROSS JOIN (VALUES ('1h', 'hour'), ('1d', 'day')) AS g (granularity, unit)
+        WHERE t.created_at_twitter IS NOT NULL
+        GROUP BY t.search_id, g.granularity, date_trunc(g.unit, t.created_at_twitter)
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('sentiment_rollups')
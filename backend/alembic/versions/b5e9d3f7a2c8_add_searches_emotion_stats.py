@@ -0,0 +1,38 @@
+"""Add searches.emotion_stats and keep emotion_summary as means
+
+Revision ID: b5e9d3f7a2c8
+Revises: a4f8c2e6d9b1
+Create Date: 2026-10-19 09:12:35.604127
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5e9d3f7a2c8'
+down_revision: Union[str, None] = 'a4f8c2e6d9b1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('searches', sa.Column('emotion_stats', sa.JSON(), nullable=True))
+    # Summaries written as {emotion: {mean, std, count}} move to emotion_stats; emotion_summary keeps the means
+    op.execute(
+        """
+        UPDATE searches
+        SET emotion_stats = emotion_summary,
+            emotion_summary = (
+                SELECT json_object_agg(key, value -> 'mean') FROM json_each(emotion_summary)
+            )
+        WHERE json_typeof(emotion_summary) = 'object'
+          AND EXISTS (SELECT 1 FROM json_each(emotion_summary) WHERE json_typeof(value) = 'object')
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('searches', 'emotion_stats')
@@ -0,0 +1,29 @@
+"""Add (user_id, created_at DESC, id DESC) index on searches for history pagination
+
+Revision ID: c7a3e9d15b80
+Revises: 8e41c7a95d02
+Create Date: 2026-10-18 11:20:42.108365
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7a3e9d15b80'
+down_revision: Union[str, None] = '8e41c7a95d02'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_searches_user_id_created_at_id', 'searches',
+        ['user_id', sa.text('created_at DESC'), sa.text('id DESC')], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_searches_user_id_created_at_id', table_name='searches')
@@ -0,0 +1,27 @@
+"""Add searches.origin to tell alert scheduler runs from user searches
+
+Revision ID: c8e4a1f6b3d9
+Revises: b5e9d3f7a2c8
+Create Date: 2026-10-19 15:04:22.318940
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c8e4a1f6b3d9'
+down_revision: Union[str, None] = 'b5e9d3f7a2c8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # A constant default: no table rewrite on Postgres 11+
+    op.add_column('searches', sa.Column('origin', sa.String(length=20), server_default='user', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('searches', 'origin')
@@ -0,0 +1,58 @@
+"""Store tweets once and link them to searches through search_tweets
+
+Revision ID: c9e1f5a7b2d4
+Revises: b2d6f8a1c3e5
+Create Date: 2026-10-18 19:04:12.847215
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c9e1f5a7b2d4'
+down_revision: Union[str, None] = 'b2d6f8a1c3e5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'search_tweets',
+        sa.Column('search_id', sa.UUID(), nullable=False),
+        sa.Column('tweet_id', sa.UUID(), nullable=False),
+        sa.ForeignKeyConstraint(['search_id'], ['searches.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['tweet_id'], ['tweets.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('search_id', 'tweet_id')
+    )
+    op.create_index('ix_search_tweets_tweet_id', 'search_tweets', ['tweet_id'], unique=False)
+
+    # tweets.tweet_id is already unique, so every tweet is linked to the one search that stored it
+    op.execute("INSERT INTO search_tweets (search_id, tweet_id) SELECT search_id, id FROM tweets")
+
+    op.drop_index('ix_tweets_search_id', table_name='tweets')
+    op.drop_constraint('tweets_search_id_fkey', 'tweets', type_='foreignkey')
+    op.drop_column('tweets', 'search_id')
+
+
+def downgrade() -> None:
+    op.add_column('tweets', sa.Column('search_id', sa.UUID(), nullable=True))
+    # A tweet shared by several searches goes back to the earliest one; the other links are lost
+    op.execute("""
+        UPDATE tweets t SET search_id = (
+            SELECT st.search_id
+            FROM search_tweets st JOIN searches s ON s.id = st.search_id
+            WHERE st.tweet_id = t.id
+            ORDER BY s.created_at
+            LIMIT 1
+        )
+    """)
+    op.execute("DELETE FROM tweets WHERE search_id IS NULL")
+    op.alter_column('tweets', 'search_id', nullable=False)
+    op.create_foreign_key('tweets_search_id_fkey', 'tweets', 'searches', ['search_id'], ['id'], ondelete='CASCADE')
+    op.create_index('ix_tweets_search_id', 'tweets', ['search_id'], unique=False)
+
+    op.drop_index('ix_search_tweets_tweet_id', table_name='search_tweets')
+    op.drop_table('search_tweets')
@@ -0,0 +1,60 @@
+"""Add trigram index on searches.query and full-text search on tweets.text
+
+Revision ID: d4f81b6e2a93
+Revises: c7a3e9d15b80
+Create Date: 2026-10-18 12:41:09.630118
+
+Locking: adding the stored generated search_vector column rewrites `tweets`
+under an ACCESS EXCLUSIVE lock, so reads and writes of tweets wait for the
+rewrite (a generated column can't be added empty and backfilled in batches).
+Run it in a maintenance window on large tables. The indexes are built
+afterwards with CREATE INDEX CONCURRENTLY, outside the migration
+transaction, so they don't extend the lock; a failed concurrent build
+leaves an INVALID index that has to be dropped before retrying.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4f81b6e2a93'
+down_revision: Union[str, None] = 'c7a3e9d15b80'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('tweets', sa.Column(
+        'search_vector', postgresql.TSVECTOR(),
+        sa.Computed("to_tsvector('english', text)", persisted=True), nullable=True
+    ))
+
+    # pg_trgm ships with contrib but is not installed everywhere; without it
+    # the ILIKE history filter keeps working, just without an index
+    bind = op.get_bind()
+    has_trgm = bind.execute(sa.text("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")).scalar()
+    if has_trgm:
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+
+    # Commits the column first: CONCURRENTLY can't run inside a transaction
+    with op.get_context().autocommit_block():
+        op.create_index('ix_tweets_search_id', 'tweets', ['search_id'], unique=False, postgresql_concurrently=True)
+        op.create_index(
+            'ix_tweets_search_vector', 'tweets', ['search_vector'], unique=False,
+            postgresql_using='gin', postgresql_concurrently=True
+        )
+        if has_trgm:
+            op.create_index(
+                'ix_searches_query_trgm', 'searches', ['query'], unique=False,
+                postgresql_using='gin', postgresql_ops={'query': 'gin_trgm_ops'}, postgresql_concurrently=True
+            )
+
+
+def downgrade() -> None:
+    op.execute('DROP INDEX IF EXISTS ix_searches_query_trgm')
+    op.drop_index('ix_tweets_search_vector', table_name='tweets')
+    op.drop_column('tweets', 'search_vector')
+    op.drop_index('ix_tweets_search_id', table_name='tweets')
@@ -0,0 +1,83 @@
+"""Move tweets.raw_data into the compressed tweet_payloads table
+
+Revision ID: d7b3a5e9f1c6
+Revises: c9e1f5a7b2d4
+Create Date: 2026-10-18 20:31:47.193058
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.db.payloads import PayloadCodec
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd7b3a5e9f1c6'
+down_revision: Union[str, None] = 'c9e1f5a7b2d4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 5000
+
+tweets = sa.table('tweets', sa.column('id', sa.UUID()), sa.column('raw_data', sa.JSON()))
+tweet_payloads = sa.table(
+    'tweet_payloads',
+    sa.column('tweet_id', sa.UUID()),
+    sa.column('codec', sa.String()),
+    sa.column('data', sa.LargeBinary()),
+)
+
+
+def upgrade() -> None:
+    op.create_table(
+        'tweet_payloads',
+        sa.Column('tweet_id', sa.UUID(), nullable=False),
+        sa.Column('codec', sa.String(length=20), nullable=False),
+        sa.Column('data', sa.LargeBinary(), nullable=False),
+        sa.ForeignKeyConstraint(['tweet_id'], ['tweets.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('tweet_id')
+    )
+
+    # Compression happens here, so the backfill walks the table in keyset batches
+    bind = op.get_bind()
+    codec = PayloadCodec()
+    last_id = None
+    while True:
+        query = sa.select(tweets.c.id, tweets.c.raw_data).where(tweets.c.raw_data.isnot(None))
+        if last_id is not None:
+            query = query.where(tweets.c.id > last_id)
+        rows = bind.execute(query.order_by(tweets.c.id).limit(BATCH_SIZE)).all()
+        if not rows:
+            break
+        payloads = []
+        for tweet_id, raw_data in rows:
+            name, data = codec.encode(raw_data)
+            payloads.append({'tweet_id': tweet_id, 'codec': name, 'data': data})
+        bind.execute(tweet_payloads.insert(), payloads)
+        last_id = rows[-1].id
+
+    op.drop_column('tweets', 'raw_data')
+
+
+def downgrade() -> None:
+    op.add_column('tweets', sa.Column('raw_data', sa.JSON(), nullable=True))
+
+    bind = op.get_bind()
+    codec = PayloadCodec()
+    last_id = None
+    while True:
+        query = sa.select(tweet_payloads.c.tweet_id, tweet_payloads.c.codec, tweet_payloads.c.data)
+        if last_id is not None:
+            query = query.where(tweet_payloads.c.tweet_id > last_id)
+        rows = bind.execute(query.order_by(tweet_payloads.c.tweet_id).limit(BATCH_SIZE)).all()
+        if not rows:
+            break
+        bind.execute(
+            tweets.update().where(tweets.c.id == sa.bindparam('tweet_id')).values(raw_data=sa.bindparam('value')),
+            [{'tweet_id': row.tweet_id, 'value': codec.decode(row.codec, row.data)} for row in rows]
+        )
+        last_id = rows[-1].tweet_id
+
+    op.drop_table('tweet_payloads')
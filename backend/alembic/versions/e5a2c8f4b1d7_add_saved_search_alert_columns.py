@@ -0,0 +1,34 @@
+"""Add alert baseline columns and topic index on saved_searches
+
+Revision ID: e5a2c8f4b1d7
+Revises: d4f81b6e2a93
+Create Date: 2026-10-18 14:05:37.214903
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5a2c8f4b1d7'
+down_revision: Union[str, None] = 'd4f81b6e2a93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('saved_searches', sa.Column('last_sentiment_summary', sa.JSON(), nullable=True))
+    op.add_column('saved_searches', sa.Column('last_alert_at', sa.DateTime(), nullable=True))
+    op.create_index(
+        'ix_saved_searches_alert_topic', 'saved_searches',
+        [sa.text("lower(btrim(regexp_replace(query, '\\s+', ' ', 'g')))"), 'id'],
+        unique=False, postgresql_where=sa.text('alert_enabled')
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_saved_searches_alert_topic', table_name='saved_searches')
+    op.drop_column('saved_searches', 'last_alert_at')
+    op.drop_column('saved_searches', 'last_sentiment_summary')
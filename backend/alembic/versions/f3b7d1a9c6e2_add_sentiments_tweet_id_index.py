@@ -0,0 +1,25 @@
+"""Add index on sentiments.tweet_id for tweet/sentiment joins
+
+Revision ID: f3b7d1a9c6e2
+Revises: e5a2c8f4b1d7
+Create Date: 2026-10-18 15:12:48.530611
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3b7d1a9c6e2'
+down_revision: Union[str, None] = 'e5a2c8f4b1d7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_sentiments_tweet_id', 'sentiments', ['tweet_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_sentiments_tweet_id', table_name='sentiments')
@@ -3,6 +3,7 @@ from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from datetime import datetime, timedelta
+from uuid import UUID
 from app.db.session import get_db
 from app.db.models import User
 from app.schemas.schemas import (
@@ -13,30 +14,39 @@ from app.schemas.schemas import (
     MessageResponse
 )
 from app.core.security import (
+    PasswordHashingBusy,
     create_access_token,
     create_refresh_token,
-    get_password_hash,
-    verify_password,
+    get_password_hash_async,
+    password_needs_rehash,
+    verify_password_async,
     decode_token
 )
 from app.core.config import settings
+from app.core.principals import principal_cache
 
 router = APIRouter()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login")
 
+hashing_busy_exception = HTTPException(
+    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+    detail="Too many authentication requests, please retry shortly",
+    headers={"Retry-After": "1"},
+)
+
 
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
     db: AsyncSession = Depends(get_db)
 ) -> User:
-    """Get current authenticated user"""
+    """Get current authenticated user (token and user row are cached, see app.core.principals)"""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
     
-    payload = decode_token(token)
+    payload = principal_cache.decode(token)
     if payload is None:
         raise credentials_exception
     
@@ -44,12 +54,17 @@ async def get_current_user(
     if user_id is None:
         raise credentials_exception
     
-    result = await db.execute(select(User).filter(User.id == user_id))
-    user = result.scalar_one_or_none()
+    user = await principal_cache.get_user(db, user_id)
     
     if user is None:
         raise credentials_exception
-    
+
+    if not user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Inactive user"
+        )
+
     return user
 
 
@@ -69,11 +84,16 @@ async def register(
             detail="Email already registered"
         )
     
+    try:
+        password_hash = await get_password_hash_async(user_data.password)
+    except PasswordHashingBusy:
+        raise hashing_busy_exception
+    
     # Create new user
     new_user = User(
         email=user_data.email,
         full_name=user_data.full_name,
-        password_hash=get_password_hash(user_data.password),
+        password_hash=password_hash,
         tier="free",
         credits_remaining=settings.FREE_TIER_CREDITS,
         credits_reset_date=datetime.utcnow() + timedelta(days=30)
@@ -103,7 +123,11 @@ async def login(
         )
     
     # Verify password
-    if not verify_password(user_data.password, user.password_hash):
+    try:
+        password_ok = await verify_password_async(user_data.password, user.password_hash)
+    except PasswordHashingBusy:
+        raise hashing_busy_exception
+    if not password_ok:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password"
@@ -115,9 +139,17 @@ async def login(
             detail="Inactive user"
         )
     
+    # Upgrade the hash if BCRYPT_ROUNDS changed; a busy pool just defers it to a later login
+    if password_needs_rehash(user.password_hash):
+        try:
+            user.password_hash = await get_password_hash_async(user_data.password)
+        except PasswordHashingBusy:
+            pass
+    
     # Create tokens
-    access_token = create_access_token(data={"sub": str(user.id)})
-    refresh_token = create_refresh_token(data={"sub": str(user.id)})
+    # The tier claim lets the rate limiter pick a limit without a DB lookup
+    access_token = create_access_token(data={"sub": str(user.id), "tier": user.tier})
+    refresh_token = create_refresh_token(data={"sub": str(user.id), "tier": user.tier})
     
     return {
         "access_token": access_token,
@@ -147,9 +179,26 @@ async def refresh_token(
             detail="Invalid refresh token"
         )
     
+    # The tier claim must follow upgrades and downgrades, so read it from the user row
+    try:
+        user = await db.get(User, UUID(user_id))
+    except ValueError:
+        user = None
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid refresh token"
+        )
+    
+    if not user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Inactive user"
+        )
+    
     # Create new tokens
-    new_access_token = create_access_token(data={"sub": user_id})
-    new_refresh_token = create_refresh_token(data={"sub": user_id})
+    new_access_token = create_access_token(data={"sub": str(user.id), "tier": user.tier})
+    new_refresh_token = create_refresh_token(data={"sub": str(user.id), "tier": user.tier})
     
     return {
         "access_token": new_access_token,
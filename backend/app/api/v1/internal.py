@@ -0,0 +1,48 @@
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from app.db.instrumentation import registry
+from app.db.models import User
+from app.schemas.schemas import MessageResponse
+from app.api.v1.auth import get_current_user
+
+router = APIRouter()
+
+
+async def get_admin_user(
+    current_user: User = Depends(get_current_user)
+) -> User:
+    """Require an admin account"""
+    if current_user.tier != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required"
+        )
+    return current_user
+
+
+@router.get("/db-stats")
+async def get_db_stats(
+    limit: int = Query(20, ge=1, le=500),
+    order_by: str = Query("total_ms", pattern="^(total_ms|count|mean_ms|p99_ms|max_ms)$"),
+    admin: User = Depends(get_admin_user)
+):
+    """Hottest statements and pool metrics of every instrumented engine"""
+    return {
+        "enabled": bool(registry),
+        "engines": {
+            name: metrics.snapshot(limit=limit, order_by=order_by)
+            for name, metrics in registry.items()
+        }
+    }
+
+
+@router.delete("/db-stats", response_model=MessageResponse)
+async def reset_db_stats(
+    admin: User = Depends(get_admin_user)
+):
+    """Start a fresh measurement window"""
+    for metrics in registry.values():
+        metrics.reset()
+    return {
+        "message": "Database statistics reset",
+        "success": True
+    }
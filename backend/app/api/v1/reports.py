@@ -0,0 +1,153 @@
+from datetime import datetime, timedelta
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from fastapi.responses import FileResponse, JSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, desc
+from uuid import UUID
+from app.core.config import settings
+from app.db.session import get_db
+from app.db.models import User, Search, Report
+from app.schemas.schemas import ReportCreate, ReportResponse
+from app.api.v1.auth import get_current_user
+from app.reports.jobs import REPORT_FORMATS, dispatch_report, find_cached_report
+from app.reports.storage import ReportStore
+
+router = APIRouter()
+
+report_store = ReportStore()
+
+# Seconds a client should wait before polling an unfinished report again
+POLL_AFTER_SECONDS = 2
+
+
+@router.post("/generate", response_model=ReportResponse, status_code=status.HTTP_202_ACCEPTED)
+async def generate_report(
+    report_data: ReportCreate,
+    response: Response,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Start generating a report for a completed search
+
+    Returns 202 with a pending report to poll at GET /reports/{id}, or 200
+    with the existing report when this search was already exported in this
+    format.
+    """
+    if report_data.format not in REPORT_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unsupported format, expected one of: {', '.join(REPORT_FORMATS)}"
+        )
+
+    result = await db.execute(
+        select(Search).filter(
+            Search.id == report_data.search_id,
+            Search.user_id == current_user.id
+        )
+    )
+    search = result.scalar_one_or_none()
+
+    if not search:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Search not found"
+        )
+
+    if search.status != "completed":
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Search has not completed yet"
+        )
+
+    cached = await find_cached_report(db, search, report_data.format)
+    if cached:
+        if cached.status == "completed":
+            response.status_code = status.HTTP_200_OK
+        return cached
+
+    report = Report(
+        search_id=search.id,
+        user_id=current_user.id,
+        format=report_data.format,
+        status="pending",
+        source_completed_at=search.completed_at,
+        expires_at=datetime.utcnow() + timedelta(days=settings.REPORT_TTL_DAYS)
+    )
+    db.add(report)
+    await db.commit()
+    await db.refresh(report)
+
+    await dispatch_report(report.id)
+
+    return report
+
+
+@router.get("/", response_model=list[ReportResponse])
+async def get_reports(
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Get the user's reports that have not expired"""
+    result = await db.execute(
+        select(Report)
+        .filter(
+            Report.user_id == current_user.id,
+            Report.expires_at > datetime.utcnow()
+        )
+        .order_by(desc(Report.created_at))
+    )
+    return result.scalars().all()
+
+
+@router.get("/{report_id}", response_model=ReportResponse)
+async def get_report(
+    report_id: UUID,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Download a report; 202 with its status while it is still being generated,
+    410 with status "failed" when generation failed (POST /generate again)
+    """
+    result = await db.execute(
+        select(Report).filter(
+            Report.id == report_id,
+            Report.user_id == current_user.id
+        )
+    )
+    report = result.scalar_one_or_none()
+
+    if not report or (report.expires_at and report.expires_at <= datetime.utcnow()):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Report not found"
+        )
+
+    if report.status in ("pending", "processing"):
+        return JSONResponse(
+            status_code=status.HTTP_202_ACCEPTED,
+            content=ReportResponse.model_validate(report).model_dump(mode="json"),
+            headers={"Retry-After": str(POLL_AFTER_SECONDS)}
+        )
+
+    if report.status != "completed":
+        # Failed for good: the body says so, and find_cached_report skips it so a new request retries
+        return JSONResponse(
+            status_code=status.HTTP_410_GONE,
+            content=ReportResponse.model_validate(report).model_dump(mode="json")
+        )
+
+    if not report.file_url or not report_store.exists(report.file_url):
+        # Completed but not in this process's REPORT_STORAGE_DIR (see .env.example)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Report file is missing"
+        )
+
+    extension, media_type, _ = REPORT_FORMATS[report.format]
+    return FileResponse(
+        report_store.path(report.file_url),
+        media_type=media_type,
+        filename=f"voxlens-report-{report.search_id}.{extension}"
+    )
@@ -1,20 +1,39 @@
+import asyncio
+import logging
+from contextlib import nullcontext
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, desc, func
+from sqlalchemy import select, delete, desc, func, tuple_
 from typing import Optional
 from uuid import UUID
-from app.db.session import get_db
-from app.db.models import User, Search, SavedSearch
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal, engine, get_db, get_read_db, replica_engine, replica_router, uses_replica
+from app.db.models import User, Search, SavedSearch, SearchTweet, SentimentRollup, Tweet, normalized_query_sql
 from app.schemas.schemas import (
     SearchCreate,
     SearchResponse,
     SearchListResponse,
+    TweetResponse,
+    TweetSearchResponse,
+    TimeSeriesResponse,
+    CompareRequest,
+    CompareResponse,
     SavedSearchCreate,
     SavedSearchUpdate,
     SavedSearchResponse,
     MessageResponse
 )
 from app.api.v1.auth import get_current_user
+from app.core.credits import consume_credit
+from app.core.pagination import decode_cursor, keyset_page
+from app.core.principals import invalidate_user
+from app.db.rollups import EMOTIONS, align_series
+from app.reports.export import EXPORT_FORMATS, export_filename, stream_export
+from app.tasks.dedup import attach_to, dedup_key, dedup_lock, find_shared_result, hand_over, normalize_query
+from app.tasks.worker import dispatch_analysis
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
@@ -26,32 +45,41 @@ async def create_search(
     db: AsyncSession = Depends(get_db)
 ):
     """Create a new sentiment analysis search"""
-    # Check if user has credits
-    if current_user.credits_remaining <= 0:
+    # Charge the credit atomically (charged per user, shared or not); it is
+    # refunded by the rollback if creating the search fails
+    remaining = await consume_credit(db, current_user.id)
+    if remaining is None:
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_402_PAYMENT_REQUIRED,
             detail="No credits remaining. Please upgrade to continue."
         )
     
-    # Create search
+    key = dedup_key(search_data.query, search_data.time_range)
     new_search = Search(
         user_id=current_user.id,
         query=search_data.query,
         time_range=search_data.time_range,
-        status="pending"
+        status="pending",
+        dedup_key=key,
     )
-    
-    db.add(new_search)
-    
-    # Deduct credit
-    current_user.credits_remaining -= 1
-    
-    await db.commit()
+
+    async with dedup_lock(db, key):
+        # Attach to an identical analysis that is running or still fresh
+        shared_result = await find_shared_result(db, key)
+        if shared_result is not None:
+            attach_to(new_search, shared_result)
+
+        db.add(new_search)
+        await db.commit()
+    # The credit UPDATE bypassed the ORM, so the cached principal is stale
+    invalidate_user(current_user.id)
     await db.refresh(new_search)
-    
-    # TODO: Trigger async analysis task with Celery
-    # celery_app.send_task("analyze_sentiment", args=[str(new_search.id)])
-    
+
+    if shared_result is None:
+        # Hand off to the analysis pipeline (in-process or Celery)
+        await dispatch_analysis(new_search.id)
+
     return new_search
 
 
@@ -59,14 +87,23 @@ async def create_search(
 async def get_searches(
     page: int = Query(1, ge=1),
     page_size: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = None,
+    include_total: Optional[bool] = None,
     query: Optional[str] = None,
     status_filter: Optional[str] = None,
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
-    """Get user's search history"""
+    """
+    Get user's search history, newest first
+
+    Pass the returned `next_cursor` as `cursor` to fetch the next page by
+    keyset instead of offset. The total count is computed by default in page
+    mode and only on request (`include_total=true`) in cursor mode.
+    """
     # Build query
-    stmt = select(Search).filter(Search.user_id == current_user.id)
+    # Searches run by the alert scheduler are not part of anyone's history
+    stmt = select(Search).filter(Search.user_id == current_user.id, Search.origin == "user")
     
     if query:
         stmt = stmt.filter(Search.query.ilike(f"%{query}%"))
@@ -75,22 +112,158 @@ async def get_searches(
         stmt = stmt.filter(Search.status == status_filter)
     
     # Get total count
-    count_stmt = select(func.count()).select_from(stmt.subquery())
-    total_result = await db.execute(count_stmt)
-    total = total_result.scalar()
+    total = None
+    if include_total if include_total is not None else cursor is None:
+        count_stmt = select(func.count()).select_from(stmt.subquery())
+        total_result = await db.execute(count_stmt)
+        total = total_result.scalar()
     
-    # Apply pagination
-    stmt = stmt.order_by(desc(Search.created_at))
-    stmt = stmt.offset((page - 1) * page_size).limit(page_size)
+    # Apply pagination; id breaks ties so rows created in the same instant are neither skipped nor repeated
+    stmt = stmt.order_by(desc(Search.created_at), desc(Search.id))
+    if cursor:
+        try:
+            created_at, search_id = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor"
+            )
+        stmt = stmt.filter(tuple_(Search.created_at, Search.id) < tuple_(created_at, search_id))
+    else:
+        stmt = stmt.offset((page - 1) * page_size)
+    stmt = stmt.limit(page_size + 1)
     
     result = await db.execute(stmt)
-    searches = result.scalars().all()
+    searches, next_cursor = keyset_page(result.scalars().all(), page_size)
     
     return {
         "searches": searches,
         "total": total,
-        "page": page,
-        "page_size": page_size
+        "page": None if cursor else page,
+        "page_size": page_size,
+        "next_cursor": next_cursor
+    }
+
+
+async def timeseries_points(db: AsyncSession, analysis_id: UUID, granularity: str) -> list[dict]:
+    """Time series points of an analysis from its rollups, oldest first"""
+    result = await db.execute(
+        select(SentimentRollup)
+        .filter(
+            SentimentRollup.search_id == analysis_id,
+            SentimentRollup.granularity == granularity
+        )
+        .order_by(SentimentRollup.bucket_start)
+    )
+    points = []
+    for bucket in result.scalars():
+        emotions = None
+        if bucket.emotion_count:
+            emotions = {
+                emotion: getattr(bucket, f"{emotion}_sum") / bucket.emotion_count
+                for emotion in EMOTIONS
+            }
+        points.append({
+            "timestamp": bucket.bucket_start,
+            "total_tweets": bucket.tweet_count,
+            "positive": bucket.positive,
+            "negative": bucket.negative,
+            "neutral": bucket.neutral,
+            "sarcastic": bucket.sarcastic,
+            "emotions": emotions
+        })
+    return points
+
+
+async def compare_topic(
+    user_id: UUID,
+    granularity: str,
+    search_id: Optional[UUID] = None,
+    query: Optional[str] = None
+) -> dict:
+    """One topic of a comparison, read on its own session so topics run in parallel"""
+    key = str(search_id) if search_id else query
+    stmt = select(Search).filter(Search.user_id == user_id)
+    if search_id:
+        stmt = stmt.filter(Search.id == search_id)
+    else:
+        stmt = (
+            stmt.filter(
+                normalized_query_sql(Search.query) == normalize_query(query),
+                Search.status == "completed",
+                Search.origin == "user"
+            )
+            .order_by(desc(Search.completed_at))
+            .limit(1)
+        )
+
+    db = await replica_router.session()
+    try:
+        search = (await db.execute(stmt)).scalar_one_or_none()
+        if not search:
+            return {"key": key, "status": "not_found"}
+        points = await timeseries_points(db, search.analysis_id, granularity)
+    finally:
+        await db.close()
+    return {"key": key, "status": "ok", "search": search, "points": points}
+
+
+async def compare_topic_within_timeout(user_id: UUID, granularity: str, **topic) -> dict:
+    """compare_topic, reporting a timeout or failure as the topic's status instead of raising"""
+    key = str(topic.get("search_id") or topic.get("query"))
+    try:
+        return await asyncio.wait_for(
+            compare_topic(user_id, granularity, **topic),
+            timeout=settings.COMPARE_TOPIC_TIMEOUT_SECONDS
+        )
+    except asyncio.TimeoutError:
+        logger.warning("Comparison topic %s timed out", key)
+        return {"key": key, "status": "timeout"}
+    except Exception:
+        logger.exception("Comparison topic %s failed", key)
+        return {"key": key, "status": "error"}
+
+
+@router.post("/compare", response_model=CompareResponse)
+async def compare_searches(
+    compare_data: CompareRequest,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Summaries and time series of several searches side by side
+
+    Topics are fetched concurrently, each on its own session, and their
+    series are aligned to one set of timestamps. A topic that is not found,
+    fails or takes longer than COMPARE_TOPIC_TIMEOUT_SECONDS is returned
+    with that status; the others are still returned.
+    """
+    if compare_data.granularity not in ("1h", "1d"):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Unsupported granularity, expected one of: 1h, 1d"
+        )
+
+    # Repeated topics are fetched once
+    topics = [{"search_id": search_id} for search_id in dict.fromkeys(compare_data.search_ids)]
+    topics += [{"query": query} for query in dict.fromkeys(compare_data.queries)]
+    if not 1 <= len(topics) <= settings.COMPARE_MAX_TOPICS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Compare between 1 and {settings.COMPARE_MAX_TOPICS} searches"
+        )
+
+    results = await asyncio.gather(*(
+        compare_topic_within_timeout(current_user.id, compare_data.granularity, **topic)
+        for topic in topics
+    ))
+    timestamps, aligned = align_series([result.get("points", []) for result in results])
+    for result, points in zip(results, aligned):
+        result["points"] = points if result["status"] == "ok" else []
+
+    return {
+        "granularity": compare_data.granularity,
+        "timestamps": timestamps,
+        "topics": results
     }
 
 
@@ -98,9 +271,46 @@ async def get_searches(
 async def get_search(
     search_id: UUID,
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get a specific search by ID"""
+    stmt = select(Search).filter(
+        Search.id == search_id,
+        Search.user_id == current_user.id
+    )
+    result = await db.execute(stmt)
+    search = result.scalar_one_or_none()
+    
+    if not search and uses_replica(db):
+        # Clients poll a search right after creating it; don't 404 on replica lag
+        async with AsyncSessionLocal() as primary:
+            result = await primary.execute(stmt)
+            search = result.scalar_one_or_none()
+    
+    if not search:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Search not found"
+        )
+    
+    return search
+
+
+@router.get("/{search_id}/tweets/search", response_model=TweetSearchResponse)
+async def search_tweets(
+    search_id: UUID,
+    q: str = Query(..., min_length=1, max_length=200),
+    page_size: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Full-text search over the tweets of a search, best matches first
+
+    `q` uses web search syntax ("quoted phrases", -excluded, or). Pass the
+    returned `next_cursor` as `cursor` for the next page.
+    """
     result = await db.execute(
         select(Search).filter(
             Search.id == search_id,
@@ -115,7 +325,106 @@ async def get_search(
             detail="Search not found"
         )
     
-    return search
+    ts_query = func.websearch_to_tsquery("english", q)
+    rank = func.ts_rank_cd(Tweet.search_vector, ts_query)
+    stmt = (
+        select(Tweet, rank.label("rank"))
+        .join(SearchTweet, SearchTweet.tweet_id == Tweet.id)
+        .filter(
+            SearchTweet.search_id == search.analysis_id,
+            Tweet.search_vector.op("@@")(ts_query)
+        )
+        .order_by(desc(rank), desc(Tweet.id))
+        .limit(page_size + 1)
+    )
+    if cursor:
+        try:
+            last_rank, last_id = decode_cursor(cursor, key_type=float)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor"
+            )
+        stmt = stmt.filter(tuple_(rank, Tweet.id) < tuple_(last_rank, last_id))
+    
+    result = await db.execute(stmt)
+    rows, next_cursor = keyset_page(result.all(), page_size, sort_key=lambda row: (row.rank, row.Tweet.id))
+    
+    return {
+        "tweets": [
+            {**TweetResponse.model_validate(tweet).model_dump(), "search_id": search.id, "rank": tweet_rank}
+            for tweet, tweet_rank in rows
+        ],
+        "next_cursor": next_cursor
+    }
+
+
+@router.get("/{search_id}/timeseries", response_model=TimeSeriesResponse)
+async def get_search_timeseries(
+    search_id: UUID,
+    granularity: str = Query("1h", pattern="^(1h|1d)$"),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Sentiment counts per hour or day of tweet time, read from pre-aggregated rollups"""
+    result = await db.execute(
+        select(Search).filter(
+            Search.id == search_id,
+            Search.user_id == current_user.id
+        )
+    )
+    search = result.scalar_one_or_none()
+    
+    if not search:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Search not found"
+        )
+    
+    return {
+        "search_id": search.id,
+        "granularity": granularity,
+        "points": await timeseries_points(db, search.analysis_id, granularity)
+    }
+
+
+@router.get("/{search_id}/export")
+async def export_search(
+    search_id: UUID,
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    gzip: bool = False,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Download every tweet of a search with its sentiments as CSV or NDJSON
+
+    The file is streamed as it is read from the database; pass `gzip=true`
+    for a compressed download.
+    """
+    result = await db.execute(
+        select(Search).filter(
+            Search.id == search_id,
+            Search.user_id == current_user.id
+        )
+    )
+    search = result.scalar_one_or_none()
+    
+    if not search:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Search not found"
+        )
+    
+    # The export runs in its own transaction, on the same server this request read from
+    bind = replica_engine if uses_replica(db) else engine
+    media_type, _ = EXPORT_FORMATS[format]
+    filename = export_filename(search.id, format, gzip)
+    return StreamingResponse(
+        stream_export(bind, search.analysis_id, format, compress=gzip),
+        media_type="application/gzip" if gzip else media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
 
 
 @router.delete("/{search_id}", response_model=MessageResponse)
@@ -139,8 +448,33 @@ async def delete_search(
             detail="Search not found"
         )
     
-    await db.delete(search)
-    await db.commit()
+    # Serialized with searches attaching to this one and with the pipeline finishing it
+    async with dedup_lock(db, search.dedup_key) if search.dedup_key else nullcontext():
+        if search.shared_from_id is None:
+            await db.refresh(search)
+            if search.status in ("pending", "processing") and await db.scalar(
+                select(func.count()).select_from(Search).filter(Search.shared_from_id == search.id)
+            ):
+                await db.rollback()
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="Search is still being analyzed for other users. Try again when it completes."
+                )
+            # Searches attached to this one read its tweets and rollups: they keep them
+            await hand_over(db, search)
+
+        # Tweets are shared between searches: drop only those no other search links to
+        await db.execute(
+            delete(Tweet).filter(
+                Tweet.id.in_(select(SearchTweet.tweet_id).filter(SearchTweet.search_id == search.id)),
+                ~select(SearchTweet.tweet_id).filter(
+                    SearchTweet.tweet_id == Tweet.id,
+                    SearchTweet.search_id != search.id
+                ).exists()
+            )
+        )
+        await db.delete(search)
+        await db.commit()
     
     return {
         "message": "Search deleted successfully",
@@ -152,7 +486,7 @@ async def delete_search(
 @router.get("/saved/all", response_model=list[SavedSearchResponse])
 async def get_saved_searches(
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get all saved searches for the user"""
     result = await db.execute(
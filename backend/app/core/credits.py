@@ -0,0 +1,58 @@
+"""
+Atomic credit accounting
+
+A search costs one credit, charged by a single conditional UPDATE so that
+concurrent requests from one user can never overspend: the row lock taken by
+the UPDATE serializes them and the WHERE clause rejects the one that would go
+below zero. The lazy monthly reset (credits_reset_date in the past, or never
+set) happens in the same statement.
+"""
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import case, or_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.models import User
+
+CREDIT_PERIOD = timedelta(days=30)
+
+
+def monthly_allowance():
+    """Credits a user gets at each reset, by tier"""
+    return case(
+        (User.tier == "pro", settings.PRO_TIER_CREDITS),
+        else_=settings.FREE_TIER_CREDITS,
+    )
+
+
+async def consume_credit(db: AsyncSession, user_id, amount: int = 1) -> Optional[int]:
+    """
+    Charge `amount` credits in the current transaction, resetting the monthly
+    allowance first if it is due. Returns the remaining credits, or None when
+    the user can't afford it (nothing is changed then).
+    """
+    now = datetime.utcnow()
+    # A NULL date would make the comparison NULL, and the user unable to spend
+    reset_due = or_(User.credits_reset_date.is_(None), User.credits_reset_date <= now)
+    result = await db.execute(
+        update(User)
+        .where(
+            User.id == user_id,
+            or_(User.credits_remaining >= amount, reset_due),
+        )
+        .values(
+            credits_remaining=case(
+                (reset_due, monthly_allowance() - amount),
+                else_=User.credits_remaining - amount,
+            ),
+            credits_reset_date=case(
+                (reset_due, now + CREDIT_PERIOD),
+                else_=User.credits_reset_date,
+            ),
+        )
+        .returning(User.credits_remaining)
+        .execution_options(synchronize_session=False)
+    )
+    return result.scalar_one_or_none()
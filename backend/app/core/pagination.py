@@ -0,0 +1,47 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Callable, Optional, Union
+from uuid import UUID
+
+SortKey = Union[datetime, float]
+
+
+def encode_cursor(key: SortKey, row_id: UUID) -> str:
+    """Opaque cursor pointing just past a row in (key DESC, id DESC) order"""
+    if isinstance(key, datetime):
+        key = key.isoformat()
+    payload = json.dumps([key, str(row_id)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+MAX_CURSOR_LENGTH = 200
+
+
+def decode_cursor(cursor: str, key_type: type = datetime) -> tuple[SortKey, UUID]:
+    """Inverse of encode_cursor; raises ValueError for malformed cursors"""
+    if len(cursor) > MAX_CURSOR_LENGTH:
+        raise ValueError("Invalid cursor")
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        key, row_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        key = datetime.fromisoformat(key) if key_type is datetime else key_type(key)
+        row_id = UUID(row_id)
+    except (TypeError, ValueError, UnicodeError) as e:
+        raise ValueError("Invalid cursor") from e
+    # Keys are naive UTC like the columns they come from; an offset can only come from an edited cursor
+    if isinstance(key, datetime) and key.tzinfo is not None:
+        raise ValueError("Invalid cursor")
+    return key, row_id
+
+
+def keyset_page(
+    rows: list[Any],
+    page_size: int,
+    sort_key: Callable[[Any], tuple[SortKey, UUID]] = lambda row: (row.created_at, row.id),
+) -> tuple[list[Any], Optional[str]]:
+    """Split a `page_size + 1` fetch into the page and the cursor for the next one"""
+    if len(rows) <= page_size:
+        return rows, None
+    rows = rows[:page_size]
+    return rows, encode_cursor(*sort_key(rows[-1]))
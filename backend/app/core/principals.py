@@ -0,0 +1,159 @@
+"""
+Cache of authenticated principals for get_current_user
+
+Two TTL+LRU tiers sit in front of the per-request work:
+
+- decoded JWT payloads keyed by a digest of the token, so the signature is
+  verified once per token and TTL rather than on every request,
+- detached User snapshots keyed by id, merged into the request's session
+  without a SELECT.
+
+Snapshots are dropped when a flush modifies or deletes a User (credits, tier,
+is_active, ...); code that changes users with bulk UPDATE statements must call
+`invalidate_user()` itself. Other processes see changes after at most
+PRINCIPAL_CACHE_TTL seconds.
+"""
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Optional
+from uuid import UUID
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.core.config import settings
+from app.core.security import decode_token
+from app.db.models import User
+
+
+class TTLCache:
+    """Bounded LRU mapping whose entries expire (event-loop only, not thread-safe)"""
+
+    def __init__(self, maxsize: int, ttl: float, clock: Callable[[], float] = time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self._data: OrderedDict = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key) -> Any:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at <= self.clock():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def put(self, key, value, ttl: Optional[float] = None) -> None:
+        if self.maxsize <= 0:
+            return
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0:
+            return
+        self._data[key] = (self.clock() + ttl, value)
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+
+def _snapshot(user: User) -> User:
+    """Detached copy of a loaded user, safe to share between requests"""
+    snapshot = User()
+    for column in inspect(User).column_attrs:
+        set_committed_value(snapshot, column.key, getattr(user, column.key))
+    make_transient_to_detached(snapshot)
+    return snapshot
+
+
+class PrincipalCache:
+    """Decoded tokens by token digest and user snapshots by id"""
+
+    def __init__(
+        self,
+        maxsize: int = settings.PRINCIPAL_CACHE_SIZE,
+        ttl: float = settings.PRINCIPAL_CACHE_TTL,
+    ):
+        self.tokens = TTLCache(maxsize, ttl)
+        self.users = TTLCache(maxsize, ttl)
+
+    def decode(self, token: str) -> Optional[dict]:
+        """decode_token, memoized until the token expires or the TTL passes"""
+        key = hashlib.blake2b(token.encode("utf-8"), digest_size=16).digest()
+        payload = self.tokens.get(key)
+        if payload is None:
+            # Invalid tokens are not cached, so garbage can't evict real entries
+            payload = decode_token(token)
+            if payload is None:
+                return None
+            expires_in = payload["exp"] - time.time() if "exp" in payload else None
+            self.tokens.put(key, payload, ttl=expires_in)
+        elif "exp" in payload and payload["exp"] <= time.time():
+            return None
+        return payload
+
+    async def get_user(self, db: AsyncSession, user_id) -> Optional[User]:
+        """The user attached to `db`, from a snapshot when one is cached"""
+        try:
+            key = UUID(str(user_id))
+        except ValueError:
+            return None
+        snapshot = self.users.get(key)
+        if snapshot is not None:
+            return await db.merge(snapshot, load=False)
+
+        result = await db.execute(select(User).filter(User.id == key))
+        user = result.scalar_one_or_none()
+        if user is not None:
+            self.users.put(key, _snapshot(user))
+        return user
+
+    def invalidate_user(self, user_id) -> None:
+        self.users.pop(UUID(str(user_id)))
+
+    def clear(self) -> None:
+        self.tokens.clear()
+        self.users.clear()
+
+
+principal_cache = PrincipalCache()
+
+
+def invalidate_user(user_id) -> None:
+    """Drop a user's cached snapshot after changing it outside the ORM unit of work"""
+    principal_cache.invalidate_user(user_id)
+
+
+@event.listens_for(Session, "after_flush")
+def _invalidate_flushed_users(session: Session, flush_context) -> None:
+    # Drop now so this process stops serving the old row, and again after
+    # commit in case another request re-cached it in between
+    changed = session.info.setdefault("changed_user_ids", set())
+    for obj in list(session.dirty) + list(session.deleted):
+        if isinstance(obj, User) and obj.id is not None:
+            changed.add(obj.id)
+            principal_cache.invalidate_user(obj.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_users(session: Session) -> None:
+    for user_id in session.info.pop("changed_user_ids", ()):
+        principal_cache.invalidate_user(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_rolled_back_users(session: Session) -> None:
+    session.info.pop("changed_user_ids", None)
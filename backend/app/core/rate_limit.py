@@ -0,0 +1,204 @@
+"""
+Request rate limiting (GCRA)
+
+The generic cell rate algorithm keeps one timestamp per key, the theoretical
+arrival time (TAT) of the next request. With a limit of N per minute each
+request advances TAT by 60/N seconds and a request is allowed while TAT is at
+most one minute ahead of now. That admits bursts of up to N and then a steady
+N per minute, like a sliding window, but costs one read and one write per
+request.
+
+Keys are the JWT subject for authenticated requests (limits by tier) and the
+client IP otherwise. State lives in this process (RATE_LIMIT_BACKEND=memory)
+or in Redis (redis) so that all nodes share it.
+"""
+import json
+import logging
+import math
+import time
+from abc import ABC, abstractmethod
+from typing import Callable, Optional
+from uuid import UUID
+
+from app.core.config import settings
+from app.core.principals import principal_cache
+
+logger = logging.getLogger(__name__)
+
+WINDOW_SECONDS = 60.0
+
+# Slack for float drift after summing many intervals (60/N is rarely exact)
+_EPSILON = 1e-6
+
+
+def gcra(tat: Optional[float], now: float, interval: float, tolerance: float) -> tuple[bool, float, float]:
+    """
+    One GCRA step: returns (allowed, new TAT, retry_after seconds). A rejected
+    request leaves TAT unchanged.
+    """
+    tat = now if tat is None or tat < now else tat
+    new_tat = tat + interval
+    if new_tat - now > tolerance + interval + _EPSILON:
+        return False, tat, new_tat - now - tolerance - interval
+    return True, new_tat, 0.0
+
+
+class RateLimitBackend(ABC):
+    """Stores the TAT of every key"""
+
+    @abstractmethod
+    async def hit(self, key: str, interval: float, tolerance: float) -> tuple[bool, float]:
+        """Count a request; returns (allowed, retry_after seconds)"""
+
+
+class InMemoryBackend(RateLimitBackend):
+    """Single-process state; pass a fake `clock` in tests"""
+
+    def __init__(self, max_keys: int = 100_000, clock: Callable[[], float] = time.monotonic):
+        self.max_keys = max_keys
+        self.clock = clock
+        self._tats: dict[str, float] = {}
+
+    async def hit(self, key, interval, tolerance):
+        now = self.clock()
+        allowed, tat, retry_after = gcra(self._tats.get(key), now, interval, tolerance)
+        if allowed:
+            self._tats[key] = tat
+            if len(self._tats) > self.max_keys:
+                self._sweep(now)
+        return allowed, retry_after
+
+    def _sweep(self, now: float) -> None:
+        # Keys whose TAT has passed are back to a full allowance, so dropping them changes nothing
+        self._tats = {key: tat for key, tat in self._tats.items() if tat > now}
+        while len(self._tats) > self.max_keys:
+            self._tats.pop(next(iter(self._tats)))
+
+
+# KEYS[1] = key, ARGV = interval, tolerance (seconds); uses the Redis clock
+_GCRA_SCRIPT = """
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) + tonumber(now_parts[2]) / 1000000
+local interval = tonumber(ARGV[1])
+local tolerance = tonumber(ARGV[2])
+local tat = tonumber(redis.call('GET', KEYS[1]) or now)
+if tat < now then tat = now end
+local new_tat = tat + interval
+if new_tat - now > tolerance + interval + 0.000001 then
+    return {0, tostring(new_tat - now - tolerance - interval)}
+end
+redis.call('SET', KEYS[1], tostring(new_tat), 'PX', math.ceil((new_tat - now) * 1000))
+return {1, '0'}
+"""
+
+
+class RedisBackend(RateLimitBackend):
+    """State shared by every node through Redis; one atomic script call per request; pass a fake `client` in tests"""
+
+    def __init__(self, url: str, prefix: str = "ratelimit:", client=None):
+        if client is None:
+            import redis.asyncio as redis
+
+            client = redis.from_url(url)
+        self.prefix = prefix
+        self.client = client
+        self.script = self.client.register_script(_GCRA_SCRIPT)
+
+    async def hit(self, key, interval, tolerance):
+        allowed, retry_after = await self.script(keys=[self.prefix + key], args=[interval, tolerance])
+        return bool(allowed), float(retry_after)
+
+
+def tier_limits() -> dict[str, int]:
+    """Requests per minute by account tier"""
+    return {
+        "free": settings.RATE_LIMIT_PER_MINUTE,
+        "pro": settings.RATE_LIMIT_PRO_PER_MINUTE,
+        "admin": settings.RATE_LIMIT_PRO_PER_MINUTE,
+    }
+
+
+class RateLimitMiddleware:
+    """ASGI middleware answering 429 with Retry-After once a client exceeds its limit"""
+
+    def __init__(self, app, backend: RateLimitBackend, exempt_paths: tuple[str, ...] = ("/", "/health")):
+        self.app = app
+        self.backend = backend
+        self.exempt_paths = frozenset(exempt_paths)
+        self.limits = tier_limits()
+        self.anonymous_limit = settings.RATE_LIMIT_ANONYMOUS_PER_MINUTE
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.exempt_paths:
+            await self.app(scope, receive, send)
+            return
+
+        key, limit = self.identify(scope)
+        if limit > 0:
+            interval = WINDOW_SECONDS / limit
+            try:
+                allowed, retry_after = await self.backend.hit(key, interval, WINDOW_SECONDS - interval)
+            except Exception:
+                # Fail open: an unreachable limiter must not take the API down
+                logger.exception("Rate limiter backend failed")
+                allowed = True
+            if not allowed:
+                await self.reject(send, limit, retry_after)
+                return
+        await self.app(scope, receive, send)
+
+    def identify(self, scope) -> tuple[str, int]:
+        """Rate limit key and per-minute limit for a request"""
+        for name, value in scope["headers"]:
+            if name == b"authorization":
+                scheme, _, token = value.decode("latin-1").partition(" ")
+                if scheme.lower() == "bearer" and token:
+                    payload = principal_cache.decode(token)
+                    if payload and payload.get("sub"):
+                        return f"user:{payload['sub']}", self.limits.get(self.tier_of(payload), self.limits["free"])
+                break
+        return f"ip:{self.client_ip(scope)}", self.anonymous_limit
+
+    @staticmethod
+    def tier_of(payload: dict) -> str:
+        # A cached user row is fresher than the claim in the token
+        try:
+            snapshot = principal_cache.users.get(UUID(payload["sub"]))
+        except ValueError:
+            snapshot = None
+        if snapshot is not None:
+            return snapshot.tier
+        return payload.get("tier") or "free"
+
+    @staticmethod
+    def client_ip(scope) -> str:
+        if settings.RATE_LIMIT_TRUST_FORWARDED:
+            for name, value in scope["headers"]:
+                if name == b"x-forwarded-for":
+                    return value.decode("latin-1").split(",")[0].strip()
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+
+    @staticmethod
+    async def reject(send, limit: int, retry_after: float) -> None:
+        body = json.dumps({"detail": "Rate limit exceeded"}).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode("ascii")),
+                (b"retry-after", str(max(1, math.ceil(retry_after))).encode("ascii")),
+                (b"x-ratelimit-limit", str(limit).encode("ascii")),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+def get_rate_limit_backend() -> Optional[RateLimitBackend]:
+    """Backend configured by RATE_LIMIT_BACKEND (None when "off")"""
+    if settings.RATE_LIMIT_BACKEND == "redis":
+        return RedisBackend(settings.REDIS_URL)
+    if settings.RATE_LIMIT_BACKEND == "memory":
+        return InMemoryBackend()
+    return None
@@ -1,9 +1,13 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional, Union
+from typing import Callable, Optional, TypeVar, Union
 from jose import jwt
 import bcrypt
 from app.core.config import settings
 
+T = TypeVar("T")
+
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create JWT access token"""
@@ -29,18 +33,72 @@ def create_refresh_token(data: dict) -> str:
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash"""
-    return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
+    # Same 72 byte truncation as get_password_hash
+    return bcrypt.checkpw(plain_password.encode('utf-8')[:72], hashed_password.encode('utf-8'))
 
 
 def get_password_hash(password: str) -> str:
     """Hash a password using bcrypt"""
     # bcrypt has a 72 byte limit, so we truncate if needed
     password_bytes = password.encode('utf-8')[:72]
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(rounds=settings.BCRYPT_ROUNDS)
     hashed = bcrypt.hashpw(password_bytes, salt)
     return hashed.decode('utf-8')
 
 
+def password_needs_rehash(hashed_password: str) -> bool:
+    """Whether a hash was made with a different cost than BCRYPT_ROUNDS"""
+    try:
+        return int(hashed_password.split("$")[2]) != settings.BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return True
+
+
+class PasswordHashingBusy(Exception):
+    """Too many password hashes are queued; the request should be shed"""
+
+
+class PasswordHashingPool:
+    """
+    Runs bcrypt on a small dedicated thread pool (bcrypt releases the GIL), so
+    a login burst queues here instead of blocking the event loop. Beyond
+    `max_pending` queued or running hashes, callers get PasswordHashingBusy.
+    With `workers=0` hashing runs inline on the event loop.
+    """
+
+    def __init__(self, workers: int, max_pending: int):
+        self.max_pending = max_pending
+        self.pending = 0
+        self._executor = (
+            ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+            if workers > 0 else None
+        )
+
+    async def run(self, func: Callable[..., T], *args) -> T:
+        if self._executor is None:
+            return func(*args)
+        if self.pending >= self.max_pending:
+            raise PasswordHashingBusy()
+        self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+        finally:
+            self.pending -= 1
+
+
+password_hashing_pool = PasswordHashingPool(settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_MAX_PENDING)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """verify_password on the hashing pool; raises PasswordHashingBusy when saturated"""
+    return await password_hashing_pool.run(verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """get_password_hash on the hashing pool; raises PasswordHashingBusy when saturated"""
+    return await password_hashing_pool.run(get_password_hash, password)
+
+
 def decode_token(token: str) -> Union[dict, None]:
     """Decode and verify JWT token"""
     try:
@@ -0,0 +1,353 @@
+"""
+Batched persistence for Tweet and Sentiment rows
+
+Rows are buffered in memory and written in batches instead of going through
+the ORM unit of work one object at a time. On Postgres with asyncpg, tweets are
+COPY'd into a temporary staging table and moved into `tweets` with
+INSERT ... SELECT ... ON CONFLICT (tweet_id) DO NOTHING, and sentiments are
+COPY'd directly. Other drivers fall back to multi-row INSERT statements.
+
+Tweets are stored once and linked to the searches that collected them through
+search_tweets. A tweet another search already stored is linked with
+`link_tweet` instead of being written again; one that a concurrent writer
+stores first loses the ON CONFLICT and is linked to the stored row.
+
+A tweet's raw_data is compressed as it is buffered and written to
+tweet_payloads (see app.db.payloads) rather than to the tweets row.
+
+Primary keys are generated client-side so sentiments can reference their tweet
+before either row reaches the database. Each flush also adds its newly linked
+tweets to the hourly/daily sentiment_rollups (see app.db.rollups) in the same
+transaction. A flush that fails rolls back and keeps its rows buffered, so
+`pending` stays truthful and the next flush retries them.
+"""
+import asyncio
+import json
+import logging
+import time
+import uuid
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import delete, insert, select, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from app.core.config import settings
+from app.db.models import SearchTweet, Sentiment, SentimentRollup, Tweet, TweetPayload
+from app.db.payloads import PayloadCodec, get_payload_codec
+from app.db.rollups import COUNT_COLUMNS, rollup_rows
+
+logger = logging.getLogger(__name__)
+
+TWEET_COLUMNS = [
+    "id", "tweet_id", "text", "author_username", "author_name",
+    "created_at_twitter", "retweet_count", "like_count", "reply_count",
+    "is_verified", "location", "created_at",
+]
+SENTIMENT_COLUMNS = [
+    "id", "tweet_id", "model_name", "model_version", "sentiment_label", "confidence_score",
+    "is_sarcastic", "sarcasm_score", "emotions", "created_at",
+]
+PAYLOAD_COLUMNS = ["tweet_id", "codec", "data"]
+JSON_COLUMNS = {"emotions"}
+
+
+def dialect_insert(dialect_name: str, table):
+    """INSERT construct that supports on_conflict_* where the dialect has it"""
+    if dialect_name == "postgresql":
+        return postgresql.insert(table)
+    if dialect_name == "sqlite":
+        return sqlite.insert(table)
+    return insert(table)
+
+
+class BulkWriter:
+    """Buffers Tweet, Sentiment and search link rows and flushes them in batches"""
+
+    def __init__(
+        self,
+        bind: AsyncEngine,
+        batch_size: int = settings.BULK_WRITE_BATCH_SIZE,
+        flush_interval: float = settings.BULK_WRITE_FLUSH_INTERVAL,
+        use_copy: bool = settings.BULK_WRITE_USE_COPY,
+        rollups: bool = True,
+        payload_codec: Optional[PayloadCodec] = None,
+    ):
+        self.bind = bind
+        self.payload_codec = payload_codec or get_payload_codec()
+        # Time-bucketed counts need an upsert (Postgres, SQLite)
+        self.rollups = rollups and bind.dialect.name in ("postgresql", "sqlite")
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.use_copy = use_copy and bind.dialect.name == "postgresql" and bind.dialect.driver == "asyncpg"
+        self.tweets_written = 0
+        self.sentiments_written = 0
+        self.links_written = 0
+        self._tweets: list[dict] = []
+        self._sentiments: list[dict] = []
+        self._links: list[dict] = []
+        self._payloads: list[dict] = []
+        # Already stored tweets being linked, and their first sentiment, for the rollups
+        self._stored_tweets: dict = {}
+        self._stored_sentiments: list[dict] = []
+        # Sentiments from an older model version, deleted as their replacements are written
+        self._replaced_sentiments: list[uuid.UUID] = []
+        self._lock = asyncio.Lock()
+        self._flushing = 0  # Rows of the flush in progress
+        self._last_flush = time.monotonic()
+        self._ticker: Optional[asyncio.Task] = None
+
+    async def __aenter__(self) -> "BulkWriter":
+        if self.flush_interval > 0:
+            self._ticker = asyncio.create_task(self._tick())
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        if self._ticker is not None:
+            # Holding the lock, the ticker is never cancelled in the middle of a flush's transaction
+            async with self._lock:
+                self._ticker.cancel()
+            await asyncio.gather(self._ticker, return_exceptions=True)
+            self._ticker = None
+        if exc_type is None:
+            await self.flush()
+
+    @property
+    def pending(self) -> int:
+        """Rows not committed yet, including those of a flush in progress"""
+        return len(self._tweets) + len(self._sentiments) + len(self._links) + self._flushing
+
+    def add_tweet(self, row: dict, search_id: uuid.UUID) -> uuid.UUID:
+        """Buffer a new tweet row linked to a search and return its (client-generated) id"""
+        row = {**row}
+        row.setdefault("id", uuid.uuid4())
+        row.setdefault("created_at", datetime.utcnow())
+        raw_data = row.pop("raw_data", None)
+        if raw_data is not None:
+            codec, data = self.payload_codec.encode(raw_data)
+            self._payloads.append({"tweet_id": row["id"], "codec": codec, "data": data})
+        self._tweets.append(row)
+        self._links.append({"search_id": search_id, "tweet_id": row["id"]})
+        return row["id"]
+
+    def link_tweet(self, search_id: uuid.UUID, tweet: dict, sentiment: Optional[dict] = None) -> None:
+        """
+        Link an already stored tweet to a search. `tweet` holds at least its id
+        and created_at_twitter, `sentiment` its first sentiment; both only
+        feed the rollups.
+        """
+        self._stored_tweets[tweet["id"]] = tweet
+        if sentiment is not None:
+            self._stored_sentiments.append({**sentiment, "tweet_id": tweet["id"]})
+        self._links.append({"search_id": search_id, "tweet_id": tweet["id"]})
+
+    def add_sentiment(self, row: dict) -> uuid.UUID:
+        """Buffer a sentiment row; row["tweet_id"] is the tweet's UUID primary key"""
+        row = {**row}
+        row.setdefault("id", uuid.uuid4())
+        row.setdefault("created_at", datetime.utcnow())
+        row.setdefault("is_sarcastic", False)
+        self._sentiments.append(row)
+        return row["id"]
+
+    def replace_sentiment(self, old_id: uuid.UUID, row: dict) -> uuid.UUID:
+        """Buffer a sentiment row that supersedes a stored one (e.g. from an older model version)"""
+        self._replaced_sentiments.append(old_id)
+        return self.add_sentiment(row)
+
+    async def maybe_flush(self) -> int:
+        """Flush if the buffer is full or the flush interval has passed"""
+        due = time.monotonic() - self._last_flush >= self.flush_interval
+        if len(self._links) >= self.batch_size or (due and self.pending):
+            return await self.flush()
+        return 0
+
+    async def flush(self) -> int:
+        """Write every buffered row in one transaction, returning tweets inserted"""
+        async with self._lock:
+            buffered = (
+                self._tweets, self._sentiments, self._links, self._payloads,
+                self._stored_tweets, self._stored_sentiments, self._replaced_sentiments,
+            )
+            self._tweets, self._sentiments, self._links, self._payloads = [], [], [], []
+            self._stored_tweets, self._stored_sentiments, self._replaced_sentiments = {}, [], []
+            self._last_flush = time.monotonic()
+            if not any(buffered[:3]):  # No tweets, sentiments or links
+                return 0
+
+            self._flushing = sum(len(rows) for rows in buffered[:3])
+            try:
+                inserted, written, linked = await self._write(*buffered)
+            except BaseException:
+                # The transaction rolled back: keep the rows for the next flush instead of losing them
+                self._restore(*buffered)
+                raise
+            finally:
+                self._flushing = 0
+
+            self.tweets_written += len(inserted)
+            self.sentiments_written += len(written)
+            self.links_written += len(linked)
+            return len(inserted)
+
+    def _restore(self, tweets, sentiments, links, payloads, stored_tweets, stored_sentiments, replaced) -> None:
+        """Put a failed flush's rows back in front of the rows buffered since"""
+        self._tweets[:0] = tweets
+        self._sentiments[:0] = sentiments
+        self._links[:0] = links
+        self._payloads[:0] = payloads
+        self._stored_tweets = {**stored_tweets, **self._stored_tweets}
+        self._stored_sentiments[:0] = stored_sentiments
+        self._replaced_sentiments[:0] = replaced
+
+    async def _write(self, tweets, sentiments, links, payloads, stored_tweets, stored_sentiments, replaced):
+        """One flush's transaction; returns the inserted tweet ids, written sentiments and new links"""
+        async with self.bind.begin() as conn:
+            if self.use_copy:
+                inserted = await self._copy_tweets(conn, tweets)
+            else:
+                inserted = await self._insert_tweets(conn, tweets)
+            # Tweets skipped by ON CONFLICT are linked to the row stored first...
+            stored_ids = await self._stored_ids(conn, [row for row in tweets if row["id"] not in inserted])
+
+            # ...and must not get sentiments pointing at them
+            new_ids = {row["id"] for row in tweets}
+            written = [
+                row for row in sentiments
+                if row["tweet_id"] in inserted or row["tweet_id"] not in new_ids
+            ]
+            payloads = [row for row in payloads if row["tweet_id"] in inserted]
+            if replaced:
+                await conn.execute(delete(Sentiment.__table__).where(Sentiment.__table__.c.id.in_(replaced)))
+            if self.use_copy:
+                await self._copy_rows(conn, "sentiments", SENTIMENT_COLUMNS, written)
+                await self._copy_rows(conn, "tweet_payloads", PAYLOAD_COLUMNS, payloads)
+            else:
+                await self._insert_rows(conn, Sentiment.__table__, SENTIMENT_COLUMNS, written)
+                await self._insert_rows(conn, TweetPayload.__table__, PAYLOAD_COLUMNS, payloads)
+
+            linked = await self._insert_links(conn, [
+                {**link, "tweet_id": stored_ids.get(link["tweet_id"], link["tweet_id"])}
+                for link in links
+                if link["tweet_id"] not in new_ids or link["tweet_id"] in inserted or link["tweet_id"] in stored_ids
+            ])
+            if self.rollups:
+                rollup_tweets = dict(stored_tweets)
+                for row in tweets:
+                    rollup_tweets.setdefault(stored_ids.get(row["id"], row["id"]), row)
+                # Stored tweets' own first sentiment comes first, as it drives their label
+                rollup_sentiments = stored_sentiments + [
+                    {**row, "tweet_id": stored_ids.get(row["tweet_id"], row["tweet_id"])} for row in sentiments
+                ]
+                await self._upsert_rollups(conn, rollup_rows(
+                    ({**rollup_tweets[tweet_id], "id": tweet_id, "search_id": search_id} for search_id, tweet_id in linked),
+                    rollup_sentiments,
+                ))
+        return inserted, written, linked
+
+    async def _tick(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.maybe_flush()
+            except Exception:
+                # Its rows stay buffered: the next flush retries them and raises to the caller if it fails too
+                logger.exception("Background flush failed")
+
+    # COPY path (Postgres + asyncpg)
+
+    @staticmethod
+    def _records(rows: list[dict], columns: list[str]) -> list[tuple]:
+        return [
+            tuple(
+                json.dumps(row.get(column)) if column in JSON_COLUMNS and row.get(column) is not None
+                else row.get(column)
+                for column in columns
+            )
+            for row in rows
+        ]
+
+    async def _copy_rows(self, conn: AsyncConnection, table: str, columns: list[str], rows: list[dict]) -> None:
+        if not rows:
+            return
+        raw = await conn.get_raw_connection()
+        await raw.driver_connection.copy_records_to_table(
+            table, records=self._records(rows, columns), columns=columns
+        )
+
+    async def _copy_tweets(self, conn: AsyncConnection, rows: list[dict]) -> set:
+        if not rows:
+            return set()
+        # Executing through SQLAlchemy first also opens the transaction COPY joins
+        await conn.execute(text(
+            "CREATE TEMP TABLE IF NOT EXISTS _tweets_stage "
+            "(LIKE tweets INCLUDING DEFAULTS) ON COMMIT DROP"
+        ))
+        await self._copy_rows(conn, "_tweets_stage", TWEET_COLUMNS, rows)
+        columns = ", ".join(TWEET_COLUMNS)
+        result = await conn.execute(text(
+            f"INSERT INTO tweets ({columns}) SELECT {columns} FROM _tweets_stage "
+            "ON CONFLICT (tweet_id) DO NOTHING RETURNING id"
+        ))
+        return set(result.scalars().all())
+
+    async def _stored_ids(self, conn: AsyncConnection, rows: list[dict]) -> dict:
+        """Map buffered tweets that lost the ON CONFLICT (tweet_id) to the id of the stored row"""
+        by_tweet_id = {row["tweet_id"]: row["id"] for row in rows if row.get("tweet_id") is not None}
+        if not by_tweet_id:
+            return {}
+        result = await conn.execute(
+            select(Tweet.tweet_id, Tweet.id).where(Tweet.tweet_id.in_(list(by_tweet_id)))
+        )
+        return {by_tweet_id[tweet_id]: stored_id for tweet_id, stored_id in result}
+
+    async def _insert_links(self, conn: AsyncConnection, links: list[dict]) -> set:
+        """Insert search_tweets rows, returning the (search_id, tweet_id) pairs that were not linked yet"""
+        if not links:
+            return set()
+        table = SearchTweet.__table__
+        stmt = dialect_insert(conn.dialect.name, table)
+        if conn.dialect.name not in ("postgresql", "sqlite"):
+            await conn.execute(stmt, links)
+            return {(link["search_id"], link["tweet_id"]) for link in links}
+        result = await conn.execute(
+            stmt.on_conflict_do_nothing().returning(table.c.search_id, table.c.tweet_id), links
+        )
+        return set(result.tuples().all())
+
+    async def _upsert_rollups(self, conn: AsyncConnection, rows: list[dict]) -> None:
+        """Add a batch's increments to sentiment_rollups, creating missing buckets"""
+        if not rows:
+            return
+        table = SentimentRollup.__table__
+        stmt = dialect_insert(conn.dialect.name, table).values(rows)
+        await conn.execute(stmt.on_conflict_do_update(
+            index_elements=["search_id", "granularity", "bucket_start"],
+            set_={column: table.c[column] + stmt.excluded[column] for column in COUNT_COLUMNS},
+        ))
+
+    # Multi-row INSERT fallback
+
+    async def _insert_rows(self, conn: AsyncConnection, table, columns: list[str], rows: list[dict], on_conflict=None):
+        """executemany through SQLAlchemy's insertmanyvalues, which batches into multi-row VALUES"""
+        if not rows:
+            return set()
+        params = [{column: row.get(column) for column in columns} for row in rows]
+        stmt = dialect_insert(conn.dialect.name, table)
+        if on_conflict is None:
+            await conn.execute(stmt, params)
+            return set()
+        result = await conn.execute(on_conflict(stmt).returning(table.c.id), params)
+        return set(result.scalars().all())
+
+    async def _insert_tweets(self, conn: AsyncConnection, rows: list[dict]) -> set:
+        if not rows:
+            return set()
+        if conn.dialect.name not in ("postgresql", "sqlite"):
+            await self._insert_rows(conn, Tweet.__table__, TWEET_COLUMNS, rows)
+            return {row["id"] for row in rows}
+        return await self._insert_rows(
+            conn, Tweet.__table__, TWEET_COLUMNS, rows,
+            on_conflict=lambda stmt: stmt.on_conflict_do_nothing(index_elements=["tweet_id"]),
+        )
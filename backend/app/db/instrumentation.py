@@ -0,0 +1,203 @@
+"""
+Opt-in database instrumentation (DB_INSTRUMENTATION)
+
+Engine events time every statement into a fixed-bucket latency histogram
+keyed by normalized SQL (literals and parameter lists collapsed), and
+statements slower than DB_SLOW_QUERY_MS are logged once, without their
+parameters. The instrumented pool records how long checkouts wait for a
+connection and exposes size/overflow gauges. Everything is in memory and
+read through the internal stats endpoint.
+"""
+import bisect
+import logging
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app.core.config import settings
+
+slow_query_logger = logging.getLogger("app.db.slow_queries")
+
+# Upper bounds in milliseconds; the last bucket is open-ended
+BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PARAM_RE = re.compile(r"\$\d+|%\(\w+\)s|%s|\?")
+_ITEM = r"\?(?:::[\w ]+)?"  # Placeholder with an optional ::type cast
+_LIST_RE = re.compile(rf"\(\s*{_ITEM}(?:\s*,\s*{_ITEM})+\s*\)")
+_ROWS_RE = re.compile(r"\(\.\.\.\)(?:\s*,\s*\(\.\.\.\))+")
+_SPACE_RE = re.compile(r"\s+")
+
+
+def normalize_sql(statement: str) -> str:
+    """Statement shape with literals, parameters and IN/VALUES lists collapsed"""
+    sql = _STRING_RE.sub("?", statement)
+    sql = _PARAM_RE.sub("?", sql)
+    sql = _NUMBER_RE.sub("?", sql)
+    sql = _LIST_RE.sub("(...)", sql)
+    sql = _ROWS_RE.sub("(...)", sql)
+    return _SPACE_RE.sub(" ", sql).strip()
+
+
+@dataclass
+class LatencyHistogram:
+    """Count, sum, max and fixed buckets of durations in milliseconds"""
+    count: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    buckets: list[int] = field(default_factory=lambda: [0] * (len(BUCKETS_MS) + 1))
+
+    def observe(self, elapsed_ms: float) -> None:
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.buckets[bisect.bisect_left(BUCKETS_MS, elapsed_ms)] += 1
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-quantile (max_ms for the open bucket)"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.buckets):
+            seen += bucket_count
+            if seen >= rank:
+                bound = min(BUCKETS_MS[i], self.max_ms) if i < len(BUCKETS_MS) else self.max_ms
+                return round(bound, 3)
+        return round(self.max_ms, 3)
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "total_ms": round(self.total_ms, 3),
+            "mean_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "p50_ms": self.quantile(0.5),
+            "p95_ms": self.quantile(0.95),
+            "p99_ms": self.quantile(0.99),
+            "max_ms": round(self.max_ms, 3),
+        }
+
+
+class EngineMetrics:
+    """Statement and pool metrics of one engine"""
+
+    def __init__(self, name: str, max_statements: int, slow_query_ms: float):
+        self.name = name
+        self.max_statements = max_statements
+        self.slow_query_ms = slow_query_ms
+        self.statements: dict[str, LatencyHistogram] = {}
+        self.checkout_wait = LatencyHistogram()
+        self.errors = 0
+        self.pool = None
+
+    def observe_statement(self, statement: str, elapsed_ms: float) -> None:
+        key = normalize_sql(statement)
+        histogram = self.statements.get(key)
+        if histogram is None:
+            # Past the cap, new shapes share one bucket instead of growing without bound
+            if len(self.statements) >= self.max_statements:
+                key = "<other>"
+                histogram = self.statements.setdefault(key, LatencyHistogram())
+            else:
+                histogram = self.statements[key] = LatencyHistogram()
+        histogram.observe(elapsed_ms)
+        if elapsed_ms >= self.slow_query_ms:
+            slow_query_logger.warning("Slow query on %s (%.1f ms): %s", self.name, elapsed_ms, key)
+
+    def pool_gauges(self) -> Optional[dict]:
+        pool = self.pool
+        if pool is None or not hasattr(pool, "checkedout"):
+            return None
+        return {
+            "size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": pool.overflow(),
+        }
+
+    def snapshot(self, limit: int = 20, order_by: str = "total_ms") -> dict:
+        statements = sorted(
+            ({"sql": sql, **histogram.to_dict()} for sql, histogram in self.statements.items()),
+            key=lambda row: row[order_by],
+            reverse=True,
+        )
+        return {
+            "pool": self.pool_gauges(),
+            "checkout_wait": self.checkout_wait.to_dict(),
+            "errors": self.errors,
+            "distinct_statements": len(self.statements),
+            "statements": statements[:limit],
+        }
+
+    def reset(self) -> None:
+        self.statements.clear()
+        self.checkout_wait = LatencyHistogram()
+        self.errors = 0
+
+
+# Engine name -> metrics, for every instrumented engine in this process
+registry: dict[str, EngineMetrics] = {}
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that times how long each checkout waits for a connection"""
+
+    metrics: Optional[EngineMetrics] = None
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            if self.metrics is not None:
+                self.metrics.checkout_wait.observe((time.perf_counter() - start) * 1000)
+
+    def recreate(self):
+        # engine.dispose() swaps in a fresh pool; keep reporting into the same metrics
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        if self.metrics is not None:
+            self.metrics.pool = pool
+        return pool
+
+
+def engine_options() -> dict:
+    """Extra create_async_engine() arguments for an engine that will be instrumented"""
+    return {"poolclass": InstrumentedQueuePool} if settings.DB_INSTRUMENTATION else {}
+
+
+def instrument_engine(engine: AsyncEngine, name: str = "primary") -> Optional[EngineMetrics]:
+    """Attach statement timing to an engine when DB_INSTRUMENTATION is on"""
+    if not settings.DB_INSTRUMENTATION:
+        return None
+    metrics = registry[name] = EngineMetrics(
+        name, settings.DB_METRICS_MAX_STATEMENTS, settings.DB_SLOW_QUERY_MS
+    )
+    sync_engine = engine.sync_engine
+    metrics.pool = sync_engine.pool
+    if isinstance(sync_engine.pool, InstrumentedQueuePool):
+        sync_engine.pool.metrics = metrics
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _start_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("_query_started", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _stop_timer(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["_query_started"].pop()
+        metrics.observe_statement(statement, (time.perf_counter() - started) * 1000)
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _count_error(exception_context):
+        metrics.errors += 1
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("_query_started"):
+            conn.info["_query_started"].pop()
+
+    return metrics
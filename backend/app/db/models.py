@@ -1,12 +1,21 @@
-from sqlalchemy import Boolean, Column, Integer, String, DateTime, ForeignKey, Text, Float, JSON
-from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
+from sqlalchemy import Boolean, Column, Computed, Integer, String, DateTime, ForeignKey, Text, Float, JSON, LargeBinary, Index
+from sqlalchemy.dialects.postgresql import TSVECTOR, UUID
+from sqlalchemy.orm import deferred, relationship
+from sqlalchemy.sql import func, literal_column
 from datetime import datetime
 import uuid
+from typing import Optional
+from app.db.payloads import get_payload_codec
 from app.db.session import Base
 
 
+def normalized_query_sql(column):
+    """SQL counterpart of app.tasks.dedup.normalize_query; literals inline so indexes on it match"""
+    return func.lower(func.btrim(func.regexp_replace(
+        column, literal_column(r"'\s+'"), literal_column("' '"), literal_column("'g'")
+    )))
+
+
 class User(Base):
     __tablename__ = "users"
 
@@ -41,25 +50,49 @@ class Search(Base):
     status = Column(String(20), default="pending")  # pending, processing, completed, failed
     total_tweets = Column(Integer, default=0)
     sentiment_summary = Column(JSON, nullable=True)  # {positive: 45, negative: 30, neutral: 20, sarcastic: 5}
-    emotion_summary = Column(JSON, nullable=True)
+    emotion_summary = Column(JSON, nullable=True)  # {joy: 0.42, anger: 0.1, ...}, mean per emotion
+    emotion_stats = Column(JSON, nullable=True)  # {joy: {mean: 0.42, std: 0.2, count: 310}, ...}
     entities = Column(JSON, nullable=True)
     time_range = Column(String(10), default="7d")  # 24h, 7d, 30d
+    dedup_key = Column(String(64), nullable=True)  # sha256 of normalized query + time_range
+    shared_from_id = Column(UUID(as_uuid=True), ForeignKey("searches.id", ondelete="SET NULL"), nullable=True)
+    origin = Column(String(20), nullable=False, default="user", server_default="user")  # user, alert (scheduler-run, not in history)
     created_at = Column(DateTime, default=datetime.utcnow, server_default=func.now())
     completed_at = Column(DateTime, nullable=True)
 
+    __table_args__ = (
+        Index("ix_searches_dedup_key_created_at", "dedup_key", "created_at"),
+        # Search history: keyset pagination and per-user counts
+        Index("ix_searches_user_id_created_at_id", user_id, created_at.desc(), id.desc()),
+        # ix_searches_query_trgm (GIN trigram index for the history substring
+        # filter) is left out on purpose: migration d4f81b6e2a93 only creates it
+        # where pg_trgm is available, so it cannot be part of the schema everywhere
+    )
+
     # Relationships
     user = relationship("User", back_populates="searches")
-    tweets = relationship("Tweet", back_populates="search", cascade="all, delete-orphan")
+    tweets = relationship("Tweet", secondary="search_tweets", back_populates="searches", passive_deletes=True)
     reports = relationship("Report", back_populates="search", cascade="all, delete-orphan")
 
+    @property
+    def result_source(self) -> str:
+        """Whether this search reuses another search's analysis ("shared") or ran its own ("fresh")"""
+        return "shared" if self.shared_from_id else "fresh"
+
+    @property
+    def analysis_id(self):
+        """Id of the search whose pipeline run (tweets, sentiments) backs this one"""
+        return self.shared_from_id or self.id
+
 
 class Tweet(Base):
     __tablename__ = "tweets"
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    search_id = Column(UUID(as_uuid=True), ForeignKey("searches.id", ondelete="CASCADE"), nullable=False)
     tweet_id = Column(String(50), unique=True, nullable=True)
     text = Column(Text, nullable=False)
+    # Full-text search document, maintained by Postgres
+    search_vector = deferred(Column(TSVECTOR, Computed("to_tsvector('english', text)", persisted=True)))
     author_username = Column(String(100), nullable=True)
     author_name = Column(String(100), nullable=True)
     created_at_twitter = Column(DateTime, nullable=True)
@@ -68,20 +101,54 @@ class Tweet(Base):
     reply_count = Column(Integer, default=0)
     is_verified = Column(Boolean, default=False)
     location = Column(String(255), nullable=True)
-    raw_data = Column(JSON, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow, server_default=func.now())
 
+    __table_args__ = (
+        Index("ix_tweets_search_vector", search_vector, postgresql_using="gin"),
+    )
+
     # Relationships
-    search = relationship("Search", back_populates="tweets")
+    searches = relationship("Search", secondary="search_tweets", back_populates="tweets", passive_deletes=True)
     sentiments = relationship("Sentiment", back_populates="tweet", cascade="all, delete-orphan")
+    # Never loaded implicitly: ask for it with selectinload(Tweet.payload)
+    payload = relationship(
+        "TweetPayload", uselist=False, lazy="raise", cascade="all, delete-orphan", passive_deletes=True
+    )
+
+    @property
+    def raw_data(self) -> Optional[dict]:
+        """The decoded raw payload; Tweet.payload must have been loaded"""
+        return self.payload.value if self.payload is not None else None
+
+
+class TweetPayload(Base):
+    """A tweet's raw API payload, compressed and kept off the tweets heap (see app.db.payloads)"""
+    __tablename__ = "tweet_payloads"
+
+    tweet_id = Column(UUID(as_uuid=True), ForeignKey("tweets.id", ondelete="CASCADE"), primary_key=True)
+    codec = Column(String(20), nullable=False)  # zstd, zstd:<dictionary id>, zlib
+    data = Column(LargeBinary, nullable=False)
+
+    @property
+    def value(self) -> dict:
+        return get_payload_codec().decode(self.codec, self.data)
+
+
+class SearchTweet(Base):
+    """Links a search to a tweet it collected; tweets and sentiments are stored once however many searches find them"""
+    __tablename__ = "search_tweets"
+
+    search_id = Column(UUID(as_uuid=True), ForeignKey("searches.id", ondelete="CASCADE"), primary_key=True)
+    tweet_id = Column(UUID(as_uuid=True), ForeignKey("tweets.id", ondelete="CASCADE"), primary_key=True, index=True)
 
 
 class Sentiment(Base):
     __tablename__ = "sentiments"
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    tweet_id = Column(UUID(as_uuid=True), ForeignKey("tweets.id", ondelete="CASCADE"), nullable=False)
+    tweet_id = Column(UUID(as_uuid=True), ForeignKey("tweets.id", ondelete="CASCADE"), nullable=False, index=True)
     model_name = Column(String(50), nullable=False)  # vader, roberta, custom
+    model_version = Column(String(50), nullable=True)  # NULL for rows written before versions were stored
     sentiment_label = Column(String(20), nullable=False)  # positive, negative, neutral
     confidence_score = Column(Float, nullable=True)
     is_sarcastic = Column(Boolean, default=False)
@@ -93,6 +160,41 @@ class Sentiment(Base):
     tweet = relationship("Tweet", back_populates="sentiments")
 
 
+class SentimentRollup(Base):
+    """Per-analysis counts by hour ("1h") or day ("1d") of Tweet.created_at_twitter"""
+    __tablename__ = "sentiment_rollups"
+
+    search_id = Column(UUID(as_uuid=True), ForeignKey("searches.id", ondelete="CASCADE"), primary_key=True)
+    granularity = Column(String(2), primary_key=True)  # 1h, 1d
+    bucket_start = Column(DateTime, primary_key=True)
+    tweet_count = Column(Integer, nullable=False, default=0)
+    positive = Column(Integer, nullable=False, default=0)
+    negative = Column(Integer, nullable=False, default=0)
+    neutral = Column(Integer, nullable=False, default=0)
+    sarcastic = Column(Integer, nullable=False, default=0)
+    emotion_count = Column(Integer, nullable=False, default=0)  # Tweets with emotion scores
+    joy_sum = Column(Float, nullable=False, default=0.0)
+    anger_sum = Column(Float, nullable=False, default=0.0)
+    fear_sum = Column(Float, nullable=False, default=0.0)
+    surprise_sum = Column(Float, nullable=False, default=0.0)
+    sadness_sum = Column(Float, nullable=False, default=0.0)
+
+
+class SentimentCacheEntry(Base):
+    """Model output keyed by normalized tweet text, shared across searches"""
+    __tablename__ = "sentiment_cache"
+
+    text_hash = Column(LargeBinary(16), primary_key=True)  # blake2b of normalized text
+    model_name = Column(String(50), primary_key=True)
+    model_version = Column(String(50), primary_key=True)
+    sentiment_label = Column(String(20), nullable=False)
+    confidence_score = Column(Float, nullable=True)
+    is_sarcastic = Column(Boolean, default=False)
+    sarcasm_score = Column(Float, nullable=True)
+    emotions = Column(JSON, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, server_default=func.now())
+
+
 class SavedSearch(Base):
     __tablename__ = "saved_searches"
 
@@ -102,8 +204,20 @@ class SavedSearch(Base):
     alert_enabled = Column(Boolean, default=False)
     alert_threshold = Column(Float, nullable=True)
     last_checked = Column(DateTime, nullable=True)
+    last_sentiment_summary = Column(JSON, nullable=True)  # Result of the last alert check, the baseline for the next
+    last_alert_at = Column(DateTime, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow, server_default=func.now())
 
+    __table_args__ = (
+        # Alert scheduler: subscribers of one topic (normalized query, see app.tasks.alerts)
+        Index(
+            "ix_saved_searches_alert_topic",
+            normalized_query_sql(query),
+            id,
+            postgresql_where=alert_enabled,
+        ),
+    )
+
     # Relationships
     user = relationship("User", back_populates="saved_searches")
 
@@ -115,10 +229,18 @@ class Report(Base):
     search_id = Column(UUID(as_uuid=True), ForeignKey("searches.id", ondelete="CASCADE"), nullable=False)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     format = Column(String(10), nullable=False)  # pdf, csv, json
-    file_url = Column(Text, nullable=True)
+    status = Column(String(20), default="pending", server_default="pending")  # pending, processing, completed, failed
+    file_url = Column(Text, nullable=True)  # Key in the report store (REPORT_STORAGE_DIR)
     file_size_kb = Column(Integer, nullable=True)
+    source_completed_at = Column(DateTime, nullable=True)  # Search.completed_at the report was built from
     created_at = Column(DateTime, default=datetime.utcnow, server_default=func.now())
-    expires_at = Column(DateTime, nullable=True)  # Auto-delete after 7 days
+    expires_at = Column(DateTime, nullable=True)  # Auto-delete after REPORT_TTL_DAYS
+
+    __table_args__ = (
+        # Cache lookup: (search, format, analysis it was built from)
+        Index("ix_reports_search_id_format", "search_id", "format", "source_completed_at"),
+        Index("ix_reports_expires_at", "expires_at"),
+    )
 
     # Relationships
     search = relationship("Search", back_populates="reports")
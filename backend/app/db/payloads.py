@@ -0,0 +1,147 @@
+"""
+Compressed storage for raw tweet payloads
+
+Tweet.raw_data (the source API's JSON for a tweet) is rarely read but is
+usually bigger than everything else on the row. It lives in the
+tweet_payloads side table instead, compressed with zstd (zlib when the
+zstandard package is not installed), so scans of tweets only touch the hot
+columns and an ORM fetch of a Tweet never loads it.
+
+Payloads are small and similar to each other, which is the case zstd
+dictionaries are made for. With TWEET_PAYLOAD_DICTIONARY_DIR set, a
+dictionary trained on stored payloads (`python -m app.db.payloads train`)
+is used for new payloads. Every dictionary ever used must stay in that
+directory: the codec of a row names the dictionary it needs.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import zlib
+from pathlib import Path
+from typing import Optional
+
+from app.core.config import settings
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+DICTIONARY_SUFFIX = ".zdict"
+
+
+class PayloadCodec:
+    """Encodes payload dicts to (codec, bytes) and back; not thread-safe"""
+
+    def __init__(
+        self,
+        codec: str = settings.TWEET_PAYLOAD_CODEC,
+        level: int = settings.TWEET_PAYLOAD_ZSTD_LEVEL,
+        dictionary_dir: Optional[str] = settings.TWEET_PAYLOAD_DICTIONARY_DIR,
+    ):
+        if codec not in ("zstd", "zlib"):
+            raise ValueError(f"Unknown payload codec {codec!r}")
+        if codec == "zstd" and zstandard is None:
+            logger.warning("zstandard is not installed, compressing tweet payloads with zlib")
+            codec = "zlib"
+        self.codec = codec
+        self.dictionaries: dict[int, "zstandard.ZstdCompressionDict"] = {}
+        newest = None
+        if zstandard is not None and dictionary_dir:
+            # The most recently trained dictionary compresses, all of them decompress
+            paths = sorted(Path(dictionary_dir).glob(f"*{DICTIONARY_SUFFIX}"), key=lambda path: path.stat().st_mtime)
+            for path in paths:
+                newest = zstandard.ZstdCompressionDict(path.read_bytes())
+                self.dictionaries[newest.dict_id()] = newest
+        self.dictionary_id = newest.dict_id() if codec == "zstd" and newest is not None else 0
+        self._compressor = zstandard.ZstdCompressor(level=level, dict_data=newest) if codec == "zstd" else None
+        self._decompressors: dict[int, "zstandard.ZstdDecompressor"] = {}
+
+    def encode(self, value) -> tuple[str, bytes]:
+        raw = json.dumps(value, separators=(",", ":")).encode("utf-8")
+        if self.codec == "zlib":
+            return "zlib", zlib.compress(raw, 6)
+        data = self._compressor.compress(raw)
+        return (f"zstd:{self.dictionary_id}" if self.dictionary_id else "zstd"), data
+
+    def decode(self, codec: str, data: bytes):
+        if codec == "zlib":
+            raw = zlib.decompress(data)
+        else:
+            raw = self._decompressor(codec).decompress(data)
+        return json.loads(raw)
+
+    def _decompressor(self, codec: str) -> "zstandard.ZstdDecompressor":
+        if zstandard is None:
+            raise RuntimeError("Reading zstd tweet payloads needs the zstandard package")
+        name, _, dictionary_id = codec.partition(":")
+        if name != "zstd":
+            raise ValueError(f"Unknown payload codec {codec!r}")
+        dictionary_id = int(dictionary_id or 0)
+        decompressor = self._decompressors.get(dictionary_id)
+        if decompressor is None:
+            if dictionary_id and dictionary_id not in self.dictionaries:
+                raise RuntimeError(f"zstd dictionary {dictionary_id} is not in TWEET_PAYLOAD_DICTIONARY_DIR")
+            decompressor = self._decompressors[dictionary_id] = zstandard.ZstdDecompressor(
+                dict_data=self.dictionaries.get(dictionary_id)
+            )
+        return decompressor
+
+
+_codec: Optional[PayloadCodec] = None
+
+
+def get_payload_codec() -> PayloadCodec:
+    global _codec
+    if _codec is None:
+        _codec = PayloadCodec()
+    return _codec
+
+
+def train_dictionary(samples: list, size: int = 112_640) -> "zstandard.ZstdCompressionDict":
+    """Train a zstd dictionary on payload dicts (a few thousand make a good sample)"""
+    if zstandard is None:
+        raise RuntimeError("Training a payload dictionary needs the zstandard package")
+    encoded = [json.dumps(sample, separators=(",", ":")).encode("utf-8") for sample in samples]
+    return zstandard.train_dictionary(size, encoded)
+
+
+async def _train_from_database(sample_size: int, size: int) -> Path:
+    from sqlalchemy import func, select
+
+    from app.db.models import TweetPayload
+    from app.db.session import AsyncSessionLocal, engine
+
+    codec = get_payload_codec()
+    async with AsyncSessionLocal() as db:
+        rows = (await db.execute(
+            select(TweetPayload.codec, TweetPayload.data).order_by(func.random()).limit(sample_size)
+        )).all()
+    await engine.dispose()
+    dictionary = train_dictionary([codec.decode(row.codec, row.data) for row in rows], size)
+    directory = Path(settings.TWEET_PAYLOAD_DICTIONARY_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"{dictionary.dict_id()}{DICTIONARY_SUFFIX}"
+    path.write_bytes(dictionary.as_bytes())
+    return path
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Tweet payload storage")
+    commands = parser.add_subparsers(dest="command", required=True)
+    train = commands.add_parser("train", help="Train a zstd dictionary on stored payloads")
+    train.add_argument("--samples", type=int, default=5000)
+    train.add_argument("--size", type=int, default=112_640, help="Dictionary size in bytes")
+    args = parser.parse_args()
+
+    if not settings.TWEET_PAYLOAD_DICTIONARY_DIR:
+        parser.error("Set TWEET_PAYLOAD_DICTIONARY_DIR to where dictionaries are kept")
+    path = asyncio.run(_train_from_database(args.samples, args.size))
+    print(f"Wrote {path}; restart the app to compress new payloads with it")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Time-bucketed sentiment rollups
+
+sentiment_rollups holds, per analysis and per hour and day of
+Tweet.created_at_twitter, the tweet count, label counts, sarcastic count and
+emotion sums. BulkWriter folds every flushed batch into it with one
+INSERT ... ON CONFLICT DO UPDATE in the same transaction as the tweets, so
+trend charts read a few hundred rollup rows however many tweets a search
+has. Day buckets are rolled up from the same hourly groups as they are
+written.
+
+Labels come from the first sentiment buffered for a tweet (the model that
+drives the search summary). Tweets without a timestamp are not bucketed.
+"""
+from datetime import datetime
+from typing import Iterable, Optional
+
+from app.ml.base import EMOTIONS
+from app.tasks.aggregation import SENTIMENT_LABELS
+
+GRANULARITIES = ("1h", "1d")
+
+COUNT_COLUMNS = ["tweet_count", *SENTIMENT_LABELS, "sarcastic", "emotion_count", *(f"{emotion}_sum" for emotion in EMOTIONS)]
+
+
+def bucket_start(timestamp: datetime, granularity: str) -> datetime:
+    if granularity == "1h":
+        return timestamp.replace(minute=0, second=0, microsecond=0)
+    return timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def rollup_rows(tweets: Iterable[dict], sentiments: Iterable[dict]) -> list[dict]:
+    """Rollup increments for a batch of tweet and sentiment rows (as given to BulkWriter)"""
+    primary: dict = {}
+    for sentiment in sentiments:
+        primary.setdefault(sentiment["tweet_id"], sentiment)
+
+    hours: dict[tuple, dict] = {}
+    for tweet in tweets:
+        timestamp = tweet.get("created_at_twitter")
+        if timestamp is None:
+            continue
+        key = (tweet["search_id"], bucket_start(timestamp, "1h"))
+        row = hours.get(key)
+        if row is None:
+            row = hours[key] = dict.fromkeys(COUNT_COLUMNS, 0)
+        row["tweet_count"] += 1
+        sentiment = primary.get(tweet["id"])
+        if sentiment is None:
+            continue
+        if sentiment["sentiment_label"] in SENTIMENT_LABELS:
+            row[sentiment["sentiment_label"]] += 1
+        if sentiment.get("is_sarcastic"):
+            row["sarcastic"] += 1
+        emotions = sentiment.get("emotions")
+        if emotions:
+            row["emotion_count"] += 1
+            for emotion in EMOTIONS:
+                row[f"{emotion}_sum"] += float(emotions.get(emotion) or 0.0)
+
+    rows = []
+    days: dict[tuple, dict] = {}
+    for (search_id, hour), counts in hours.items():
+        rows.append({"search_id": search_id, "granularity": "1h", "bucket_start": hour, **counts})
+        day_key = (search_id, bucket_start(hour, "1d"))
+        day = days.get(day_key)
+        if day is None:
+            days[day_key] = dict(counts)
+        else:
+            for column in COUNT_COLUMNS:
+                day[column] += counts[column]
+    for (search_id, day), counts in days.items():
+        rows.append({"search_id": search_id, "granularity": "1d", "bucket_start": day, **counts})
+    return rows
+
+
+def align_series(series: list[list[dict]]) -> tuple[list[datetime], list[list[Optional[dict]]]]:
+    """Put several time series on the union of their timestamps, None where one has no point"""
+    timestamps = sorted({point["timestamp"] for points in series for point in points})
+    aligned = []
+    for points in series:
+        by_timestamp = {point["timestamp"]: point for point in points}
+        aligned.append([by_timestamp.get(timestamp) for timestamp in timestamps])
+    return timestamps, aligned
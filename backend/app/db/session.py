@@ -1,14 +1,38 @@
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+import logging
+import time
+from typing import Optional
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import declarative_base
 from app.core.config import settings
+from app.db.instrumentation import engine_options, instrument_engine
+
+logger = logging.getLogger(__name__)
 
 # Create async engine
 engine = create_async_engine(
     settings.DATABASE_URL,
-    echo=True,
+    echo=settings.DB_ECHO,
     future=True,
     pool_pre_ping=True,
+    **engine_options(),
 )
+instrument_engine(engine)
+
+# Reads run in autocommit mode: no BEGIN/COMMIT round trips around them
+read_engine = engine.execution_options(isolation_level="AUTOCOMMIT")
+
+replica_engine = None
+if settings.DATABASE_REPLICA_URL:
+    replica_engine = create_async_engine(
+        settings.DATABASE_REPLICA_URL,
+        echo=settings.DB_ECHO,
+        future=True,
+        pool_pre_ping=True,
+        isolation_level="AUTOCOMMIT",
+        **engine_options(),
+    )
+    instrument_engine(replica_engine, "replica")
 
 # Create async session factory
 AsyncSessionLocal = async_sessionmaker(
@@ -19,10 +43,50 @@ AsyncSessionLocal = async_sessionmaker(
     autoflush=False,
 )
 
+# Session factory for read-only work; bound per session by ReplicaRouter
+ReadSessionLocal = async_sessionmaker(
+    class_=AsyncSession,
+    expire_on_commit=False,
+    autocommit=False,
+    autoflush=False,
+)
+
 # Create base class for models
 Base = declarative_base()
 
 
+class ReplicaRouter:
+    """Opens read-only sessions on the replica, falling back to the primary while it is down"""
+
+    def __init__(self, replica: Optional[AsyncEngine], primary: AsyncEngine, retry_seconds: float):
+        self.replica = replica
+        self.primary = primary
+        self.retry_seconds = retry_seconds
+        self._replica_down_until = 0.0
+
+    async def session(self) -> AsyncSession:
+        if self.replica is not None and time.monotonic() >= self._replica_down_until:
+            session = ReadSessionLocal(bind=self.replica)
+            try:
+                await session.connection()
+                return session
+            except (DBAPIError, OSError):
+                await session.close()
+                self._replica_down_until = time.monotonic() + self.retry_seconds
+                logger.warning(
+                    "Read replica unavailable, using the primary for %.0fs", self.retry_seconds, exc_info=True
+                )
+        return ReadSessionLocal(bind=self.primary)
+
+
+replica_router = ReplicaRouter(replica_engine, read_engine, settings.DATABASE_REPLICA_RETRY_SECONDS)
+
+
+def uses_replica(session: AsyncSession) -> bool:
+    """Whether a session reads from the replica (and may lag behind recent writes)"""
+    return replica_engine is not None and session.bind is replica_engine
+
+
 async def get_db() -> AsyncSession:
     """Dependency to get database session"""
     async with AsyncSessionLocal() as session:
@@ -34,3 +98,12 @@ async def get_db() -> AsyncSession:
             raise
         finally:
             await session.close()
+
+
+async def get_read_db() -> AsyncSession:
+    """Dependency for read-only endpoints: replica when configured, autocommit, never committed"""
+    session = await replica_router.session()
+    try:
+        yield session
+    finally:
+        await session.close()
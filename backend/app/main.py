@@ -1,14 +1,43 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
-from app.api.v1 import auth, searches
+from app.core.rate_limit import RateLimitMiddleware, get_rate_limit_backend
+from app.api.v1 import auth, internal, reports, searches
+from app.reports.jobs import report_worker
+from app.sources.base import close_tweet_source
+from app.tasks.alerts import alert_scheduler
+from app.tasks.worker import analysis_worker
+from app.websocket import routes as websocket_routes
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start and stop in-process background workers"""
+    if settings.ANALYSIS_EAGER:
+        await analysis_worker.start()
+        await report_worker.start()
+        if settings.ALERTS_ENABLED:
+            await alert_scheduler.start()
+    yield
+    await alert_scheduler.stop()
+    await report_worker.stop()
+    await analysis_worker.stop()
+    await close_tweet_source()
+
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
     version=settings.VERSION,
-    openapi_url=f"{settings.API_V1_STR}/openapi.json"
+    openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    lifespan=lifespan,
 )
 
+# Rate limiting (added before CORS so 429 responses still carry CORS headers)
+rate_limit_backend = get_rate_limit_backend()
+if rate_limit_backend is not None:
+    app.add_middleware(RateLimitMiddleware, backend=rate_limit_backend)
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -21,6 +50,9 @@ app.add_middleware(
 # Include routers
 app.include_router(auth.router, prefix=f"{settings.API_V1_STR}/auth", tags=["auth"])
 app.include_router(searches.router, prefix=f"{settings.API_V1_STR}/searches", tags=["searches"])
+app.include_router(reports.router, prefix=f"{settings.API_V1_STR}/reports", tags=["reports"])
+app.include_router(internal.router, prefix=f"{settings.API_V1_STR}/internal", tags=["internal"])
+app.include_router(websocket_routes.router, tags=["websocket"])
 
 
 @app.get("/")
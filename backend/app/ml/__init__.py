@@ -0,0 +1 @@
+# Empty file to make ml a package
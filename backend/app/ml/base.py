@@ -0,0 +1,71 @@
+import asyncio
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Optional, Sequence
+
+import numpy as np
+
+from app.ml.text import normalize_spacing
+
+EMOTIONS = ("joy", "anger", "fear", "surprise", "sadness")
+
+
+@dataclass
+class BatchScores:
+    """Column-oriented scores for one batch of tweets, one entry per input text"""
+    model_name: str
+    sentiment_label: Sequence[str]
+    confidence_score: Sequence[float]
+    is_sarcastic: Optional[Sequence[bool]] = None
+    sarcasm_score: Optional[Sequence[float]] = None
+    emotions: Optional[Sequence[Optional[dict]]] = None
+    model_version: Optional[str] = None
+    # Alternative to `emotions`: (n, len(EMOTIONS)) array, NaN rows for texts without emotion scores
+    emotion_scores: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self.sentiment_label)
+
+    def slice(self, start: int, stop: int) -> "BatchScores":
+        """Scores of texts start..stop of the batch"""
+        def part(column):
+            return column[start:stop] if column is not None else None
+        return BatchScores(
+            model_name=self.model_name,
+            sentiment_label=self.sentiment_label[start:stop],
+            confidence_score=part(self.confidence_score),
+            is_sarcastic=part(self.is_sarcastic),
+            sarcasm_score=part(self.sarcasm_score),
+            emotions=part(self.emotions),
+            model_version=self.model_version,
+            emotion_scores=part(self.emotion_scores),
+        )
+
+    def emotions_at(self, i: int) -> Optional[dict]:
+        """The i-th text's emotions as stored in Sentiment.emotions"""
+        if self.emotion_scores is not None:
+            row = self.emotion_scores[i]
+            if np.isnan(row[0]):
+                return None
+            return dict(zip(EMOTIONS, row.round(4).tolist()))
+        return self.emotions[i] if self.emotions is not None else None
+
+
+class SentimentScorer(ABC):
+    """Base class for sentiment models used by the analysis pipeline"""
+
+    model_name: str = "custom"
+    model_version: str = "1"
+    # Texts with the same normalized form share a sentiment cache entry. The
+    # default only drops differences no model sees; models that ignore case or
+    # URLs (lexicon scorers) can normalize further and get more hits
+    cache_normalizer = staticmethod(normalize_spacing)
+
+    @abstractmethod
+    def score_batch(self, texts: Sequence[str]) -> BatchScores:
+        """Score a batch of tweet texts (CPU-bound, called off the event loop)"""
+
+    async def score(self, texts: Sequence[str]) -> BatchScores:
+        """score_batch on a worker thread; registry models micro-batch concurrent calls here"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.score_batch, texts)
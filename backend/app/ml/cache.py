@@ -0,0 +1,311 @@
+"""
+Content-addressed cache of model output
+
+Retweets and copypasta mean the same text gets scored over and over across
+searches. Results are keyed by (blake2b of the normalized text, model_name,
+model_version) and kept in a bounded in-process LRU in front of a persistent
+store: the sentiment_cache table, or a local SQLite file for single-box setups.
+Each model says how far its texts may be normalized (cache_normalizer): vader
+ignores case and URLs, a cased model only shares entries across whitespace and
+the RT prefix.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, NamedTuple, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.config import settings
+from app.db.bulk import dialect_insert
+from app.db.models import SentimentCacheEntry
+from app.ml.base import EMOTIONS, BatchScores, SentimentScorer
+from app.ml.text import normalize_text
+
+logger = logging.getLogger(__name__)
+
+class CachedSentiment(NamedTuple):
+    """The Sentiment fields a model produces for one text"""
+    sentiment_label: str
+    confidence_score: Optional[float]
+    is_sarcastic: bool
+    sarcasm_score: Optional[float]
+    emotions: Optional[dict]
+    # The text's row of BatchScores.emotion_scores (EMOTIONS order, NaN without emotions),
+    # for models that return an array; rebuilt from `emotions` where a store doesn't keep it
+    emotion_row: Optional[tuple] = None
+
+
+@dataclass
+class CacheStats:
+    """Per-search hit/miss counters"""
+    memory_hits: int = 0
+    store_hits: int = 0
+    misses: int = 0
+    model_calls: int = 0  # Distinct texts actually scored
+
+    @property
+    def lookups(self) -> int:
+        return self.memory_hits + self.store_hits + self.misses
+
+    @property
+    def hit_rate(self) -> float:
+        return (self.memory_hits + self.store_hits) / self.lookups if self.lookups else 0.0
+
+    def merge(self, other: "CacheStats") -> None:
+        self.memory_hits += other.memory_hits
+        self.store_hits += other.store_hits
+        self.misses += other.misses
+        self.model_calls += other.model_calls
+
+
+def text_hash(text: str, normalizer: Callable[[str], str] = normalize_text) -> bytes:
+    # Other normalizers hash into their own key space, so a model that changes
+    # normalizer can't hit entries keyed by a coarser one
+    person = b"" if normalizer is normalize_text else normalizer.__name__.encode("utf-8")[:16]
+    return hashlib.blake2b(normalizer(text).encode("utf-8"), digest_size=16, person=person).digest()
+
+
+class CacheStore(ABC):
+    """Persistent tier behind the in-process LRU"""
+
+    @abstractmethod
+    async def get_many(self, model_name: str, model_version: str, hashes: Sequence[bytes]) -> dict:
+        """Return {text_hash: CachedSentiment} for the hashes that are stored"""
+
+    @abstractmethod
+    async def put_many(self, model_name: str, model_version: str, entries: dict) -> None:
+        """Store {text_hash: CachedSentiment}, ignoring keys that already exist"""
+
+
+class DatabaseCacheStore(CacheStore):
+    """sentiment_cache table in the main database"""
+
+    def __init__(self, bind: AsyncEngine):
+        self.bind = bind
+
+    async def get_many(self, model_name, model_version, hashes):
+        table = SentimentCacheEntry.__table__
+        async with self.bind.connect() as conn:
+            rows = await conn.execute(
+                select(
+                    table.c.text_hash, table.c.sentiment_label, table.c.confidence_score,
+                    table.c.is_sarcastic, table.c.sarcasm_score, table.c.emotions,
+                ).where(
+                    table.c.model_name == model_name,
+                    table.c.model_version == model_version,
+                    table.c.text_hash.in_(list(hashes)),
+                )
+            )
+            return {bytes(row[0]): CachedSentiment(*row[1:]) for row in rows}
+
+    async def put_many(self, model_name, model_version, entries):
+        if not entries:
+            return
+        table = SentimentCacheEntry.__table__
+        # The table has no emotion_row column; get_many rebuilds it from emotions
+        params = [
+            {"text_hash": text_hash, "model_name": model_name, "model_version": model_version,
+             **{name: value for name, value in entry._asdict().items() if name != "emotion_row"}}
+            for text_hash, entry in entries.items()
+        ]
+        async with self.bind.begin() as conn:
+            stmt = dialect_insert(conn.dialect.name, table)
+            if hasattr(stmt, "on_conflict_do_nothing"):
+                stmt = stmt.on_conflict_do_nothing()
+            await conn.execute(stmt, params)
+
+
+class FileCacheStore(CacheStore):
+    """Local SQLite file, for running on one box without the shared table"""
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sentiment_cache ("
+            " text_hash BLOB, model_name TEXT, model_version TEXT, payload TEXT,"
+            " PRIMARY KEY (text_hash, model_name, model_version))"
+        )
+        self._conn.commit()
+
+    def _get_many(self, model_name, model_version, hashes):
+        found = {}
+        with self._lock:
+            # Stay under SQLite's bound parameter limit
+            for start in range(0, len(hashes), 900):
+                chunk = hashes[start:start + 900]
+                rows = self._conn.execute(
+                    "SELECT text_hash, payload FROM sentiment_cache"
+                    " WHERE model_name = ? AND model_version = ?"
+                    f" AND text_hash IN ({','.join('?' * len(chunk))})",
+                    [model_name, model_version, *chunk],
+                )
+                for text_hash, payload in rows:
+                    found[bytes(text_hash)] = CachedSentiment(*json.loads(payload))
+        return found
+
+    def _put_many(self, model_name, model_version, entries):
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO sentiment_cache VALUES (?, ?, ?, ?)",
+                [
+                    (text_hash, model_name, model_version, json.dumps(list(entry)))
+                    for text_hash, entry in entries.items()
+                ],
+            )
+            self._conn.commit()
+
+    async def get_many(self, model_name, model_version, hashes):
+        return await asyncio.to_thread(self._get_many, model_name, model_version, list(hashes))
+
+    async def put_many(self, model_name, model_version, entries):
+        if entries:
+            await asyncio.to_thread(self._put_many, model_name, model_version, entries)
+
+
+class LRUCache:
+    """Bounded least-recently-used mapping (event-loop only, not thread-safe)"""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data: OrderedDict = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key):
+        value = self._data.get(key)
+        if value is not None:
+            self._data.move_to_end(key)
+        return value
+
+    def put(self, key, value) -> None:
+        self._data[key] = value
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+
+class SentimentCache:
+    """Scores texts through the LRU and persistent tiers, calling the model only on misses"""
+
+    def __init__(self, store: Optional[CacheStore] = None, maxsize: int = settings.SENTIMENT_CACHE_SIZE):
+        self.store = store
+        self.memory = LRUCache(maxsize)
+        self.stats = CacheStats()
+
+    async def score(self, scorer: SentimentScorer, texts: Sequence[str], stats: Optional[CacheStats] = None) -> BatchScores:
+        run_stats = CacheStats()
+        name, version = scorer.model_name, scorer.model_version
+        normalizer = scorer.cache_normalizer
+        results: list[Optional[CachedSentiment]] = [None] * len(texts)
+
+        # Memory tier; identical texts in the batch collapse onto one key
+        missing: dict[bytes, list[int]] = {}
+        for i, text in enumerate(texts):
+            key = text_hash(text, normalizer)
+            entry = self.memory.get((key, name, version))
+            if entry is not None:
+                results[i] = entry
+                run_stats.memory_hits += 1
+            else:
+                missing.setdefault(key, []).append(i)
+
+        # Persistent tier
+        if missing and self.store is not None:
+            found = await self.store.get_many(name, version, list(missing))
+            for key, entry in found.items():
+                self.memory.put((key, name, version), entry)
+                for i in missing.pop(key):
+                    results[i] = entry
+                    run_stats.store_hits += 1
+
+        # Model, once per distinct missing text
+        if missing:
+            keys = list(missing)
+            scores = await scorer.score([texts[missing[key][0]] for key in keys])
+            fresh = {}
+            for j, key in enumerate(keys):
+                entry = _entry_from_scores(scores, j)
+                fresh[key] = entry
+                self.memory.put((key, name, version), entry)
+                for i in missing[key]:
+                    results[i] = entry
+                    run_stats.misses += 1
+            run_stats.model_calls += len(keys)
+            if self.store is not None:
+                try:
+                    await self.store.put_many(name, version, fresh)
+                except Exception:
+                    logger.exception("Failed to write %d entries to the sentiment cache", len(fresh))
+
+        self.stats.merge(run_stats)
+        if stats is not None:
+            stats.merge(run_stats)
+        return _scores_from_entries(name, version, results)
+
+
+def _entry_from_scores(scores: BatchScores, i: int) -> CachedSentiment:
+    return CachedSentiment(
+        sentiment_label=str(scores.sentiment_label[i]),
+        confidence_score=float(scores.confidence_score[i]) if scores.confidence_score is not None else None,
+        is_sarcastic=bool(scores.is_sarcastic[i]) if scores.is_sarcastic is not None else False,
+        sarcasm_score=float(scores.sarcasm_score[i]) if scores.sarcasm_score is not None else None,
+        emotions=scores.emotions_at(i),
+        emotion_row=tuple(scores.emotion_scores[i].tolist()) if scores.emotion_scores is not None else None,
+    )
+
+
+def _emotion_row(entry: CachedSentiment) -> tuple:
+    if entry.emotion_row is not None:
+        return entry.emotion_row
+    # From a store that only keeps the emotions dict
+    if entry.emotions is not None and set(entry.emotions) == set(EMOTIONS):
+        return tuple(entry.emotions[emotion] for emotion in EMOTIONS)
+    return (np.nan,) * len(EMOTIONS)
+
+
+def _scores_from_entries(model_name: str, model_version: str, entries: list[CachedSentiment]) -> BatchScores:
+    sarcasm = [entry.sarcasm_score for entry in entries]
+    emotions = [entry.emotions for entry in entries]
+    emotion_scores = None
+    if any(entry.emotion_row is not None for entry in entries):
+        # The model returns an array: hand one back, like a direct call would
+        emotion_scores = np.array([_emotion_row(entry) for entry in entries], dtype=np.float64)
+        emotions = None
+    return BatchScores(
+        model_name=model_name,
+        sentiment_label=np.array([entry.sentiment_label for entry in entries], dtype=object),
+        confidence_score=np.array([entry.confidence_score for entry in entries], dtype=np.float64),
+        is_sarcastic=np.array([entry.is_sarcastic for entry in entries], dtype=bool),
+        sarcasm_score=sarcasm if any(value is not None for value in sarcasm) else None,
+        emotions=emotions if emotions is not None and any(value is not None for value in emotions) else None,
+        model_version=model_version,
+        emotion_scores=emotion_scores,
+    )
+
+
+_cache: Optional[SentimentCache] = None
+
+
+def get_sentiment_cache() -> Optional[SentimentCache]:
+    """Process-wide cache configured by SENTIMENT_CACHE_BACKEND (None when "off")"""
+    global _cache
+    if _cache is None and settings.SENTIMENT_CACHE_BACKEND != "off":
+        store: Optional[CacheStore] = None
+        if settings.SENTIMENT_CACHE_BACKEND == "db":
+            from app.db.session import engine
+            store = DatabaseCacheStore(engine)
+        elif settings.SENTIMENT_CACHE_BACKEND == "file":
+            store = FileCacheStore(settings.SENTIMENT_CACHE_PATH)
+        _cache = SentimentCache(store)
+    return _cache
@@ -0,0 +1,68 @@
+"""
+Sparse-matrix emotion scoring
+
+The emotion lexicon becomes a sparse term-by-emotion matrix (vocabulary size x
+5, CSR) once, when the scorer is built. A batch is tokenized in one pass into
+token ids and document indices, which make a sparse document-term count
+matrix (repeated terms add up), and one sparse product with the lexicon
+matrix gives every tweet's raw emotion weights. Rows are normalized to
+proportions that sum to 1; tweets without any emotion term get NaN rows, so
+they count as unscored rather than as all-zero. The result is an (n, 5) float
+array in EMOTIONS order.
+"""
+import hashlib
+from typing import Optional, Sequence
+
+import numpy as np
+from scipy import sparse
+
+from app.core.config import settings
+from app.ml.base import EMOTIONS
+from app.ml.emotion_lexicon import load_emotion_terms
+from app.ml.text import Vocabulary
+
+
+class EmotionScorer:
+    """Scores joy/anger/fear/surprise/sadness for whole batches with one sparse product"""
+
+    def __init__(self, terms: Optional[dict] = None, vocab: Optional[Vocabulary] = None):
+        if terms is None:
+            terms = load_emotion_terms(settings.EMOTION_LEXICON_PATH)
+        self.fingerprint = hashlib.sha1(
+            repr(sorted((word, sorted(emotions.items())) for word, emotions in terms.items())).encode()
+        ).hexdigest()[:8]
+        # A shared vocabulary (e.g. VaderScorer's) lets both scorers use one tokenization
+        self.vocab = vocab if vocab is not None else Vocabulary(sorted(terms))
+
+        rows, columns, weights = [], [], []
+        for word, emotions in terms.items():
+            token_id = self.vocab[word]
+            if not token_id:
+                continue
+            for emotion, weight in emotions.items():
+                rows.append(token_id)
+                columns.append(EMOTIONS.index(emotion))
+                weights.append(weight)
+        self.matrix = sparse.csr_matrix(
+            (np.array(weights, dtype=np.float64), (rows, columns)), shape=(self.vocab.size, len(EMOTIONS))
+        )
+        self.matrix.sum_duplicates()
+
+    def score_tokens(self, ids: np.ndarray, docs: np.ndarray, n: int) -> np.ndarray:
+        """(n, 5) emotion proportions from a batch's token ids and their document indices"""
+        if n == 0:
+            return np.zeros((0, len(EMOTIONS)))
+        # Tokens come grouped by document, so the CSR index pointer is a running count per document
+        indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(docs, minlength=n), out=indptr[1:])
+        counts = sparse.csr_matrix(
+            (np.ones(len(ids), dtype=np.float64), ids, indptr), shape=(n, self.vocab.size)
+        )
+        weights = (counts @ self.matrix).toarray()
+        totals = weights.sum(axis=1, keepdims=True)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(totals > 0, weights / totals, np.nan)
+
+    def score_batch(self, texts: Sequence[str]) -> np.ndarray:
+        ids, docs = self.vocab.encode_batch(texts)
+        return self.score_tokens(ids, docs, len(texts))
@@ -0,0 +1,89 @@
+"""
+Built-in emotion lexicon for the emotion scorer
+
+A compact word -> {emotion: intensity} table (0..1) in the spirit of the NRC
+Emotion Intensity Lexicon. EMOTION_LEXICON_PATH can point at a full lexicon
+file with "word<TAB>emotion<TAB>score" lines, the format of both the NRC
+intensity lexicon and EmoLex (0/1 scores); emotions other than joy, anger,
+fear, surprise and sadness are ignored.
+"""
+from pathlib import Path
+from typing import Optional
+
+from app.ml.base import EMOTIONS
+
+EMOTION_TERMS = {
+    # Joy
+    "happy": {"joy": 0.8}, "happiness": {"joy": 0.85}, "joy": {"joy": 0.95}, "joyful": {"joy": 0.9},
+    "glad": {"joy": 0.6}, "love": {"joy": 0.8}, "loved": {"joy": 0.75}, "lovely": {"joy": 0.7},
+    "delight": {"joy": 0.85}, "delighted": {"joy": 0.85}, "excited": {"joy": 0.7, "surprise": 0.3},
+    "exciting": {"joy": 0.65, "surprise": 0.3}, "celebrate": {"joy": 0.8}, "celebrating": {"joy": 0.8},
+    "fun": {"joy": 0.6}, "laugh": {"joy": 0.65}, "lol": {"joy": 0.5}, "haha": {"joy": 0.5},
+    "yay": {"joy": 0.7}, "proud": {"joy": 0.6}, "grateful": {"joy": 0.6}, "thankful": {"joy": 0.6},
+    "win": {"joy": 0.6}, "won": {"joy": 0.65}, "victory": {"joy": 0.7}, "success": {"joy": 0.6},
+    "beautiful": {"joy": 0.6}, "awesome": {"joy": 0.7}, "amazing": {"joy": 0.65, "surprise": 0.4},
+    "great": {"joy": 0.5}, "wonderful": {"joy": 0.75}, "hope": {"joy": 0.45}, "hopeful": {"joy": 0.5},
+    "relief": {"joy": 0.5}, "relieved": {"joy": 0.5}, "congrats": {"joy": 0.7}, "congratulations": {"joy": 0.75},
+    "smile": {"joy": 0.6}, "enjoy": {"joy": 0.6}, "enjoyed": {"joy": 0.6}, "blessed": {"joy": 0.65},
+    "cheer": {"joy": 0.6}, "peace": {"joy": 0.4}, "best": {"joy": 0.45},
+    # Anger
+    "angry": {"anger": 0.85}, "anger": {"anger": 0.85}, "mad": {"anger": 0.7}, "furious": {"anger": 0.95},
+    "rage": {"anger": 0.95}, "outrage": {"anger": 0.9}, "outraged": {"anger": 0.9}, "hate": {"anger": 0.8},
+    "hated": {"anger": 0.75}, "annoyed": {"anger": 0.55}, "annoying": {"anger": 0.55}, "irritated": {"anger": 0.55},
+    "pissed": {"anger": 0.8}, "disgusting": {"anger": 0.7}, "disgusted": {"anger": 0.7}, "unfair": {"anger": 0.6},
+    "corrupt": {"anger": 0.65}, "liar": {"anger": 0.7}, "lies": {"anger": 0.6}, "scam": {"anger": 0.65},
+    "fraud": {"anger": 0.65}, "betrayed": {"anger": 0.7, "sadness": 0.5}, "insult": {"anger": 0.65},
+    "ridiculous": {"anger": 0.5}, "stupid": {"anger": 0.55}, "idiot": {"anger": 0.6}, "shame": {"anger": 0.45, "sadness": 0.4},
+    "worst": {"anger": 0.5, "sadness": 0.3}, "terrible": {"anger": 0.4, "fear": 0.3, "sadness": 0.4},
+    "awful": {"anger": 0.4, "sadness": 0.45}, "fight": {"anger": 0.55}, "attack": {"anger": 0.6, "fear": 0.5},
+    "violence": {"anger": 0.7, "fear": 0.65}, "protest": {"anger": 0.5}, "boycott": {"anger": 0.5},
+    # Fear
+    "afraid": {"fear": 0.8}, "fear": {"fear": 0.85}, "scared": {"fear": 0.8}, "scary": {"fear": 0.75},
+    "terrified": {"fear": 0.95}, "terror": {"fear": 0.95}, "panic": {"fear": 0.85}, "worried": {"fear": 0.6},
+    "worry": {"fear": 0.6}, "anxious": {"fear": 0.65}, "anxiety": {"fear": 0.7}, "nervous": {"fear": 0.55},
+    "threat": {"fear": 0.7}, "danger": {"fear": 0.75}, "dangerous": {"fear": 0.75}, "risk": {"fear": 0.45},
+    "crisis": {"fear": 0.65, "sadness": 0.4}, "crash": {"fear": 0.6, "surprise": 0.4}, "war": {"fear": 0.8, "anger": 0.5},
+    "storm": {"fear": 0.5}, "disaster": {"fear": 0.75, "sadness": 0.6}, "collapse": {"fear": 0.6},
+    "virus": {"fear": 0.6}, "warning": {"fear": 0.5}, "emergency": {"fear": 0.7}, "horror": {"fear": 0.85},
+    "nightmare": {"fear": 0.75}, "uncertain": {"fear": 0.4}, "recession": {"fear": 0.55, "sadness": 0.4},
+    # Surprise
+    "surprise": {"surprise": 0.85}, "surprised": {"surprise": 0.85}, "surprising": {"surprise": 0.8},
+    "shocked": {"surprise": 0.85, "fear": 0.3}, "shocking": {"surprise": 0.85, "fear": 0.3}, "shock": {"surprise": 0.8},
+    "unexpected": {"surprise": 0.75}, "suddenly": {"surprise": 0.6}, "sudden": {"surprise": 0.6},
+    "wow": {"surprise": 0.75, "joy": 0.3}, "omg": {"surprise": 0.75}, "unbelievable": {"surprise": 0.8},
+    "incredible": {"surprise": 0.6, "joy": 0.4}, "astonishing": {"surprise": 0.85}, "stunned": {"surprise": 0.8},
+    "whoa": {"surprise": 0.7}, "finally": {"surprise": 0.35, "joy": 0.35}, "breaking": {"surprise": 0.5},
+    "reveal": {"surprise": 0.5}, "revealed": {"surprise": 0.5}, "twist": {"surprise": 0.6},
+    # Sadness
+    "sad": {"sadness": 0.8}, "sadness": {"sadness": 0.85}, "unhappy": {"sadness": 0.7}, "cry": {"sadness": 0.75},
+    "crying": {"sadness": 0.8}, "tears": {"sadness": 0.7}, "heartbroken": {"sadness": 0.95}, "grief": {"sadness": 0.95},
+    "miss": {"sadness": 0.5}, "missed": {"sadness": 0.45}, "lonely": {"sadness": 0.75}, "depressed": {"sadness": 0.9},
+    "depressing": {"sadness": 0.8}, "lost": {"sadness": 0.55}, "lose": {"sadness": 0.5}, "loss": {"sadness": 0.65},
+    "died": {"sadness": 0.85}, "death": {"sadness": 0.8, "fear": 0.5}, "rip": {"sadness": 0.8}, "sorry": {"sadness": 0.45},
+    "disappointed": {"sadness": 0.65}, "disappointing": {"sadness": 0.6}, "hurt": {"sadness": 0.65},
+    "pain": {"sadness": 0.6}, "tragic": {"sadness": 0.85}, "tragedy": {"sadness": 0.85}, "broke": {"sadness": 0.45},
+    "fail": {"sadness": 0.5}, "failed": {"sadness": 0.55}, "failure": {"sadness": 0.6}, "regret": {"sadness": 0.6},
+}
+
+
+def _read_lexicon_file(path: Path) -> dict:
+    terms: dict = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            parts = line.rstrip("\n").split("\t")
+            if len(parts) < 3 or parts[1] not in EMOTIONS:
+                continue
+            try:
+                score = float(parts[2])
+            except ValueError:
+                continue
+            if score > 0:
+                terms.setdefault(parts[0].lower(), {})[parts[1]] = score
+    return terms
+
+
+def load_emotion_terms(path: Optional[str] = None) -> dict:
+    """Return the emotion lexicon, from EMOTION_LEXICON_PATH when set"""
+    if path:
+        return _read_lexicon_file(Path(path))
+    return {word: dict(emotions) for word, emotions in EMOTION_TERMS.items()}
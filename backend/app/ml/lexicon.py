@@ -0,0 +1,146 @@
+"""
+Built-in sentiment lexicon for the "vader" scorer
+
+A compact subset of VADER-style valences on a -4..4 scale, plus booster and
+negation word lists. If the vaderSentiment package is installed (or
+VADER_LEXICON_PATH points at a vader_lexicon.txt), the full lexicon is used
+instead.
+"""
+import logging
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+VALENCE = {
+    # Positive
+    "good": 1.9, "great": 3.1, "excellent": 2.7, "amazing": 2.8, "awesome": 3.1,
+    "fantastic": 2.6, "wonderful": 2.7, "brilliant": 2.8, "outstanding": 3.0,
+    "superb": 3.1, "perfect": 2.7, "best": 3.2, "better": 1.9, "nice": 1.8,
+    "cool": 1.3, "fun": 2.3, "funny": 1.9, "happy": 2.7, "happiness": 2.6,
+    "glad": 2.0, "joy": 2.8, "joyful": 2.9, "love": 3.2, "loved": 2.9,
+    "loves": 2.7, "lovely": 2.8, "like": 1.5, "liked": 1.8, "likes": 1.8,
+    "enjoy": 2.2, "enjoyed": 2.3, "win": 2.8, "wins": 2.7, "won": 2.7,
+    "winning": 2.4, "success": 2.7, "successful": 2.8, "hope": 1.9,
+    "hopeful": 2.3, "proud": 2.1, "pride": 1.4, "thanks": 1.9, "thank": 1.5,
+    "grateful": 2.0, "beautiful": 2.9, "pretty": 2.2, "strong": 2.3,
+    "support": 1.7, "supports": 1.5, "agree": 1.5, "positive": 2.6,
+    "excited": 1.4, "exciting": 2.2, "impressive": 2.3, "impressed": 2.1,
+    "helpful": 1.8, "help": 1.7, "smart": 1.7, "safe": 1.9, "secure": 1.4,
+    "free": 2.3, "fair": 1.3, "honest": 2.3, "trust": 2.3, "calm": 1.3,
+    "peace": 2.5, "peaceful": 2.2, "celebrate": 2.7, "congrats": 2.4,
+    "congratulations": 2.9, "yay": 2.4, "wow": 2.8, "lol": 2.9, "haha": 2.0,
+    "recommend": 1.5, "favorite": 2.0, "incredible": 2.7,
+    "improve": 1.9, "improved": 2.1, "improvement": 2.0, "benefit": 2.0,
+    "gain": 2.4, "growth": 1.6, "promising": 1.7, "solid": 1.5,
+    "kind": 2.4, "friendly": 2.2, "welcome": 2.0, "easy": 1.9, "clean": 1.7,
+    "healthy": 1.7, "hero": 2.6, "legend": 1.6, "inspiring": 2.4,
+    "optimistic": 2.2, "confident": 2.2, "relief": 2.1, "relieved": 1.6,
+    "victory": 2.7, "boost": 1.7, "cute": 2.0, "sweet": 2.0, "excellence": 3.1,
+    "fabulous": 2.4, "glorious": 2.4, "delight": 2.9, "delighted": 2.5,
+    "satisfied": 1.8, "pleased": 1.9, "pleasure": 2.7, "ok": 1.2, "okay": 0.9,
+    "fine": 0.8, "yes": 1.7, "bless": 1.9, "blessed": 2.9, "laugh": 2.2,
+    "smile": 1.5, "smiles": 2.1, "innovative": 1.9, "genius": 1.9,
+
+    # Negative
+    "bad": -2.5, "worse": -2.1, "worst": -3.1, "terrible": -2.1, "horrible": -2.5,
+    "awful": -2.0, "poor": -2.1, "sad": -2.1, "sadness": -1.9, "unhappy": -1.8,
+    "angry": -2.3, "anger": -2.7, "mad": -2.2, "hate": -2.7, "hated": -3.2,
+    "hates": -1.9, "dislike": -1.6, "disgusting": -2.4, "disgust": -2.9,
+    "fail": -2.5, "failed": -2.3, "failure": -2.3, "fails": -1.8, "lose": -1.6,
+    "loss": -1.3, "lost": -1.3, "losing": -1.6, "wrong": -2.1, "broken": -1.7,
+    "problem": -1.7, "problems": -1.7, "issue": -0.4, "crisis": -3.1,
+    "disaster": -3.1, "scandal": -1.9, "corrupt": -3.0, "corruption": -1.9,
+    "lie": -1.6, "lies": -1.8, "liar": -2.3, "fake": -2.1, "fraud": -2.8,
+    "scam": -2.7, "stupid": -2.4, "dumb": -2.3, "idiot": -2.3, "ugly": -2.3,
+    "boring": -1.3, "annoying": -1.7, "annoyed": -1.6, "upset": -1.6,
+    "fear": -2.2, "afraid": -2.2, "scared": -2.2, "scary": -2.2, "worried": -1.2,
+    "worry": -1.9, "anxious": -1.0, "panic": -2.3, "danger": -2.4,
+    "dangerous": -2.1, "threat": -2.4, "attack": -2.1, "war": -2.9, "kill": -3.7,
+    "killed": -3.5, "death": -2.9, "dead": -3.3, "die": -2.9, "died": -2.6,
+    "violence": -3.1, "violent": -2.9, "crime": -2.5, "criminal": -2.4,
+    "guilty": -1.8, "shame": -2.1, "shameful": -2.2, "pathetic": -2.2,
+    "weak": -1.9, "useless": -1.8, "waste": -1.8, "wasted": -2.2, "ruin": -2.8,
+    "ruined": -2.2, "destroy": -2.7, "destroyed": -2.6, "damage": -2.2,
+    "hurt": -2.4, "pain": -2.3, "painful": -1.9, "suffer": -2.5,
+    "suffering": -2.1, "cry": -2.1, "crying": -2.1, "tears": -0.9, "alone": -1.0,
+    "lonely": -1.5, "depressed": -2.3, "depressing": -1.6, "miserable": -2.2,
+    "tragic": -3.4, "tragedy": -3.4, "sick": -2.3, "ill": -1.8, "toxic": -2.0,
+    "negative": -2.7, "against": -1.4, "reject": -1.7, "rejected": -2.3,
+    "blame": -1.4, "complain": -1.5, "outrage": -2.3, "outraged": -2.5,
+    "furious": -2.7, "rage": -2.6, "disappointed": -1.9, "disappointing": -2.2,
+    "disappointment": -2.3, "unfair": -2.1, "risk": -1.1, "risky": -0.8,
+    "chaos": -2.7, "mess": -1.5, "nightmare": -2.1, "hell": -3.6, "damn": -1.7,
+    "sucks": -1.5, "suck": -1.9, "crap": -1.6, "shit": -2.6, "wtf": -2.8,
+    "ugh": -1.8, "no": -1.2, "slow": -0.6, "expensive": -0.9, "decline": -1.5,
+    "crash": -1.7, "collapse": -2.2, "recession": -1.8, "inflation": -1.0,
+    "unemployment": -1.9, "layoffs": -1.4, "evil": -3.4, "betray": -3.2,
+    "betrayed": -3.0, "hostile": -2.2, "shocked": -1.3, "shocking": -1.7,
+    "terrifying": -2.7, "terrified": -3.0, "hopeless": -2.0, "ridiculous": -1.5,
+}
+
+# Words that scale the valence of the next sentiment word (VADER B_INCR / B_DECR)
+BOOSTERS = {
+    "absolutely": 0.293, "amazingly": 0.293, "completely": 0.293,
+    "considerably": 0.293, "deeply": 0.293, "enormously": 0.293,
+    "entirely": 0.293, "especially": 0.293, "exceptionally": 0.293,
+    "extremely": 0.293, "fully": 0.293, "greatly": 0.293, "highly": 0.293,
+    "hugely": 0.293, "incredibly": 0.293, "intensely": 0.293, "majorly": 0.293,
+    "more": 0.293, "most": 0.293, "particularly": 0.293, "purely": 0.293,
+    "quite": 0.293, "really": 0.293, "remarkably": 0.293, "so": 0.293,
+    "substantially": 0.293, "thoroughly": 0.293, "totally": 0.293,
+    "tremendously": 0.293, "truly": 0.293, "unbelievably": 0.293,
+    "utterly": 0.293, "very": 0.293, "super": 0.293,
+    "almost": -0.293, "barely": -0.293, "hardly": -0.293, "kinda": -0.293,
+    "kindof": -0.293, "less": -0.293, "little": -0.293, "marginally": -0.293,
+    "occasionally": -0.293, "partly": -0.293, "scarcely": -0.293,
+    "slightly": -0.293, "somewhat": -0.293, "sorta": -0.293,
+}
+
+NEGATIONS = {
+    "not", "no", "never", "none", "nobody", "nothing", "neither", "nor",
+    "nowhere", "cannot", "without", "isnt", "isn't", "arent", "aren't",
+    "wasnt", "wasn't", "werent", "weren't", "dont", "don't", "doesnt",
+    "doesn't", "didnt", "didn't", "cant", "can't", "couldnt", "couldn't",
+    "wont", "won't", "wouldnt", "wouldn't", "shouldnt", "shouldn't",
+    "hasnt", "hasn't", "havent", "haven't", "hadnt", "hadn't", "aint",
+    "ain't", "mustnt", "mustn't", "neednt", "needn't",
+}
+
+# VADER constants
+NEGATION_SCALAR = -0.74
+EXCLAMATION_BOOST = 0.292
+MAX_EXCLAMATIONS = 4
+NEGATION_WINDOW = 3
+BOOSTER_DAMPING = (1.0, 0.95, 0.9)  # By distance from the sentiment word
+NORMALIZATION_ALPHA = 15.0
+POSITIVE_THRESHOLD = 0.05
+NEGATIVE_THRESHOLD = -0.05
+
+
+def _read_lexicon_file(path: Path) -> dict:
+    valence = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            parts = line.rstrip("\n").split("\t")
+            if len(parts) >= 2:
+                try:
+                    valence[parts[0].lower()] = float(parts[1])
+                except ValueError:
+                    continue
+    return valence
+
+
+def load_valence(path: Optional[str] = None) -> dict:
+    """Return the valence lexicon, preferring the full VADER lexicon when available"""
+    if path:
+        return _read_lexicon_file(Path(path))
+    try:
+        import vaderSentiment
+    except ImportError:
+        return dict(VALENCE)
+    bundled = Path(vaderSentiment.__file__).parent / "vader_lexicon.txt"
+    if bundled.exists():
+        logger.info("Using VADER lexicon from %s", bundled)
+        return _read_lexicon_file(bundled)
+    return dict(VALENCE)
@@ -0,0 +1,188 @@
+"""
+Sentiment model registry
+
+Models are registered by name with a factory; "module:attribute" factories
+are only imported when the model is first needed. A model is loaded once per
+process and kept for every later task, so worker processes stay warm.
+SENTIMENT_MODELS lists the models the pipeline runs (the first drives search
+summaries) and SENTIMENT_MODEL_PLUGINS registers more, e.g.
+{"custom": "mypkg.models:CustomScorer"}. Models run on CPU in worker threads.
+
+Each loaded model sits behind a MicroBatcher: concurrent score() calls, from
+searches being analyzed at the same time, wait up to MODEL_BATCH_MAX_WAIT_MS
+(and while the model is busy) and are scored together in calls of up to
+MODEL_BATCH_MAX_SIZE texts. Cheap models like vader want a wait of 0-2 ms;
+models with a high cost per call gain from waiting longer.
+"""
+import asyncio
+import importlib
+import logging
+import threading
+import time
+from typing import Callable, Optional, Sequence, Union
+
+from app.core.config import settings
+from app.ml.base import BatchScores, SentimentScorer
+
+logger = logging.getLogger(__name__)
+
+Factory = Union[str, Callable[[], SentimentScorer]]
+
+
+class MicroBatcher:
+    """Coalesces concurrent score() calls for one model; one inference call runs at a time"""
+
+    def __init__(self, scorer: SentimentScorer, max_batch_size: int, max_wait: float):
+        self.scorer = scorer
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.calls = 0  # score_batch calls made
+        self.requests = 0  # score() calls served
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pending: list[tuple[Sequence[str], asyncio.Future]] = []
+        self._pending_texts = 0
+        self._timer: Optional[asyncio.Handle] = None
+        self._running: Optional[asyncio.Task] = None
+
+    async def score(self, texts: Sequence[str]) -> BatchScores:
+        if not texts:
+            return self.scorer.score_batch(texts)
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Celery runs each task in a new event loop; whatever was queued on the old one is gone
+            self._loop = loop
+            self._pending, self._pending_texts, self._timer, self._running = [], 0, None, None
+        future = loop.create_future()
+        self._pending.append((texts, future))
+        self._pending_texts += len(texts)
+        if self._pending_texts >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None and self.max_wait > 0:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        elif self._timer is None:
+            # No wait: still batch with the calls made in the same event loop iteration
+            self._timer = loop.call_soon(self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        # A running drain picks up everything queued meanwhile
+        if self._running is None and self._pending:
+            self._running = self._loop.create_task(self._drain())
+
+    async def _drain(self) -> None:
+        try:
+            while self._pending:
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+                batch, size = [], 0
+                while self._pending and (not batch or size + len(self._pending[0][0]) <= self.max_batch_size):
+                    request = self._pending.pop(0)
+                    batch.append(request)
+                    size += len(request[0])
+                self._pending_texts -= size
+                await self._infer(batch)
+        finally:
+            self._running = None
+
+    async def _infer(self, batch: list[tuple[Sequence[str], asyncio.Future]]) -> None:
+        texts = [text for request, _ in batch for text in request]
+        self.calls += 1
+        self.requests += len(batch)
+        try:
+            scores = await self.scorer.score(texts)
+        except Exception as exc:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        offset = 0
+        for request, future in batch:
+            if not future.done():  # The caller may have been cancelled
+                future.set_result(scores.slice(offset, offset + len(request)))
+            offset += len(request)
+
+
+class RegisteredModel(SentimentScorer):
+    """A loaded model behind its micro-batcher"""
+
+    def __init__(self, model: SentimentScorer, max_batch_size: int, max_wait: float):
+        self.model = model
+        self.model_name = model.model_name
+        self.model_version = model.model_version
+        self.cache_normalizer = model.cache_normalizer
+        self.batcher = MicroBatcher(model, max_batch_size, max_wait)
+
+    def score_batch(self, texts: Sequence[str]) -> BatchScores:
+        return self.model.score_batch(texts)
+
+    async def score(self, texts: Sequence[str]) -> BatchScores:
+        return await self.batcher.score(texts)
+
+
+class ModelRegistry:
+    """Sentiment models by name, loaded on first use and kept for the life of the process"""
+
+    def __init__(
+        self,
+        max_batch_size: int = settings.MODEL_BATCH_MAX_SIZE,
+        max_wait_ms: float = settings.MODEL_BATCH_MAX_WAIT_MS,
+    ):
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._factories: dict[str, Factory] = {}
+        self._models: dict[str, RegisteredModel] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, factory: Factory) -> None:
+        with self._lock:
+            self._factories[name] = factory
+            self._models.pop(name, None)
+
+    @property
+    def names(self) -> list[str]:
+        return list(self._factories)
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._models
+
+    def get(self, name: str) -> RegisteredModel:
+        model = self._models.get(name)
+        if model is None:
+            with self._lock:
+                model = self._models.get(name)
+                if model is None:
+                    model = self._models[name] = self._load(name)
+        return model
+
+    def scorers(self, names: Sequence[str]) -> list[RegisteredModel]:
+        return [self.get(name) for name in names]
+
+    async def load(self, names: Sequence[str]) -> list[RegisteredModel]:
+        """scorers() with any loading done on a worker thread"""
+        if all(self.is_loaded(name) for name in names):
+            return self.scorers(names)
+        return await asyncio.to_thread(self.scorers, names)
+
+    def _load(self, name: str) -> RegisteredModel:
+        factory = self._factories.get(name)
+        if factory is None:
+            raise ValueError(f"Unknown sentiment model {name!r}, registered: {', '.join(self._factories)}")
+        if isinstance(factory, str):
+            module, _, attribute = factory.partition(":")
+            factory = getattr(importlib.import_module(module), attribute)
+        start = time.perf_counter()
+        model = factory()
+        if model.model_name != name:
+            raise ValueError(f"Sentiment model registered as {name!r} calls itself {model.model_name!r}")
+        logger.info("Loaded sentiment model %s %s in %.2fs", name, model.model_version, time.perf_counter() - start)
+        return RegisteredModel(model, self.max_batch_size, self.max_wait)
+
+
+model_registry = ModelRegistry()
+model_registry.register("vader", "app.ml.vader:VaderScorer")
+for _name, _factory in settings.SENTIMENT_MODEL_PLUGINS.items():
+    model_registry.register(_name, _factory)
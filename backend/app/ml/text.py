@@ -0,0 +1,94 @@
+"""
+Batch tokenization shared by the lexicon-based scorers
+
+A whole batch is joined with a record separator, encoded once and run through
+a single bytes.translate() that lowercases ASCII letters and blanks out
+everything else, so splitting on whitespace yields the tokens. Tokens are then
+mapped to integer ids in one C-level loop and downstream scoring works on flat
+NumPy arrays instead of per-tweet lists.
+
+Also holds the text normalizations that sentiment cache keys are built from
+(see SentimentScorer.cache_normalizer).
+"""
+import re
+from itertools import repeat
+from typing import Iterable, Sequence
+
+import numpy as np
+
+_RETWEET_RE = re.compile(r"^rt @\w+:\s*", re.IGNORECASE)
+_URL_RE = re.compile(r"https?://\S+")
+_SPACE_RE = re.compile(r"\s+")
+
+DOC_SEPARATOR = "\x1e"
+UNKNOWN_ID = 0
+SEPARATOR_ID = 1
+
+# Keep a-z (lowercasing A-Z), apostrophes, "!" and the separator; everything else splits
+_BYTE_TABLE = bytes(
+    c + 32 if 65 <= c <= 90 else c if (97 <= c <= 122 or c in (33, 39, 0x1E)) else 32
+    for c in range(256)
+)
+
+
+def _split(text: str) -> list[bytes]:
+    data = b" " + text.replace("’", "'").encode("utf-8").translate(_BYTE_TABLE) + b" "
+    data = data.replace(b"!", b" ! ").replace(b"\x1e", b" \x1e ")
+    # Drop quotes around words but keep contractions like "don't"
+    data = data.replace(b" '", b" ").replace(b"' ", b" ")
+    return data.split()
+
+
+def tokenize_batch(texts: Sequence[str]) -> list[bytes]:
+    """Tokenize every text in one pass, separating documents with DOC_SEPARATOR"""
+    joined = DOC_SEPARATOR.join(texts)
+    if joined.count(DOC_SEPARATOR) != max(len(texts) - 1, 0):
+        joined = DOC_SEPARATOR.join(text.replace(DOC_SEPARATOR, " ") for text in texts)
+    return _split(joined)
+
+
+def tokenize(text: str) -> list[str]:
+    """Tokenize a single text (reference path)"""
+    return [token.decode("ascii") for token in _split(text.replace(DOC_SEPARATOR, " "))]
+
+
+class Vocabulary:
+    """Maps tokens to dense integer ids; 0 is unknown, 1 is the document separator"""
+
+    def __init__(self, words: Iterable[str]):
+        self.index = {DOC_SEPARATOR: SEPARATOR_ID}
+        for word in words:
+            if word not in self.index:
+                self.index[word] = len(self.index) + 1
+        self.size = len(self.index) + 1
+        self._byte_index = {word.encode("utf-8"): i for word, i in self.index.items()}
+
+    def __getitem__(self, word: str) -> int:
+        return self.index.get(word, UNKNOWN_ID)
+
+    def encode(self, tokens: Sequence[bytes]) -> np.ndarray:
+        return np.fromiter(
+            map(self._byte_index.get, tokens, repeat(UNKNOWN_ID)),
+            dtype=np.int32,
+            count=len(tokens),
+        )
+
+    def encode_batch(self, texts: Sequence[str]) -> tuple[np.ndarray, np.ndarray]:
+        """Return (token ids, document index of each token) for a batch, separators removed"""
+        ids = self.encode(tokenize_batch(texts))
+        is_separator = ids == SEPARATOR_ID
+        docs = np.cumsum(is_separator, dtype=np.int32)
+        keep = ~is_separator
+        return ids[keep], docs[keep]
+
+
+def normalize_spacing(text: str) -> str:
+    """Single spaces and no RT prefix; case and URLs are kept"""
+    text = _SPACE_RE.sub(" ", text).strip()
+    return _RETWEET_RE.sub("", text)
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase, no RT prefix or URLs, single spaces: all the lexicon scorers can tell apart"""
+    text = _URL_RE.sub("", normalize_spacing(text).lower())
+    return _SPACE_RE.sub(" ", text).strip()
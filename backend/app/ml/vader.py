@@ -0,0 +1,163 @@
+"""
+Vectorized lexicon sentiment scorer (model_name "vader")
+
+Implements the core VADER heuristics - lexicon valence, booster words,
+negation within a three-token window, exclamation emphasis and the
+x / sqrt(x^2 + alpha) normalization - over a whole batch at once: the batch is
+tokenized in one pass, tokens become integer ids, and every adjustment is a
+shifted NumPy array operation followed by a per-document bincount.
+
+`score_text_reference` is the straightforward per-tweet implementation of the
+same rules and is kept as the parity baseline.
+
+With EMOTION_SCORING on, the scorer also fills emotion_scores from the same
+token ids with an EmotionScorer that shares its vocabulary.
+"""
+import hashlib
+import math
+from typing import Optional, Sequence
+
+import numpy as np
+
+from app.core.config import settings
+from app.ml import lexicon
+from app.ml.base import BatchScores, SentimentScorer
+from app.ml.emotion import EmotionScorer
+from app.ml.emotion_lexicon import load_emotion_terms
+from app.ml.text import Vocabulary, normalize_text, tokenize
+
+LABELS = np.array(["negative", "neutral", "positive"], dtype=object)
+
+
+def _label_and_confidence(compound: float) -> tuple[str, float]:
+    if compound >= lexicon.POSITIVE_THRESHOLD:
+        return "positive", abs(compound)
+    if compound <= lexicon.NEGATIVE_THRESHOLD:
+        return "negative", abs(compound)
+    return "neutral", 1.0 - abs(compound)
+
+
+def score_text_reference(text: str, valence: Optional[dict] = None) -> tuple[str, float, float]:
+    """Score one text with plain Python loops; returns (label, confidence, compound)"""
+    valence = lexicon.VALENCE if valence is None else valence
+    tokens = tokenize(text)
+
+    total = 0.0
+    exclamations = 0
+    for i, token in enumerate(tokens):
+        if token == "!":
+            exclamations += 1
+            continue
+        value = valence.get(token, 0.0)
+        if value == 0.0:
+            continue
+
+        negated = False
+        for distance in range(1, lexicon.NEGATION_WINDOW + 1):
+            if i - distance < 0:
+                break
+            previous = tokens[i - distance]
+            if previous in lexicon.BOOSTERS:
+                value += math.copysign(1.0, value) * lexicon.BOOSTERS[previous] * lexicon.BOOSTER_DAMPING[distance - 1]
+            if previous in lexicon.NEGATIONS:
+                negated = True
+        if negated:
+            value *= lexicon.NEGATION_SCALAR
+        total += value
+
+    if total != 0.0:
+        total += math.copysign(1.0, total) * min(exclamations, lexicon.MAX_EXCLAMATIONS) * lexicon.EXCLAMATION_BOOST
+    compound = total / math.sqrt(total * total + lexicon.NORMALIZATION_ALPHA)
+    label, confidence = _label_and_confidence(compound)
+    return label, confidence, compound
+
+
+class VaderScorer(SentimentScorer):
+    """Batch lexicon scorer; every lookup table is indexed by token id"""
+
+    model_name = "vader"
+    # Tokens are lowercased and URLs carry no valence
+    cache_normalizer = staticmethod(normalize_text)
+
+    def __init__(
+        self,
+        valence: Optional[dict] = None,
+        emotion_terms: Optional[dict] = None,
+        emotions: bool = settings.EMOTION_SCORING,
+    ):
+        if valence is None:
+            valence = lexicon.load_valence(settings.VADER_LEXICON_PATH)
+        if emotions and emotion_terms is None:
+            emotion_terms = load_emotion_terms(settings.EMOTION_LEXICON_PATH)
+        # The version changes whenever the lexicon does, so cached scores stay valid
+        fingerprint = hashlib.sha1(repr(sorted(valence.items())).encode()).hexdigest()[:8]
+        words = set(valence) | set(lexicon.BOOSTERS) | set(lexicon.NEGATIONS) | {"!"}
+        if emotions:
+            words |= set(emotion_terms)
+        self.vocab = Vocabulary(sorted(words))
+        self.emotion_scorer = EmotionScorer(emotion_terms, self.vocab) if emotions else None
+        self.model_version = f"1.0+{fingerprint}"
+        if self.emotion_scorer is not None:
+            self.model_version += f".{self.emotion_scorer.fingerprint}"
+
+        self.valence = np.zeros(self.vocab.size, dtype=np.float64)
+        self.booster = np.zeros(self.vocab.size, dtype=np.float64)
+        self.negation = np.zeros(self.vocab.size, dtype=bool)
+        for word, value in valence.items():
+            self.valence[self.vocab[word]] = value
+        for word, value in lexicon.BOOSTERS.items():
+            self.booster[self.vocab[word]] = value
+        for word in lexicon.NEGATIONS:
+            self.negation[self.vocab[word]] = True
+        self.exclamation_id = self.vocab["!"]
+
+    def compound(self, texts: Sequence[str]) -> np.ndarray:
+        """Normalized compound score in [-1, 1] for every text"""
+        return self._compound(*self.vocab.encode_batch(texts), len(texts))
+
+    def _compound(self, ids: np.ndarray, docs: np.ndarray, n: int) -> np.ndarray:
+        if n == 0:
+            return np.zeros(0)
+
+        valence = self.valence[ids]
+        scored = valence != 0.0
+        booster = self.booster[ids]
+        negation = self.negation[ids]
+
+        # Look back over the preceding tokens of the same document. Boosts are
+        # applied one distance at a time with the sign of the value so far, like
+        # the reference: dampeners can push a weak word across zero
+        negated = np.zeros(len(ids), dtype=bool)
+        for distance in range(1, lexicon.NEGATION_WINDOW + 1):
+            if distance >= len(ids):
+                break
+            same_doc = docs[distance:] == docs[:-distance]
+            boost = np.where(same_doc & scored[distance:], booster[:-distance], 0.0) * lexicon.BOOSTER_DAMPING[distance - 1]
+            valence[distance:] += np.copysign(1.0, valence[distance:]) * boost
+            negated[distance:] |= same_doc & negation[:-distance]
+
+        valence = np.where(negated, valence * lexicon.NEGATION_SCALAR, valence)
+
+        totals = np.bincount(docs, weights=valence, minlength=n)
+        exclamations = np.bincount(docs, weights=ids == self.exclamation_id, minlength=n)
+        totals += np.sign(totals) * np.minimum(exclamations, lexicon.MAX_EXCLAMATIONS) * lexicon.EXCLAMATION_BOOST
+        return totals / np.sqrt(totals * totals + lexicon.NORMALIZATION_ALPHA)
+
+    def score_batch(self, texts: Sequence[str]) -> BatchScores:
+        ids, docs = self.vocab.encode_batch(texts)
+        compound = self._compound(ids, docs, len(texts))
+        label_index = np.where(
+            compound >= lexicon.POSITIVE_THRESHOLD, 2,
+            np.where(compound <= lexicon.NEGATIVE_THRESHOLD, 0, 1),
+        )
+        magnitude = np.abs(compound)
+        confidence = np.where(label_index == 1, 1.0 - magnitude, magnitude)
+        return BatchScores(
+            model_name=self.model_name,
+            sentiment_label=LABELS[label_index],
+            confidence_score=confidence,
+            model_version=self.model_version,
+            emotion_scores=(
+                self.emotion_scorer.score_tokens(ids, docs, len(texts)) if self.emotion_scorer is not None else None
+            ),
+        )
@@ -0,0 +1 @@
+# Empty file to make reports a package
@@ -0,0 +1,271 @@
+"""
+Background report generation
+
+POST /reports/generate creates a pending Report and hands its id to a job;
+clients poll the report until it is completed. A job gathers what the report
+needs from the database, renders PDFs in a process pool (REPORT_WORKERS
+processes, so rendering never competes with the API's event loop) and writes
+the file to the ReportStore. CSV and JSON reports are the streaming export
+written to a file.
+
+Reports are cached by (search, format, Search.completed_at): asking again for
+the same search returns the existing report until it expires. A janitor
+deletes expired files and rows every REPORT_JANITOR_INTERVAL seconds.
+"""
+import asyncio
+import logging
+import math
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+from uuid import UUID
+
+from sqlalchemy import and_, delete, desc, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from app.core.config import settings
+from app.db.models import Report, Search, SearchTweet, Sentiment, Tweet
+from app.db.session import AsyncSessionLocal, engine
+from app.reports.export import stream_export
+from app.reports.pdf import render_report
+from app.reports.storage import ReportStore
+
+logger = logging.getLogger(__name__)
+
+# Report format -> (file extension, media type, export format)
+REPORT_FORMATS = {
+    "pdf": ("pdf", "application/pdf", None),
+    "csv": ("csv", "text/csv; charset=utf-8", "csv"),
+    "json": ("ndjson", "application/x-ndjson", "ndjson"),
+}
+
+_render_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_render_pool() -> ProcessPoolExecutor:
+    """Process pool for PDF rendering, started on first use"""
+    global _render_pool
+    if _render_pool is None:
+        # spawn: forking a process that runs an event loop and DB pools is not safe
+        _render_pool = ProcessPoolExecutor(
+            max_workers=settings.REPORT_WORKERS, mp_context=multiprocessing.get_context("spawn")
+        )
+    return _render_pool
+
+
+def shutdown_render_pool() -> None:
+    global _render_pool
+    if _render_pool is not None:
+        _render_pool.shutdown(wait=False, cancel_futures=True)
+        _render_pool = None
+
+
+async def find_cached_report(db: AsyncSession, search: Search, report_format: str) -> Optional[Report]:
+    """A report of this search and format built from its current result, finished or in progress"""
+    now = datetime.utcnow()
+    stale_jobs = now - timedelta(seconds=settings.REPORT_JOB_TIMEOUT_SECONDS)
+    result = await db.execute(
+        select(Report)
+        .where(
+            Report.search_id == search.id,
+            Report.format == report_format,
+            Report.source_completed_at == search.completed_at,
+            Report.expires_at > now,
+            or_(
+                Report.status == "completed",
+                # Jobs lost to a restart never finish; don't keep returning them
+                and_(Report.status.in_(("pending", "processing")), Report.created_at >= stale_jobs),
+            ),
+        )
+        .order_by(desc(Report.created_at))
+        .limit(1)
+    )
+    return result.scalar_one_or_none()
+
+
+async def report_data(db: AsyncSession, search: Search) -> dict:
+    """Everything render_report needs, as plain (picklable) values"""
+    label = (
+        select(Sentiment.sentiment_label)
+        .where(Sentiment.tweet_id == Tweet.id)
+        .order_by(Sentiment.created_at)
+        .limit(1)
+        .scalar_subquery()
+    )
+    result = await db.execute(
+        select(
+            Tweet.author_username, Tweet.text, Tweet.like_count, Tweet.retweet_count,
+            label.label("sentiment_label"),
+        )
+        .join(SearchTweet, SearchTweet.tweet_id == Tweet.id)
+        .where(SearchTweet.search_id == search.analysis_id)
+        .order_by(desc(Tweet.like_count + Tweet.retweet_count))
+        .limit(settings.REPORT_PDF_TOP_TWEETS)
+    )
+    return {
+        "query": search.query,
+        "time_range": search.time_range,
+        "completed_at": search.completed_at.isoformat(timespec="minutes") if search.completed_at else None,
+        "total_tweets": search.total_tweets,
+        "sentiment_summary": search.sentiment_summary,
+        "emotion_summary": search.emotion_summary,
+        "emotion_stats": search.emotion_stats,
+        "top_tweets": [dict(row._mapping) for row in result],
+    }
+
+
+class ReportGenerator:
+    """Builds one report file and records the outcome on its row"""
+
+    def __init__(
+        self,
+        session_factory=AsyncSessionLocal,
+        bind: AsyncEngine = engine,
+        store: Optional[ReportStore] = None,
+        pool: Callable[[], Optional[Executor]] = get_render_pool,  # None renders on a thread
+    ):
+        self.session_factory = session_factory
+        self.bind = bind
+        self.store = store or ReportStore()
+        self.pool = pool
+
+    async def run(self, report_id: UUID) -> Optional[Report]:
+        """Generate a pending report; returns it completed, or None if it wasn't pending or failed"""
+        async with self.session_factory() as db:
+            claimed = await db.execute(
+                update(Report)
+                .where(Report.id == report_id, Report.status == "pending")
+                .values(status="processing")
+            )
+            if claimed.rowcount != 1:
+                await db.rollback()
+                logger.info("Report %s is not pending, skipping", report_id)
+                return None
+            await db.commit()
+            report = await db.get(Report, report_id)
+            search = await db.get(Search, report.search_id)
+
+        extension, _, export_format = REPORT_FORMATS[report.format]
+        key = f"{report.id}.{extension}"
+        try:
+            if export_format is None:
+                async with self.session_factory() as db:
+                    data = await report_data(db, search)
+                loop = asyncio.get_running_loop()
+                content = await loop.run_in_executor(self.pool(), render_report, data)
+                size = await self.store.write(key, content)
+            else:
+                size = await self.store.write_stream(key, stream_export(self.bind, search.analysis_id, export_format))
+        except Exception:
+            logger.exception("Generating report %s failed", report_id)
+            await self.store.delete(key)
+            await self._update(report_id, status="failed")
+            return None
+
+        values = {"status": "completed", "file_url": key, "file_size_kb": math.ceil(size / 1024)}
+        await self._update(report_id, **values)
+        for name, value in values.items():
+            setattr(report, name, value)
+        return report
+
+    async def _update(self, report_id: UUID, **values) -> None:
+        async with self.session_factory() as db:
+            await db.execute(update(Report).where(Report.id == report_id).values(**values))
+            await db.commit()
+
+    async def purge_expired(self, batch_size: int = 500) -> int:
+        """Delete expired reports and their files; returns how many were removed"""
+        removed = 0
+        while True:
+            async with self.session_factory() as db:
+                rows = (await db.execute(
+                    select(Report.id, Report.file_url)
+                    .where(Report.expires_at <= datetime.utcnow())
+                    .limit(batch_size)
+                )).all()
+                if not rows:
+                    return removed
+                # Files first: a row without a file is harmless, a file without a row is never cleaned up
+                for row in rows:
+                    if row.file_url:
+                        await self.store.delete(row.file_url)
+                await db.execute(delete(Report).where(Report.id.in_([row.id for row in rows])))
+                await db.commit()
+            removed += len(rows)
+            if len(rows) < batch_size:
+                return removed
+
+
+class ReportWorker:
+    """In-process queue of report ids, plus the periodic janitor"""
+
+    def __init__(
+        self,
+        generator: Optional[ReportGenerator] = None,
+        concurrency: int = settings.REPORT_WORKERS,
+        janitor_interval: float = settings.REPORT_JANITOR_INTERVAL,
+    ):
+        self.generator = generator or ReportGenerator()
+        self.concurrency = concurrency
+        self.janitor_interval = janitor_interval
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self._tasks: list[asyncio.Task] = []
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    async def start(self) -> None:
+        if self.running:
+            return
+        self._tasks = [asyncio.create_task(self._consume()) for _ in range(self.concurrency)]
+        self._tasks.append(asyncio.create_task(self._janitor()))
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        shutdown_render_pool()
+
+    async def enqueue(self, report_id: UUID) -> None:
+        if not self.running:
+            await self.start()
+        await self.queue.put(report_id)
+
+    async def join(self) -> None:
+        """Wait until every queued report has been generated"""
+        await self.queue.join()
+
+    async def _consume(self) -> None:
+        while True:
+            report_id = await self.queue.get()
+            try:
+                await self.generator.run(report_id)
+            except Exception:
+                logger.exception("Unhandled error generating report %s", report_id)
+            finally:
+                self.queue.task_done()
+
+    async def _janitor(self) -> None:
+        while True:
+            try:
+                removed = await self.generator.purge_expired()
+                if removed:
+                    logger.info("Removed %d expired reports", removed)
+            except Exception:
+                logger.exception("Report janitor failed")
+            await asyncio.sleep(self.janitor_interval)
+
+
+report_worker = ReportWorker()
+
+
+async def dispatch_report(report_id: UUID) -> None:
+    """Hand a new report to a job (in-process with ANALYSIS_EAGER, Celery otherwise)"""
+    if settings.ANALYSIS_EAGER:
+        await report_worker.enqueue(report_id)
+    else:
+        from app.tasks.celery_app import celery_app
+        celery_app.send_task("generate_report", args=[str(report_id)])
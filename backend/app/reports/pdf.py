@@ -0,0 +1,204 @@
+"""
+PDF rendering for search reports
+
+A small PDF 1.4 writer (text in the standard Helvetica fonts, filled
+rectangles, Flate-compressed page streams) so reports need no extra
+dependency. `render_report` takes plain data and returns the file's bytes;
+it imports nothing from the app so it can run in a separate process.
+"""
+import zlib
+from typing import Optional
+
+PAGE_WIDTH = 612  # US Letter, in points
+PAGE_HEIGHT = 792
+MARGIN = 54
+
+LABEL_COLORS = {
+    "positive": (0.20, 0.66, 0.33),
+    "negative": (0.86, 0.24, 0.24),
+    "neutral": (0.55, 0.58, 0.62),
+    "sarcastic": (0.58, 0.40, 0.82),
+}
+
+# Average Helvetica glyph width relative to the font size, good enough for wrapping
+_AVG_CHAR_WIDTH = 0.5
+
+
+def _escape(text: str) -> str:
+    # Standard fonts use WinAnsiEncoding; anything outside Latin-1 becomes "?"
+    text = text.encode("latin-1", errors="replace").decode("latin-1")
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def wrap(text: str, size: float, width: float) -> list[str]:
+    """Split text into lines that fit `width` points at font `size`"""
+    max_chars = max(1, int(width / (size * _AVG_CHAR_WIDTH)))
+    lines = []
+    for paragraph in text.splitlines() or [""]:
+        line = ""
+        for word in paragraph.split():
+            while len(word) > max_chars:
+                if line:
+                    lines.append(line)
+                    line = ""
+                lines.append(word[:max_chars])
+                word = word[max_chars:]
+            candidate = f"{line} {word}" if line else word
+            if len(candidate) > max_chars:
+                lines.append(line)
+                line = word
+            else:
+                line = candidate
+        lines.append(line)
+    return lines
+
+
+class PdfDocument:
+    """Pages of positioned text and rectangles, serialized by `to_bytes`"""
+
+    def __init__(self, title: str = ""):
+        self.title = title
+        self.pages: list[list[str]] = []
+        self.new_page()
+
+    def new_page(self) -> None:
+        self.pages.append([])
+
+    def text(self, x: float, y: float, text: str, size: float = 10, bold: bool = False,
+             color: tuple = (0, 0, 0)) -> None:
+        font = "F2" if bold else "F1"
+        self.pages[-1].append(
+            f"{color[0]:.3f} {color[1]:.3f} {color[2]:.3f} rg "
+            f"BT /{font} {size:g} Tf {x:.2f} {y:.2f} Td ({_escape(text)}) Tj ET"
+        )
+
+    def rect(self, x: float, y: float, width: float, height: float, color: tuple) -> None:
+        self.pages[-1].append(
+            f"{color[0]:.3f} {color[1]:.3f} {color[2]:.3f} rg {x:.2f} {y:.2f} {width:.2f} {height:.2f} re f"
+        )
+
+    def to_bytes(self) -> bytes:
+        # Object numbers: 1 catalog, 2 page tree, 3-4 fonts, 5 info, then (page, content) pairs
+        objects: list[bytes] = []
+        page_ids = [6 + 2 * i for i in range(len(self.pages))]
+        kids = " ".join(f"{page_id} 0 R" for page_id in page_ids)
+        objects.append(b"<< /Type /Catalog /Pages 2 0 R >>")
+        objects.append(f"<< /Type /Pages /Kids [{kids}] /Count {len(page_ids)} >>".encode("ascii"))
+        for name in ("Helvetica", "Helvetica-Bold"):
+            objects.append(
+                f"<< /Type /Font /Subtype /Type1 /BaseFont /{name} /Encoding /WinAnsiEncoding >>".encode("ascii")
+            )
+        objects.append(f"<< /Title ({_escape(self.title)}) /Producer (VoxLens) >>".encode("latin-1"))
+        for page_id, operations in zip(page_ids, self.pages):
+            objects.append(
+                f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
+                f"/Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> /Contents {page_id + 1} 0 R >>".encode("ascii")
+            )
+            stream = zlib.compress("\n".join(operations).encode("latin-1"))
+            objects.append(
+                f"<< /Length {len(stream)} /Filter /FlateDecode >>\nstream\n".encode("ascii")
+                + stream + b"\nendstream"
+            )
+
+        out = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        offsets = []
+        for number, body in enumerate(objects, start=1):
+            offsets.append(len(out))
+            out += f"{number} 0 obj\n".encode("ascii") + body + b"\nendobj\n"
+        xref = len(out)
+        out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("ascii")
+        for offset in offsets:
+            out += f"{offset:010d} 00000 n \n".encode("ascii")
+        out += (
+            f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R /Info 5 0 R >>\n"
+            f"startxref\n{xref}\n%%EOF\n"
+        ).encode("ascii")
+        return bytes(out)
+
+
+class _Layout:
+    """Top-down cursor over a PdfDocument that starts a new page when one is full"""
+
+    def __init__(self, doc: PdfDocument):
+        self.doc = doc
+        self.y = PAGE_HEIGHT - MARGIN
+
+    def need(self, height: float) -> None:
+        if self.y - height < MARGIN:
+            self.doc.new_page()
+            self.y = PAGE_HEIGHT - MARGIN
+
+    def line(self, text: str, size: float = 10, bold: bool = False, color: tuple = (0, 0, 0),
+             indent: float = 0, leading: Optional[float] = None) -> None:
+        leading = leading or size * 1.4
+        self.need(leading)
+        self.y -= leading
+        self.doc.text(MARGIN + indent, self.y, text, size=size, bold=bold, color=color)
+
+    def gap(self, height: float) -> None:
+        self.y -= height
+
+
+def render_report(data: dict) -> bytes:
+    """
+    Render a search report. `data` holds query, time_range, completed_at,
+    total_tweets, sentiment_summary, emotion_summary ({emotion: mean}),
+    emotion_stats ({emotion: {mean, std, count}}, optional) and top_tweets
+    (dicts with author_username, sentiment_label, like_count, retweet_count,
+    text).
+    """
+    doc = PdfDocument(title=f"VoxLens report: {data['query']}")
+    layout = _Layout(doc)
+    width = PAGE_WIDTH - 2 * MARGIN
+    grey = (0.35, 0.35, 0.35)
+
+    layout.line("VoxLens sentiment report", size=20, bold=True)
+    layout.line(data["query"], size=14)
+    layout.line(
+        f"Time range: {data.get('time_range') or '-'}   Analyzed: {data.get('completed_at') or '-'}   "
+        f"Tweets: {data.get('total_tweets') or 0:,}",
+        size=9, color=grey,
+    )
+    layout.gap(12)
+
+    summary = data.get("sentiment_summary") or {}
+    layout.line("Sentiment", size=13, bold=True)
+    bar_width = width - 150
+    for label in ("positive", "negative", "neutral", "sarcastic"):
+        share = float(summary.get(label) or 0)
+        layout.need(20)
+        layout.y -= 20
+        doc.text(MARGIN, layout.y + 4, label.capitalize(), size=10)
+        doc.rect(MARGIN + 80, layout.y, bar_width, 14, (0.93, 0.93, 0.93))
+        doc.rect(MARGIN + 80, layout.y, bar_width * min(share, 100) / 100, 14, LABEL_COLORS[label])
+        doc.text(MARGIN + 90 + bar_width, layout.y + 4, f"{share:.1f}%", size=10)
+    layout.gap(12)
+
+    emotions = data.get("emotion_summary") or {}
+    emotion_stats = data.get("emotion_stats") or {}
+    if emotions:
+        layout.line("Emotions", size=13, bold=True)
+        layout.line("Emotion            Mean     Std dev", size=9, bold=True, color=grey)
+        for emotion, mean in sorted(emotions.items()):
+            std = (emotion_stats.get(emotion) or {}).get("std")
+            layout.line(
+                f"{emotion:<18} {float(mean or 0):>6.3f}   " + (f"{float(std):>6.3f}" if std is not None else f"{'-':>6}"),
+                size=9,
+            )
+        layout.gap(12)
+
+    tweets = data.get("top_tweets") or []
+    if tweets:
+        layout.line("Most engaging tweets", size=13, bold=True)
+        for tweet in tweets:
+            label = tweet.get("sentiment_label") or "unscored"
+            layout.gap(4)
+            layout.line(
+                f"@{tweet.get('author_username') or 'unknown'}  -  {label}  -  "
+                f"{tweet.get('like_count') or 0:,} likes, {tweet.get('retweet_count') or 0:,} retweets",
+                size=8, bold=True, color=LABEL_COLORS.get(label, grey),
+            )
+            for text_line in wrap(tweet.get("text") or "", 9, width - 10):
+                layout.line(text_line, size=9, indent=10, leading=12)
+
+    return doc.to_bytes()
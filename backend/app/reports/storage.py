@@ -0,0 +1,63 @@
+"""
+Local file store for generated reports
+
+Files live under REPORT_STORAGE_DIR and are referenced from Report.file_url
+by their key (a file name). Writes go to a temporary file that is renamed
+into place, so a reader never sees a partial report.
+"""
+import asyncio
+import os
+import uuid
+from pathlib import Path
+from typing import AsyncIterator
+
+from app.core.config import settings
+
+
+class ReportStore:
+    """Report files addressed by key"""
+
+    def __init__(self, root: str = settings.REPORT_STORAGE_DIR):
+        self.root = Path(root)
+
+    def path(self, key: str) -> Path:
+        path = (self.root / key).resolve()
+        if path.parent != self.root.resolve():
+            raise ValueError(f"Invalid report key: {key!r}")
+        return path
+
+    def _temp_path(self, key: str) -> Path:
+        self.root.mkdir(parents=True, exist_ok=True)
+        return self.root / f".{key}.{uuid.uuid4().hex}.tmp"
+
+    async def write(self, key: str, data: bytes) -> int:
+        """Store `data` under `key`; returns its size in bytes"""
+        return await self.write_stream(key, _single(data))
+
+    async def write_stream(self, key: str, chunks: AsyncIterator[bytes]) -> int:
+        """Store an async stream of chunks under `key`; returns the total size in bytes"""
+        final = self.path(key)
+        temp = self._temp_path(key)
+        size = 0
+        handle = await asyncio.to_thread(open, temp, "wb")
+        try:
+            async for chunk in chunks:
+                await asyncio.to_thread(handle.write, chunk)
+                size += len(chunk)
+            await asyncio.to_thread(handle.close)
+            await asyncio.to_thread(os.replace, temp, final)
+        except BaseException:
+            handle.close()
+            temp.unlink(missing_ok=True)
+            raise
+        return size
+
+    async def delete(self, key: str) -> None:
+        await asyncio.to_thread(self.path(key).unlink, missing_ok=True)
+
+    def exists(self, key: str) -> bool:
+        return self.path(key).is_file()
+
+
+async def _single(data: bytes) -> AsyncIterator[bytes]:
+    yield data
@@ -63,9 +63,12 @@ class SearchResponse(BaseModel):
     status: str
     total_tweets: int
     sentiment_summary: Optional[dict] = None
-    emotion_summary: Optional[dict] = None
+    emotion_summary: Optional[dict] = None  # {joy: 0.42, ...}, mean score per emotion
+    emotion_stats: Optional[dict] = None  # {joy: {mean, std, count}, ...}
     entities: Optional[dict] = None
     time_range: str
+    shared_from_id: Optional[UUID] = None
+    result_source: str = "fresh"  # fresh, shared
     created_at: datetime
     completed_at: Optional[datetime] = None
 
@@ -75,15 +78,16 @@ class SearchResponse(BaseModel):
 
 class SearchListResponse(BaseModel):
     searches: list[SearchResponse]
-    total: int
-    page: int
+    total: Optional[int] = None  # Omitted in cursor mode unless include_total=true
+    page: Optional[int] = None  # None in cursor mode
     page_size: int
+    next_cursor: Optional[str] = None
 
 
 # Tweet Schemas
 class TweetResponse(BaseModel):
     id: UUID
-    search_id: UUID
+    search_id: Optional[UUID] = None  # The search it was listed through; a tweet can belong to several
     tweet_id: Optional[str] = None
     text: str
     author_username: Optional[str] = None
@@ -100,6 +104,50 @@ class TweetResponse(BaseModel):
         from_attributes = True
 
 
+class TweetSearchHit(TweetResponse):
+    rank: float
+
+
+class TweetSearchResponse(BaseModel):
+    tweets: list[TweetSearchHit]
+    next_cursor: Optional[str] = None
+
+
+class TimeSeriesPoint(BaseModel):
+    timestamp: datetime  # Bucket start (UTC)
+    total_tweets: int
+    positive: int
+    negative: int
+    neutral: int
+    sarcastic: int
+    emotions: Optional[dict[str, float]] = None  # Mean score per emotion
+
+
+class TimeSeriesResponse(BaseModel):
+    search_id: UUID
+    granularity: str
+    points: list[TimeSeriesPoint]
+
+
+class CompareRequest(BaseModel):
+    search_ids: list[UUID] = []
+    queries: list[str] = []  # Each matched to the user's latest completed search of that query
+    granularity: str = "1d"  # 1h, 1d
+
+
+class CompareTopic(BaseModel):
+    key: str  # Search id or query, as requested
+    status: str  # ok, not_found, timeout, error
+    search: Optional[SearchResponse] = None
+    points: list[Optional[TimeSeriesPoint]] = []  # Aligned to CompareResponse.timestamps; None where the topic has no bucket
+
+
+class CompareResponse(BaseModel):
+    granularity: str
+    timestamps: list[datetime]
+    topics: list[CompareTopic]
+
+
 # Sentiment Schemas
 class SentimentResponse(BaseModel):
     model_config = {
@@ -110,6 +158,7 @@ class SentimentResponse(BaseModel):
     id: UUID
     tweet_id: UUID
     model_name: str
+    model_version: Optional[str] = None
     sentiment_label: str
     confidence_score: Optional[float] = None
     is_sarcastic: bool
@@ -137,6 +186,7 @@ class SavedSearchResponse(BaseModel):
     alert_enabled: bool
     alert_threshold: Optional[float] = None
     last_checked: Optional[datetime] = None
+    last_alert_at: Optional[datetime] = None
     created_at: datetime
 
     class Config:
@@ -154,6 +204,7 @@ class ReportResponse(BaseModel):
     search_id: UUID
     user_id: UUID
     format: str
+    status: str
     file_url: Optional[str] = None
     file_size_kb: Optional[int] = None
     created_at: datetime
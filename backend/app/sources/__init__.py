@@ -0,0 +1 @@
+# Empty file to make sources a package
@@ -0,0 +1,233 @@
+"""
+Tweets from the search API (Twitter API v2 recent search)
+
+Pages are cursor-linked (meta.next_token), so one cursor can only be walked
+one request at a time. To fetch concurrently the time range is split into
+TWEET_SOURCE_CONCURRENCY windows, each paged by its own task, and up to
+TWEET_SOURCE_PREFETCH_PAGES pages are fetched ahead of the consumer.
+
+All requests go through one pooled httpx.AsyncClient and one pacer that
+spreads the requests left in the rate-limit window (x-rate-limit-remaining)
+until the window resets, so concurrency never runs a search into 429s.
+Transport errors, 429 and 5xx responses are retried with exponential
+backoff and full jitter.
+"""
+import asyncio
+import logging
+import random
+import time
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Optional
+
+import httpx
+
+from app.core.config import settings
+from app.sources.base import TweetSource, time_range_start
+
+logger = logging.getLogger(__name__)
+
+TWEET_FIELDS = "created_at,public_metrics,author_id,lang,conversation_id,entities"
+USER_FIELDS = "username,name,verified,location"
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+_DONE = object()
+
+
+class RatePacer:
+    """Spaces requests so the remaining rate-limit budget lasts until the window resets"""
+
+    def __init__(self, clock=time.time):
+        self.clock = clock
+        self._next_at = 0.0
+        self._interval = 0.0
+
+    def delay(self) -> float:
+        """Seconds to wait before the next request, reserving its slot"""
+        now = self.clock()
+        start = max(now, self._next_at)
+        self._next_at = start + self._interval
+        return start - now
+
+    async def wait(self) -> None:
+        delay = self.delay()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def update(self, headers: httpx.Headers) -> None:
+        """Adjust the pace to a response's rate-limit headers"""
+        now = self.clock()
+        retry_after = headers.get("retry-after")
+        if retry_after is not None:
+            try:
+                self._next_at = max(self._next_at, now + float(retry_after))
+            except ValueError:
+                pass
+        remaining, reset = headers.get("x-rate-limit-remaining"), headers.get("x-rate-limit-reset")
+        if remaining is None or reset is None:
+            return
+        try:
+            remaining, reset = int(remaining), float(reset)
+        except ValueError:
+            return
+        if remaining <= 0:
+            self._next_at = max(self._next_at, reset)
+            self._interval = 0.0
+        else:
+            self._interval = max(0.0, reset - now) / remaining
+
+
+def map_tweet(tweet: dict, users: dict) -> dict:
+    """An API tweet and its expanded author as a raw tweet dict for normalize_tweets"""
+    author = users.get(tweet.get("author_id")) or {}
+    metrics = tweet.get("public_metrics") or {}
+    return {
+        "id": tweet.get("id"),
+        "text": tweet.get("text"),
+        "author_username": author.get("username"),
+        "author_name": author.get("name"),
+        "created_at": tweet.get("created_at"),
+        "retweet_count": metrics.get("retweet_count", 0),
+        "like_count": metrics.get("like_count", 0),
+        "reply_count": metrics.get("reply_count", 0),
+        "is_verified": author.get("verified", False),
+        "location": author.get("location") or None,
+        "raw_data": {**tweet, "author": author} if author else tweet,
+    }
+
+
+def split_window(start: Optional[datetime], end: datetime, parts: int) -> list[tuple[Optional[datetime], datetime]]:
+    """Split [start, end) into consecutive windows, newest first"""
+    if start is None or parts <= 1 or start >= end:
+        return [(start, end)]
+    step = (end - start) / parts
+    bounds = [start + step * i for i in range(parts)] + [end]
+    return [(bounds[i], bounds[i + 1]) for i in reversed(range(parts))]
+
+
+def _api_time(value: datetime) -> str:
+    return value.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+class HttpTweetSource(TweetSource):
+    """Pages through the search API with concurrent windows and page prefetch"""
+
+    def __init__(
+        self,
+        url: str = settings.TWEET_SOURCE_URL,
+        bearer_token: Optional[str] = settings.TWEET_SOURCE_BEARER_TOKEN,
+        page_size: int = settings.TWEET_SOURCE_PAGE_SIZE,
+        concurrency: int = settings.TWEET_SOURCE_CONCURRENCY,
+        prefetch_pages: int = settings.TWEET_SOURCE_PREFETCH_PAGES,
+        max_retries: int = settings.TWEET_SOURCE_MAX_RETRIES,
+        timeout: float = settings.TWEET_SOURCE_TIMEOUT,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.url = url
+        self.bearer_token = bearer_token
+        self.page_size = page_size
+        self.concurrency = max(1, concurrency)
+        self.prefetch_pages = max(1, prefetch_pages)
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.transport = transport
+        self.pacer = RatePacer()
+        self._client: Optional[httpx.AsyncClient] = None
+        self._client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client_loop is not loop:
+            # Celery runs each task in a new event loop and a client's connections belong to one loop
+            headers = {"Authorization": f"Bearer {self.bearer_token}"} if self.bearer_token else {}
+            self._client = httpx.AsyncClient(
+                headers=headers,
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=self.concurrency * 2, max_keepalive_connections=self.concurrency),
+                transport=self.transport,
+            )
+            self._client_loop = loop
+        return self._client
+
+    async def close(self) -> None:
+        if self._client is not None:
+            try:
+                await self._client.aclose()
+            except RuntimeError:
+                pass  # Its event loop is already closed
+            self._client = None
+            self._client_loop = None
+
+    async def stream(self, query: str, time_range: str) -> AsyncIterator[list[dict]]:
+        # The API rejects end times less than 10 seconds in the past
+        end = datetime.utcnow() - timedelta(seconds=15)
+        windows = split_window(time_range_start(time_range, end), end, self.concurrency)
+        pages: asyncio.Queue = asyncio.Queue(maxsize=self.prefetch_pages)
+        tasks = [asyncio.create_task(self._page_window(query, start, stop, pages)) for start, stop in windows]
+        try:
+            running = len(tasks)
+            while running:
+                page = await pages.get()
+                if page is _DONE:
+                    running -= 1
+                elif isinstance(page, BaseException):
+                    raise page
+                elif page:
+                    yield page
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _page_window(
+        self, query: str, start: Optional[datetime], end: datetime, pages: asyncio.Queue
+    ) -> None:
+        params = {
+            "query": query,
+            "max_results": self.page_size,
+            "end_time": _api_time(end),
+            "tweet.fields": TWEET_FIELDS,
+            "expansions": "author_id",
+            "user.fields": USER_FIELDS,
+        }
+        if start is not None:
+            params["start_time"] = _api_time(start)
+        try:
+            while True:
+                body = await self._get(params)
+                users = {user["id"]: user for user in (body.get("includes") or {}).get("users", [])}
+                await pages.put([map_tweet(tweet, users) for tweet in body.get("data") or []])
+                next_token = (body.get("meta") or {}).get("next_token")
+                if not next_token:
+                    break
+                params["next_token"] = next_token
+        except Exception as exc:
+            await pages.put(exc)
+        else:
+            await pages.put(_DONE)
+
+    async def _get(self, params: dict) -> dict:
+        """One page, retried on transport errors, 429 and 5xx"""
+        client = self._get_client()
+        attempt = 0
+        while True:
+            await self.pacer.wait()
+            try:
+                response = await client.get(self.url, params=params)
+            except httpx.TransportError as exc:
+                if attempt >= self.max_retries:
+                    raise
+                logger.warning("Tweet source request failed (%s), retrying", exc)
+            else:
+                self.pacer.update(response.headers)
+                if response.status_code not in RETRY_STATUSES or attempt >= self.max_retries:
+                    response.raise_for_status()
+                    return response.json()
+                logger.warning("Tweet source returned %d, retrying", response.status_code)
+            attempt += 1
+            # Full jitter; on 429 the pacer already holds requests until the window resets
+            await asyncio.sleep(random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt)))
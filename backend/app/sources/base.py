@@ -0,0 +1,66 @@
+"""
+Tweet sources
+
+A TweetSource streams the raw tweets of a query in batches, as dicts in the
+shape normalize_tweets (app.tasks.pipeline) reads. A source is also a
+pipeline Fetcher: calling it with a Search streams that search's query and
+time range. TWEET_SOURCE picks the process-wide source: "http" for the
+search API, "replay" for recorded NDJSON fixtures, "none" for no tweets.
+"""
+import re
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Optional
+
+from app.core.config import settings
+
+_TIME_RANGE_RE = re.compile(r"^(\d+)([hd])$")
+
+
+def time_range_start(time_range: str, now: Optional[datetime] = None) -> Optional[datetime]:
+    """Start of a "24h" / "7d" style window ending now (UTC); None if it can't be parsed"""
+    match = _TIME_RANGE_RE.match(time_range or "")
+    if not match:
+        return None
+    amount, unit = int(match.group(1)), match.group(2)
+    delta = timedelta(hours=amount) if unit == "h" else timedelta(days=amount)
+    return (now or datetime.utcnow()) - delta
+
+
+class TweetSource(ABC):
+    """Where searches get their tweets from"""
+
+    @abstractmethod
+    def stream(self, query: str, time_range: str) -> AsyncIterator[list[dict]]:
+        """Stream the query's tweets in batches; the caller may stop early by closing the iterator"""
+
+    def __call__(self, search) -> AsyncIterator[list[dict]]:
+        return self.stream(search.query, search.time_range)
+
+    async def close(self) -> None:
+        """Release connections and other resources"""
+
+
+_source: Optional[TweetSource] = None
+
+
+def get_tweet_source() -> Optional[TweetSource]:
+    """Process-wide source configured by TWEET_SOURCE (None when "none")"""
+    global _source
+    if _source is None and settings.TWEET_SOURCE != "none":
+        if settings.TWEET_SOURCE == "http":
+            from app.sources.api import HttpTweetSource
+            _source = HttpTweetSource()
+        elif settings.TWEET_SOURCE == "replay":
+            from app.sources.replay import ReplayTweetSource
+            _source = ReplayTweetSource()
+        else:
+            raise ValueError(f"Unknown TWEET_SOURCE {settings.TWEET_SOURCE!r}")
+    return _source
+
+
+async def close_tweet_source() -> None:
+    global _source
+    if _source is not None:
+        await _source.close()
+        _source = None
@@ -0,0 +1,117 @@
+"""
+Tweets replayed from recorded NDJSON files
+
+Each line is one raw tweet dict as the pipeline reads it (what
+HttpTweetSource yields). TWEET_SOURCE_REPLAY_PATH is one file or a directory
+of *.ndjson / *.ndjson.gz files, replayed in name order for every search
+whatever its query, so throughput tests and CI run without the network.
+Record fixtures from the live API with:
+
+    python -m app.sources.replay record "some query" --out fixtures/some_query.ndjson.gz
+"""
+import argparse
+import asyncio
+import gzip
+import json
+from contextlib import aclosing
+from pathlib import Path
+from typing import AsyncIterator, Optional
+
+from app.core.config import settings
+from app.sources.base import TweetSource
+
+
+def fixture_files(path: str) -> list[Path]:
+    root = Path(path)
+    if root.is_dir():
+        return sorted([*root.glob("*.ndjson"), *root.glob("*.ndjson.gz")])
+    return [root]
+
+
+def _open(path: Path):
+    if path.suffix == ".gz":
+        return gzip.open(path, "rt", encoding="utf-8")
+    return open(path, "r", encoding="utf-8")
+
+
+def _read_page(handle, page_size: int) -> list[dict]:
+    page = []
+    while len(page) < page_size:
+        line = handle.readline()
+        if not line:
+            break
+        if line.strip():
+            page.append(json.loads(line))
+    return page
+
+
+class ReplayTweetSource(TweetSource):
+    """Streams recorded tweets in pages; file reads run in worker threads"""
+
+    def __init__(
+        self,
+        path: Optional[str] = settings.TWEET_SOURCE_REPLAY_PATH,
+        page_size: int = settings.TWEET_SOURCE_PAGE_SIZE,
+    ):
+        if not path:
+            raise ValueError("Set TWEET_SOURCE_REPLAY_PATH to the recorded tweets to replay")
+        self.path = path
+        self.page_size = page_size
+
+    async def stream(self, query: str, time_range: str) -> AsyncIterator[list[dict]]:
+        loop = asyncio.get_running_loop()
+        for path in fixture_files(self.path):
+            handle = await loop.run_in_executor(None, _open, path)
+            try:
+                while True:
+                    page = await loop.run_in_executor(None, _read_page, handle, self.page_size)
+                    if not page:
+                        break
+                    yield page
+            finally:
+                handle.close()
+
+
+async def record(query: str, time_range: str, out: Path, limit: int) -> int:
+    """Write what HttpTweetSource returns for a query to an NDJSON fixture"""
+    from app.sources.api import HttpTweetSource
+
+    source = HttpTweetSource()
+    written = 0
+    try:
+        with _open_for_writing(out) as handle:
+            async with aclosing(source.stream(query, time_range)) as pages:
+                async for page in pages:
+                    for tweet in page[:limit - written]:
+                        handle.write(json.dumps(tweet, separators=(",", ":"), default=str) + "\n")
+                    written = min(limit, written + len(page))
+                    if written >= limit:
+                        break
+    finally:
+        await source.close()
+    return written
+
+
+def _open_for_writing(path: Path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if path.suffix == ".gz":
+        return gzip.open(path, "wt", encoding="utf-8")
+    return open(path, "w", encoding="utf-8")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Recorded tweet fixtures")
+    commands = parser.add_subparsers(dest="command", required=True)
+    recorder = commands.add_parser("record", help="Record a query's tweets from the search API")
+    recorder.add_argument("query")
+    recorder.add_argument("--out", type=Path, required=True)
+    recorder.add_argument("--time-range", default="7d")
+    recorder.add_argument("--limit", type=int, default=settings.ANALYSIS_MAX_TWEETS)
+    args = parser.parse_args()
+
+    written = asyncio.run(record(args.query, args.time_range, args.out, args.limit))
+    print(f"Wrote {written} tweets to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+# Empty file to make tasks a package
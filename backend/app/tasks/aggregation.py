@@ -0,0 +1,150 @@
+"""
+Streaming aggregation of search summaries
+
+Each scored batch is folded into counters (label counts, and count/sum/sum of
+squares per emotion) so summaries cost O(batch) to maintain instead of a
+GROUP BY over every sentiment of the search. Aggregates are plain sums, so
+partial aggregates built by parallel workers combine with `merge()` and give
+the same result as aggregating everything in one place.
+"""
+import math
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Optional
+
+import numpy as np
+
+from app.ml.base import EMOTIONS, BatchScores
+
+SENTIMENT_LABELS = ("positive", "negative", "neutral")
+
+
+@dataclass
+class EmotionMoments:
+    """Count, sum and sum of squares of one emotion's scores"""
+    count: int = 0
+    total: float = 0.0
+    total_sq: float = 0.0
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        self.total_sq += value * value
+
+    def merge(self, other: "EmotionMoments") -> None:
+        self.count += other.count
+        self.total += other.total
+        self.total_sq += other.total_sq
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    @property
+    def variance(self) -> float:
+        if not self.count:
+            return 0.0
+        # Clamp the rounding error of sum-of-squares variance
+        return max(self.total_sq / self.count - self.mean ** 2, 0.0)
+
+
+@dataclass
+class SentimentAggregate:
+    """Mergeable running totals behind Search.sentiment_summary, emotion_summary and emotion_stats"""
+    total_tweets: int = 0
+    label_counts: Counter = field(default_factory=Counter)
+    sarcastic: int = 0
+    emotions: dict[str, EmotionMoments] = field(default_factory=dict)
+
+    @property
+    def scored(self) -> int:
+        return sum(self.label_counts.values())
+
+    def add_batch(self, tweet_count: int, scores: Optional[BatchScores] = None) -> None:
+        """Fold one batch into the totals; `scores` come from the model that drives the summary"""
+        self.total_tweets += tweet_count
+        if scores is None:
+            return
+        self.label_counts.update(scores.sentiment_label)
+        if scores.is_sarcastic is not None:
+            self.sarcastic += sum(1 for flag in scores.is_sarcastic if flag)
+        if scores.emotion_scores is not None:
+            self._add_emotion_scores(scores.emotion_scores)
+        elif scores.emotions is not None:
+            for emotions in scores.emotions:
+                for emotion, value in (emotions or {}).items():
+                    moments = self.emotions.get(emotion)
+                    if moments is None:
+                        moments = self.emotions[emotion] = EmotionMoments()
+                    moments.add(float(value))
+
+    def _add_emotion_scores(self, matrix: np.ndarray) -> None:
+        """Fold an (n, len(EMOTIONS)) score array; NaN rows are texts without emotions"""
+        scored = matrix[~np.isnan(matrix[:, 0])]
+        if not len(scored):
+            return
+        totals = scored.sum(axis=0)
+        totals_sq = np.square(scored).sum(axis=0)
+        for j, emotion in enumerate(EMOTIONS):
+            self.emotions.setdefault(emotion, EmotionMoments()).merge(
+                EmotionMoments(len(scored), float(totals[j]), float(totals_sq[j]))
+            )
+
+    def merge(self, other: "SentimentAggregate") -> None:
+        self.total_tweets += other.total_tweets
+        self.label_counts.update(other.label_counts)
+        self.sarcastic += other.sarcastic
+        for emotion, moments in other.emotions.items():
+            self.emotions.setdefault(emotion, EmotionMoments()).merge(moments)
+
+    def to_dict(self) -> dict:
+        """JSON-safe state, for shipping a partial aggregate between processes"""
+        return {
+            "total_tweets": self.total_tweets,
+            "label_counts": dict(self.label_counts),
+            "sarcastic": self.sarcastic,
+            "emotions": {
+                emotion: [moments.count, moments.total, moments.total_sq]
+                for emotion, moments in self.emotions.items()
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "SentimentAggregate":
+        return cls(
+            total_tweets=data["total_tweets"],
+            label_counts=Counter(data["label_counts"]),
+            sarcastic=data["sarcastic"],
+            emotions={emotion: EmotionMoments(*values) for emotion, values in data["emotions"].items()},
+        )
+
+    def sentiment_summary(self) -> Optional[dict]:
+        """Percentage breakdown, e.g. {positive: 45.0, negative: 30.0, neutral: 20.0, sarcastic: 5.0}"""
+        scored = self.scored
+        if not scored:
+            return None
+        summary = {
+            label: round(100 * self.label_counts[label] / scored, 1)
+            for label in SENTIMENT_LABELS
+        }
+        summary["sarcastic"] = round(100 * self.sarcastic / scored, 1)
+        return summary
+
+    def emotion_summary(self) -> Optional[dict]:
+        """Mean score of each emotion, e.g. {joy: 0.42, anger: 0.1, ...}"""
+        if not self.emotions:
+            return None
+        return {emotion: round(moments.mean, 4) for emotion, moments in sorted(self.emotions.items())}
+
+    def emotion_stats(self) -> Optional[dict]:
+        """Mean, standard deviation and count of each emotion's scores, e.g. {joy: {mean, std, count}}"""
+        if not self.emotions:
+            return None
+        return {
+            emotion: {
+                "mean": round(moments.mean, 4),
+                "std": round(math.sqrt(moments.variance), 4),
+                "count": moments.count,
+            }
+            for emotion, moments in sorted(self.emotions.items())
+        }
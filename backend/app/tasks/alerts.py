@@ -0,0 +1,319 @@
+"""
+Saved-search alerts
+
+Every ALERT_SCHEDULER_TICK seconds (randomly stretched or shortened by
+ALERT_SCHEDULER_JITTER, so that API processes started together drift apart)
+one cycle runs:
+
+1. Select up to ALERT_MAX_TOPICS_PER_CYCLE distinct topics among the saved
+   searches that are due, i.e. have alerts enabled and were not checked in the
+   last ALERT_CHECK_INTERVAL_SECONDS. A topic is the normalized query, so
+   "Bitcoin" and " bitcoin " saved by thousands of users are one topic. The
+   longest-waiting topics go first; whatever doesn't fit waits for the next
+   cycle, which spreads a large backlog over several cycles instead of
+   starting every analysis at once.
+2. Analyze each topic once (ALERT_CONCURRENCY at a time), reusing a recent
+   result for the same query when the dedup window has one.
+3. Page through the topic's subscribers by id, compare each one's threshold
+   with the shift from its previous result and update last_checked and the
+   baseline of the whole page with one statement.
+
+A threshold is in percentage points: an alert fires when the share of
+positive, negative or neutral tweets moved by at least that much since the
+previous check.
+
+Credits: alert checks are part of saving a search and are not charged,
+neither to the subscriber a topic's analysis is run for nor to the others
+sharing it. That analysis needs an owner, so its Search row belongs to the
+earliest subscriber, but it is marked origin="alert" and left out of search
+history and topic comparisons.
+"""
+import asyncio
+import logging
+import random
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Optional
+from uuid import UUID
+
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.config import settings
+from app.db.models import SavedSearch, Search, normalized_query_sql
+from app.db.session import AsyncSessionLocal, engine
+from app.tasks.aggregation import SENTIMENT_LABELS
+from app.tasks.dedup import dedup_key, dedup_lock, find_shared_result
+from app.tasks.pipeline import AnalysisPipeline
+
+logger = logging.getLogger(__name__)
+
+# pg_try_advisory_lock key held while a cycle runs, so only one process checks alerts at a time
+_CYCLE_LOCK_KEY = 0x566F78416C657274  # "VoxAlert"
+
+_NOT_READY = object()
+
+
+@dataclass
+class AlertEvent:
+    """A saved search whose threshold was crossed"""
+    saved_search_id: UUID
+    user_id: UUID
+    query: str
+    threshold: float
+    shift: float
+    sentiment_summary: dict
+
+
+@dataclass
+class AlertCycleStats:
+    """What one scheduler cycle did"""
+    topics: int = 0
+    analyses: int = 0  # Topics that needed a new pipeline run
+    deferred: int = 0  # Topics whose shared analysis is still running
+    checked: int = 0  # Saved searches evaluated
+    triggered: int = 0
+
+
+def sentiment_shift(previous: Optional[dict], current: Optional[dict]) -> Optional[float]:
+    """Largest change, in percentage points, of any sentiment share between two summaries"""
+    if not previous or not current:
+        return None
+    return max(abs(float(current.get(label) or 0) - float(previous.get(label) or 0)) for label in SENTIMENT_LABELS)
+
+
+def is_triggered(threshold: Optional[float], shift: Optional[float]) -> bool:
+    if shift is None:
+        return False
+    return shift >= (threshold if threshold is not None else settings.ALERT_DEFAULT_THRESHOLD)
+
+
+async def log_alert(event: AlertEvent) -> None:
+    """Default notifier until alerts are delivered by email"""
+    logger.info(
+        "Alert for saved search %s (%r): sentiment moved %.1f points (threshold %.1f)",
+        event.saved_search_id, event.query, event.shift, event.threshold,
+    )
+
+
+class AlertScheduler:
+    """Periodically checks due saved searches, one analysis per distinct topic"""
+
+    def __init__(
+        self,
+        pipeline: Optional[AnalysisPipeline] = None,
+        session_factory=AsyncSessionLocal,
+        bind: AsyncEngine = engine,
+        notify: Callable[[AlertEvent], Awaitable[None]] = log_alert,
+        check_interval: float = settings.ALERT_CHECK_INTERVAL_SECONDS,
+        tick: float = settings.ALERT_SCHEDULER_TICK,
+        jitter: float = settings.ALERT_SCHEDULER_JITTER,
+        max_topics: int = settings.ALERT_MAX_TOPICS_PER_CYCLE,
+        page_size: int = settings.ALERT_PAGE_SIZE,
+        concurrency: int = settings.ALERT_CONCURRENCY,
+        time_range: str = settings.ALERT_TIME_RANGE,
+    ):
+        self._pipeline = pipeline
+        self.session_factory = session_factory
+        self.bind = bind
+        self.notify = notify
+        self.check_interval = check_interval
+        self.tick = tick
+        self.jitter = jitter
+        self.max_topics = max_topics
+        self.page_size = page_size
+        self.concurrency = concurrency
+        self.time_range = time_range
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def pipeline(self) -> AnalysisPipeline:
+        # Built on first use, not at import: the configured tweet source may
+        # need settings (or models) that importing the app must not depend on
+        if self._pipeline is None:
+            self._pipeline = AnalysisPipeline()
+        return self._pipeline
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def next_delay(self) -> float:
+        """Seconds until the next cycle"""
+        return self.tick * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    async def _loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.next_delay())
+            try:
+                stats = await self.run_cycle()
+            except Exception:
+                logger.exception("Alert cycle failed")
+                continue
+            if stats is not None and stats.topics:
+                logger.info(
+                    "Alert cycle: %d topics (%d analyzed, %d deferred), %d saved searches checked, %d alerts",
+                    stats.topics, stats.analyses, stats.deferred, stats.checked, stats.triggered,
+                )
+
+    async def run_cycle(self) -> Optional[AlertCycleStats]:
+        """Check one budget's worth of due topics; None when another process holds the cycle"""
+        if self.bind.dialect.name != "postgresql":
+            return await self._run_cycle()
+        async with self.bind.execution_options(isolation_level="AUTOCOMMIT").connect() as conn:
+            if not await conn.scalar(select(func.pg_try_advisory_lock(_CYCLE_LOCK_KEY))):
+                return None
+            try:
+                return await self._run_cycle()
+            finally:
+                await conn.execute(select(func.pg_advisory_unlock(_CYCLE_LOCK_KEY)))
+
+    def _due(self, cutoff: datetime):
+        return and_(
+            SavedSearch.alert_enabled,  # Matches the partial index predicate
+            or_(SavedSearch.last_checked.is_(None), SavedSearch.last_checked <= cutoff),
+        )
+
+    async def _run_cycle(self) -> AlertCycleStats:
+        stats = AlertCycleStats()
+        cutoff = datetime.utcnow() - timedelta(seconds=self.check_interval)
+        topic = normalized_query_sql(SavedSearch.query)
+        async with self.session_factory() as db:
+            # Never-checked saved searches count as waiting since they were created
+            waiting_since = func.min(func.coalesce(SavedSearch.last_checked, SavedSearch.created_at))
+            result = await db.execute(
+                select(topic.label("topic"), waiting_since.label("waiting_since"))
+                .where(self._due(cutoff))
+                .group_by(topic)
+                .order_by(waiting_since, topic)
+                .limit(self.max_topics)
+            )
+            topics = [row.topic for row in result]
+        stats.topics = len(topics)
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def check(name: str) -> None:
+            async with semaphore:
+                try:
+                    await self._check_topic(name, cutoff, stats)
+                except Exception:
+                    logger.exception("Alert check failed for topic %r", name)
+
+        await asyncio.gather(*(check(name) for name in topics))
+        return stats
+
+    async def _check_topic(self, topic: str, cutoff: datetime, stats: AlertCycleStats) -> None:
+        topic_filter = and_(normalized_query_sql(SavedSearch.query) == topic, self._due(cutoff))
+        async with self.session_factory() as db:
+            # The analysis is owned by the earliest subscriber (origin="alert" keeps it out of their history)
+            first = (await db.execute(
+                select(SavedSearch.user_id, SavedSearch.query)
+                .where(topic_filter)
+                .order_by(SavedSearch.created_at, SavedSearch.id)
+                .limit(1)
+            )).first()
+        if first is None:
+            return
+
+        summary = await self._topic_summary(first.query, first.user_id, stats)
+        if summary is _NOT_READY:
+            stats.deferred += 1
+            return
+
+        after = None
+        while True:
+            async with self.session_factory() as db:
+                page = select(
+                    SavedSearch.id, SavedSearch.user_id, SavedSearch.query,
+                    SavedSearch.alert_threshold, SavedSearch.last_sentiment_summary,
+                ).where(topic_filter)
+                if after is not None:
+                    page = page.where(SavedSearch.id > after)
+                rows = (await db.execute(page.order_by(SavedSearch.id).limit(self.page_size))).all()
+                if not rows:
+                    return
+
+                events = []
+                for row in rows:
+                    shift = sentiment_shift(row.last_sentiment_summary, summary)
+                    if is_triggered(row.alert_threshold, shift):
+                        threshold = row.alert_threshold
+                        events.append(AlertEvent(
+                            saved_search_id=row.id,
+                            user_id=row.user_id,
+                            query=row.query,
+                            threshold=threshold if threshold is not None else settings.ALERT_DEFAULT_THRESHOLD,
+                            shift=shift,
+                            sentiment_summary=summary,
+                        ))
+
+                now = datetime.utcnow()
+                values = {"last_checked": now}
+                if summary is not None:
+                    # Empty or failed analyses keep the previous baseline
+                    values["last_sentiment_summary"] = summary
+                await db.execute(
+                    update(SavedSearch)
+                    .where(SavedSearch.id.in_([row.id for row in rows]))
+                    .values(**values)
+                    .execution_options(synchronize_session=False)
+                )
+                if events:
+                    await db.execute(
+                        update(SavedSearch)
+                        .where(SavedSearch.id.in_([event.saved_search_id for event in events]))
+                        .values(last_alert_at=now)
+                        .execution_options(synchronize_session=False)
+                    )
+                await db.commit()
+
+            stats.checked += len(rows)
+            stats.triggered += len(events)
+            for event in events:
+                try:
+                    await self.notify(event)
+                except Exception:
+                    logger.exception("Failed to deliver alert for saved search %s", event.saved_search_id)
+            if len(rows) < self.page_size:
+                return
+            after = rows[-1].id
+
+    async def _topic_summary(self, query: str, owner_id: UUID, stats: AlertCycleStats):
+        """
+        Sentiment summary of a fresh analysis of the topic: None when it found
+        nothing or failed, _NOT_READY while a shared analysis is still running
+        """
+        key = dedup_key(query, self.time_range)
+        async with self.session_factory() as db:
+            async with dedup_lock(db, key):
+                shared = await find_shared_result(db, key)
+                if shared is None:
+                    search = Search(
+                        user_id=owner_id,
+                        query=query,
+                        time_range=self.time_range,
+                        status="pending",
+                        dedup_key=key,
+                        origin="alert",
+                    )
+                    db.add(search)
+                await db.commit()
+
+        if shared is not None:
+            if shared.status != "completed":
+                return _NOT_READY
+            return shared.sentiment_summary
+
+        stats.analyses += 1
+        result = await self.pipeline.run(search.id)
+        return result.aggregate.sentiment_summary() if result is not None else None
+
+
+alert_scheduler = AlertScheduler()
@@ -0,0 +1,87 @@
+"""
+Celery entry point for running analyses on dedicated worker processes
+
+    celery -A app.tasks.celery_app worker --loglevel=info
+    celery -A app.tasks.celery_app beat --loglevel=info  # saved-search alerts, report janitor
+"""
+import asyncio
+from uuid import UUID
+
+from celery import Celery
+from celery.signals import worker_process_init
+
+from app.core.config import settings
+from app.db.session import engine
+from app.ml.registry import model_registry
+from app.reports.jobs import ReportGenerator
+from app.tasks.alerts import AlertScheduler
+from app.tasks.pipeline import AnalysisPipeline
+
+celery_app = Celery("voxlens", broker=settings.REDIS_URL, backend=settings.REDIS_URL)
+celery_app.conf.task_acks_late = True
+celery_app.conf.worker_prefetch_multiplier = 1
+celery_app.conf.beat_schedule = {
+    "purge-reports": {"task": "purge_reports", "schedule": settings.REPORT_JANITOR_INTERVAL},
+}
+if settings.ALERTS_ENABLED:
+    celery_app.conf.beat_schedule["check-alerts"] = {"task": "check_alerts", "schedule": settings.ALERT_SCHEDULER_TICK}
+
+
+@worker_process_init.connect
+def warm_models(**kwargs) -> None:
+    """Load the sentiment models once per worker process; they stay loaded across tasks"""
+    model_registry.scorers(settings.SENTIMENT_MODELS)
+
+
+async def _analyze(search_id: UUID) -> None:
+    try:
+        await AnalysisPipeline().run(search_id)
+    finally:
+        # asyncpg connections are bound to the loop that created them
+        await engine.dispose()
+
+
+@celery_app.task(name="analyze_sentiment")
+def analyze_sentiment(search_id: str) -> None:
+    """Run the analysis pipeline for one search"""
+    asyncio.run(_analyze(UUID(search_id)))
+
+
+async def _check_alerts() -> None:
+    try:
+        await AlertScheduler().run_cycle()
+    finally:
+        await engine.dispose()
+
+
+@celery_app.task(name="check_alerts")
+def check_alerts() -> None:
+    """Run one saved-search alert cycle (scheduled by celery beat)"""
+    asyncio.run(_check_alerts())
+
+
+async def _generate_report(report_id: UUID) -> None:
+    try:
+        # A Celery worker is already its own process: render on a thread rather than spawn a pool
+        await ReportGenerator(pool=lambda: None).run(report_id)
+    finally:
+        await engine.dispose()
+
+
+@celery_app.task(name="generate_report")
+def generate_report(report_id: str) -> None:
+    """Render one report file"""
+    asyncio.run(_generate_report(UUID(report_id)))
+
+
+async def _purge_reports() -> None:
+    try:
+        await ReportGenerator().purge_expired()
+    finally:
+        await engine.dispose()
+
+
+@celery_app.task(name="purge_reports")
+def purge_reports() -> None:
+    """Delete expired report files and rows (scheduled by celery beat)"""
+    asyncio.run(_purge_reports())
@@ -0,0 +1,115 @@
+"""
+Single-flight coalescing of identical searches
+
+When a topic trends, many users submit the same query + time_range within
+minutes. A new search whose key matches one that is still running, or that
+completed within SEARCH_DEDUP_WINDOW_SECONDS, is attached to it through
+`shared_from_id` instead of triggering another fetch-and-score run. The
+pipeline copies status and summaries onto every attached search.
+
+Attached searches have no search_tweets links or rollups of their own, so
+deleting the canonical search first hands its analysis over to the oldest
+attached search (see `hand_over`).
+"""
+import asyncio
+import hashlib
+import re
+import weakref
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.models import Search, SearchTweet, SentimentRollup
+
+_SPACE_RE = re.compile(r"\s+")
+
+_local_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+
+def normalize_query(query: str) -> str:
+    return _SPACE_RE.sub(" ", query.strip().lower())
+
+
+def dedup_key(query: str, time_range: str) -> str:
+    return hashlib.sha256(f"{normalize_query(query)}|{time_range}".encode("utf-8")).hexdigest()
+
+
+@asynccontextmanager
+async def dedup_lock(db: AsyncSession, key: str):
+    """
+    Serialize work on one dedup key: an asyncio lock within this process and,
+    on Postgres, a transaction-scoped advisory lock across processes. The
+    caller must commit inside the block.
+    """
+    lock = _local_locks.get(key)
+    if lock is None:
+        lock = _local_locks[key] = asyncio.Lock()
+    async with lock:
+        if db.bind.dialect.name == "postgresql":
+            await db.execute(select(func.pg_advisory_xact_lock(func.hashtext(key))))
+        yield
+
+
+async def find_shared_result(db: AsyncSession, key: str) -> Optional[Search]:
+    """The running or recently completed search a new search with this key can attach to"""
+    window_start = datetime.utcnow() - timedelta(seconds=settings.SEARCH_DEDUP_WINDOW_SECONDS)
+    result = await db.execute(
+        select(Search)
+        .where(
+            Search.dedup_key == key,
+            Search.shared_from_id.is_(None),
+            or_(
+                and_(Search.status.in_(("pending", "processing")), Search.created_at >= window_start),
+                and_(Search.status == "completed", Search.completed_at >= window_start),
+            ),
+        )
+        .order_by(Search.created_at.desc())
+        .limit(1)
+    )
+    return result.scalar_one_or_none()
+
+
+def attach_to(search: Search, canonical: Search) -> None:
+    """Point a new search at a shared analysis and copy its current state"""
+    search.shared_from_id = canonical.id
+    search.status = canonical.status
+    search.total_tweets = canonical.total_tweets
+    search.sentiment_summary = canonical.sentiment_summary
+    search.emotion_summary = canonical.emotion_summary
+    search.emotion_stats = canonical.emotion_stats
+    search.entities = canonical.entities
+    search.completed_at = canonical.completed_at
+
+
+async def hand_over(db: AsyncSession, canonical: Search) -> Optional[Search]:
+    """
+    Make the oldest search attached to `canonical` the canonical search of
+    the others, moving the tweet links and rollups to it. Returns that
+    search, or None when nothing is attached. The caller commits, holding
+    dedup_lock when the search has a dedup key.
+    """
+    result = await db.execute(
+        select(Search)
+        .where(Search.shared_from_id == canonical.id)
+        .order_by(Search.created_at, Search.id)
+        .limit(1)
+    )
+    successor = result.scalar_one_or_none()
+    if successor is None:
+        return None
+    await db.execute(
+        update(Search)
+        .where(Search.shared_from_id == canonical.id, Search.id != successor.id)
+        .values(shared_from_id=successor.id)
+    )
+    await db.execute(update(Search).where(Search.id == successor.id).values(shared_from_id=None))
+    await db.execute(update(SearchTweet).where(SearchTweet.search_id == canonical.id).values(search_id=successor.id))
+    await db.execute(
+        update(SentimentRollup).where(SentimentRollup.search_id == canonical.id).values(search_id=successor.id)
+    )
+    await db.refresh(successor)
+    return successor
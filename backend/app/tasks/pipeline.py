@@ -0,0 +1,494 @@
+"""
+Staged sentiment analysis pipeline
+
+    fetch -> normalize -> score -> aggregate -> persist
+
+Every stage runs as its own task and hands batches to the next one through a
+bounded queue, so at most ANALYSIS_MAX_INFLIGHT_BATCHES batches are buffered
+between two stages and a slow stage applies backpressure upstream. The
+aggregate stage folds each batch into the live totals sent to viewers; the
+persist stage writes a search's summary, at most every
+ANALYSIS_SUMMARY_FLUSH_INTERVAL seconds, from the batches already stored.
+
+Tweets another search already stored are linked rather than stored again,
+and only scored by the models they have no sentiment from yet, or only one
+from an older version of the model (which is replaced). The models of a batch
+score concurrently.
+"""
+import asyncio
+import logging
+from contextlib import aclosing
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import AsyncIterator, Callable, Optional, Sequence
+from uuid import UUID
+
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.config import settings
+from app.db.bulk import BulkWriter
+from app.db.models import Search, Sentiment, Tweet
+from app.db.session import AsyncSessionLocal, engine
+from app.ml.base import BatchScores, SentimentScorer
+from app.ml.cache import CacheStats, SentimentCache, get_sentiment_cache
+from app.ml.registry import model_registry
+from app.sources.base import get_tweet_source
+from app.tasks.aggregation import SentimentAggregate
+from app.tasks.dedup import dedup_lock
+from app.websocket.manager import AnalysisBroadcaster, broadcaster as default_broadcaster
+
+logger = logging.getLogger(__name__)
+
+# A fetcher turns a Search into an async stream of raw tweet dicts (a TweetSource is one)
+Fetcher = Callable[[Search], AsyncIterator[list[dict]]]
+
+_DONE = object()
+
+SCORE_FIELDS = ("sentiment_label", "confidence_score", "is_sarcastic", "sarcasm_score", "emotions")
+
+
+@dataclass
+class TweetBatch:
+    """A normalized batch of tweets and the scores of every model for it"""
+    tweets: list[dict]
+    scores: list[BatchScores] = field(default_factory=list)
+    # Per tweet: None, or the stored tweet's id, created_at_twitter and sentiments by model (with id and version)
+    stored: list[Optional[dict]] = field(default_factory=list)
+    # The batch's own totals, set by the aggregate stage
+    aggregate: Optional[SentimentAggregate] = None
+
+
+@dataclass
+class PipelineResult:
+    """Running totals for one search"""
+    aggregate: SentimentAggregate = field(default_factory=SentimentAggregate)
+    cache_stats: CacheStats = field(default_factory=CacheStats)
+    reused_tweets: int = 0  # Already stored by another search, linked instead of stored
+
+    @property
+    def total_tweets(self) -> int:
+        return self.aggregate.total_tweets
+
+    def summary_values(self) -> dict:
+        """Search columns derived from the running totals"""
+        return summary_values(self.aggregate)
+
+
+def summary_values(aggregate: SentimentAggregate) -> dict:
+    """Search columns derived from an aggregate"""
+    return {
+        "total_tweets": aggregate.total_tweets,
+        "sentiment_summary": aggregate.sentiment_summary(),
+        "emotion_summary": aggregate.emotion_summary(),
+        "emotion_stats": aggregate.emotion_stats(),
+    }
+
+
+async def _no_source(search: Search) -> AsyncIterator[list[dict]]:
+    """Placeholder fetcher used until a tweet source is configured"""
+    logger.warning("No tweet source configured, search %s will be empty", search.id)
+    return
+    yield
+
+
+def _parse_datetime(value) -> Optional[datetime]:
+    if value is None or isinstance(value, datetime):
+        return value
+    try:
+        return datetime.fromisoformat(str(value).replace("Z", "+00:00")).replace(tzinfo=None)
+    except ValueError:
+        return None
+
+
+def score_values(scores: BatchScores, i: int) -> dict:
+    """Sentiment row values of the i-th tweet of a batch"""
+    return {
+        "model_name": scores.model_name,
+        "model_version": scores.model_version,
+        "sentiment_label": scores.sentiment_label[i],
+        "confidence_score": float(scores.confidence_score[i]) if scores.confidence_score[i] is not None else None,
+        "is_sarcastic": bool(scores.is_sarcastic[i]) if scores.is_sarcastic is not None else False,
+        "sarcasm_score": (
+            float(scores.sarcasm_score[i])
+            if scores.sarcasm_score is not None and scores.sarcasm_score[i] is not None else None
+        ),
+        "emotions": scores.emotions_at(i),
+    }
+
+
+def current_sentiment(entry: Optional[dict], scorer: SentimentScorer) -> Optional[dict]:
+    """A stored tweet's sentiment from this version of the scorer's model, if it has one"""
+    sentiment = entry["sentiments"].get(scorer.model_name) if entry else None
+    if sentiment is None or sentiment["model_version"] != scorer.model_version:
+        return None
+    return sentiment
+
+
+def merge_scores(
+    scorer: SentimentScorer,
+    stored: Sequence[Optional[dict]],
+    scored_indices: Sequence[int],
+    scored: Optional[BatchScores],
+) -> BatchScores:
+    """Scores for a whole batch from the new scores of some tweets and the stored sentiments of the rest"""
+    columns = {name: [None] * len(stored) for name in SCORE_FIELDS}
+    for i, entry in enumerate(stored):
+        sentiment = current_sentiment(entry, scorer)
+        if sentiment is not None:
+            for name in SCORE_FIELDS:
+                columns[name][i] = sentiment[name]
+    if scored is not None:
+        for position, i in enumerate(scored_indices):
+            for name, value in score_values(scored, position).items():
+                if name in columns:
+                    columns[name][i] = value
+    return BatchScores(model_name=scorer.model_name, model_version=scorer.model_version, **columns)
+
+
+def normalize_tweets(raw_tweets: Sequence[dict], seen: set) -> list[dict]:
+    """Map raw tweet dicts onto Tweet columns, dropping empty and duplicate tweets"""
+    tweets = []
+    for raw in raw_tweets:
+        text = (raw.get("text") or "").strip()
+        if not text:
+            continue
+
+        tweet_id = raw.get("tweet_id") or raw.get("id")
+        tweet_id = str(tweet_id) if tweet_id is not None else None
+        if tweet_id is not None:
+            if tweet_id in seen:
+                continue
+            seen.add(tweet_id)
+
+        tweets.append({
+            "tweet_id": tweet_id,
+            "text": text,
+            "author_username": raw.get("author_username"),
+            "author_name": raw.get("author_name"),
+            "created_at_twitter": _parse_datetime(raw.get("created_at_twitter") or raw.get("created_at")),
+            "retweet_count": int(raw.get("retweet_count") or 0),
+            "like_count": int(raw.get("like_count") or 0),
+            "reply_count": int(raw.get("reply_count") or 0),
+            "is_verified": bool(raw.get("is_verified", False)),
+            "location": raw.get("location"),
+            "raw_data": raw.get("raw_data"),
+        })
+    return tweets
+
+
+class AnalysisPipeline:
+    """Runs the full analysis for one Search at a time"""
+
+    def __init__(
+        self,
+        fetcher: Optional[Fetcher] = None,
+        scorers: Optional[Sequence[SentimentScorer]] = None,
+        cache: Optional[SentimentCache] = None,
+        session_factory=AsyncSessionLocal,
+        bind: AsyncEngine = engine,
+        broadcaster: AnalysisBroadcaster = default_broadcaster,
+        batch_size: int = settings.ANALYSIS_BATCH_SIZE,
+        max_inflight_batches: int = settings.ANALYSIS_MAX_INFLIGHT_BATCHES,
+        max_tweets: int = settings.ANALYSIS_MAX_TWEETS,
+        summary_flush_interval: float = settings.ANALYSIS_SUMMARY_FLUSH_INTERVAL,
+    ):
+        self.fetcher = fetcher or get_tweet_source() or _no_source
+        # Registry models (SENTIMENT_MODELS) are looked up on the first run
+        self.scorers = list(scorers) if scorers is not None else None
+        self.cache = cache if cache is not None else get_sentiment_cache()
+        self.session_factory = session_factory
+        self.bind = bind
+        self.broadcaster = broadcaster
+        self.batch_size = batch_size
+        self.max_inflight_batches = max_inflight_batches
+        self.max_tweets = max_tweets
+        self.summary_flush_interval = summary_flush_interval
+
+    async def run(self, search_id: UUID) -> Optional[PipelineResult]:
+        """Analyze a pending search, moving it to processing and then completed/failed"""
+        search = await self._claim(search_id)
+        if search is None:
+            logger.info("Search %s is not pending, skipping", search_id)
+            return None
+
+        result = PipelineResult()
+        try:
+            await self._run_stages(search, result)
+        except Exception:
+            logger.exception("Analysis failed for search %s", search_id)
+            await self._finish(search, status="failed", total_tweets=result.total_tweets)
+            self.broadcaster.publish(search_id, "error", {
+                **self._progress_data(search_id, result, "failed"),
+                "message": "Analysis failed",
+            })
+            return None
+
+        await self._finish(
+            search,
+            status="completed",
+            completed_at=datetime.utcnow(),
+            **result.summary_values(),
+        )
+        self.broadcaster.publish(search_id, "complete", self._progress_data(search_id, result, "completed"))
+        if result.reused_tweets:
+            logger.info(
+                "Search %s: %d/%d tweets were already stored by earlier searches",
+                search_id, result.reused_tweets, result.total_tweets,
+            )
+        stats = result.cache_stats
+        if stats.lookups:
+            logger.info(
+                "Search %s: %d/%d sentiment lookups served from cache (%d model calls)",
+                search_id, stats.lookups - stats.misses, stats.lookups, stats.model_calls,
+            )
+        return result
+
+    async def _claim(self, search_id: UUID) -> Optional[Search]:
+        """Atomically move a search from pending to processing"""
+        async with self.session_factory() as db:
+            claimed = await db.execute(
+                update(Search)
+                .where(
+                    Search.id == search_id,
+                    Search.status == "pending",
+                    Search.shared_from_id.is_(None),
+                )
+                .values(status="processing")
+            )
+            if claimed.rowcount != 1:
+                await db.rollback()
+                return None
+            # Searches that attached to this one while it was pending follow along
+            await db.execute(
+                update(Search).where(Search.shared_from_id == search_id).values(status="processing")
+            )
+            await db.commit()
+            return await db.get(Search, search_id)
+
+    async def _update_search(self, search_id: UUID, **values) -> None:
+        """Update a search and every search sharing its result"""
+        async with self.session_factory() as db:
+            await db.execute(
+                update(Search)
+                .where(or_(Search.id == search_id, Search.shared_from_id == search_id))
+                .values(**values)
+            )
+            await db.commit()
+
+    async def _finish(self, search: Search, **values) -> None:
+        """Final update, serialized with new searches attaching to this one"""
+        if not search.dedup_key:
+            await self._update_search(search.id, **values)
+            return
+        async with self.session_factory() as db:
+            async with dedup_lock(db, search.dedup_key):
+                await db.execute(
+                    update(Search)
+                    .where(or_(Search.id == search.id, Search.shared_from_id == search.id))
+                    .values(**values)
+                )
+                await db.commit()
+
+    async def load_models(self) -> None:
+        """Load the registry models this pipeline runs, if they aren't yet"""
+        if self.scorers is None:
+            self.scorers = await model_registry.load(settings.SENTIMENT_MODELS)
+
+    async def _run_stages(self, search: Search, result: PipelineResult) -> None:
+        await self.load_models()
+        fetched, normalized, scored, aggregated = (
+            asyncio.Queue(maxsize=self.max_inflight_batches) for _ in range(4)
+        )
+        tasks = [
+            asyncio.create_task(self._fetch_stage(search, fetched)),
+            asyncio.create_task(self._normalize_stage(fetched, normalized)),
+            asyncio.create_task(self._score_stage(normalized, scored, result.cache_stats)),
+            asyncio.create_task(self._aggregate_stage(search.id, scored, aggregated, result)),
+            asyncio.create_task(self._persist_stage(search.id, aggregated)),
+        ]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+    async def _fetch_stage(self, search: Search, out: asyncio.Queue) -> None:
+        """Re-chunk the fetcher's stream into fixed-size batches"""
+        pending: list[dict] = []
+        fetched = 0
+        # aclosing: stopping at max_tweets must also stop the source's in-flight requests
+        async with aclosing(self.fetcher(search)) as pages:
+            async for page in pages:
+                for raw in page:
+                    pending.append(raw)
+                    fetched += 1
+                    if len(pending) >= self.batch_size:
+                        await out.put(pending)
+                        pending = []
+                    if fetched >= self.max_tweets:
+                        break
+                if fetched >= self.max_tweets:
+                    break
+        if pending:
+            await out.put(pending)
+        await out.put(_DONE)
+
+    async def _normalize_stage(self, inbox: asyncio.Queue, out: asyncio.Queue) -> None:
+        """Map raw tweets onto Tweet columns (in a worker thread) and look up which are already stored"""
+        loop = asyncio.get_running_loop()
+        seen: set = set()
+        while True:
+            raw = await inbox.get()
+            if raw is _DONE:
+                await out.put(_DONE)
+                return
+            tweets = await loop.run_in_executor(None, normalize_tweets, raw, seen)
+            if tweets:
+                await out.put(TweetBatch(tweets=tweets, stored=await self._stored_tweets(tweets)))
+
+    async def _score_stage(self, inbox: asyncio.Queue, out: asyncio.Queue, stats: CacheStats) -> None:
+        """Score batches with every model; CPU work runs in worker threads so the event loop stays free"""
+        while True:
+            batch = await inbox.get()
+            if batch is _DONE:
+                await out.put(_DONE)
+                return
+            texts = [tweet["text"] for tweet in batch.tweets]
+            batch.scores = list(await asyncio.gather(*(
+                self._score_missing(scorer, texts, batch.stored, stats) for scorer in self.scorers
+            )))
+            await out.put(batch)
+
+    async def _stored_tweets(self, tweets: list[dict]) -> list[Optional[dict]]:
+        """Which tweets of a batch are already stored, with their sentiments from the configured models"""
+        tweet_ids = [tweet["tweet_id"] for tweet in tweets if tweet["tweet_id"] is not None]
+        if not tweet_ids:
+            return [None] * len(tweets)
+        async with self.session_factory() as db:
+            result = await db.execute(
+                select(Tweet.id, Tweet.tweet_id, Tweet.created_at_twitter, Sentiment.id.label("sentiment_id"),
+                       Sentiment.model_name, Sentiment.model_version,
+                       *(getattr(Sentiment, name) for name in SCORE_FIELDS))
+                .outerjoin(Sentiment, and_(
+                    Sentiment.tweet_id == Tweet.id,
+                    Sentiment.model_name.in_([scorer.model_name for scorer in self.scorers])
+                ))
+                .where(Tweet.tweet_id.in_(tweet_ids))
+                .order_by(Sentiment.created_at)
+            )
+            stored: dict[str, dict] = {}
+            for row in result:
+                entry = stored.setdefault(row.tweet_id, {
+                    "id": row.id, "created_at_twitter": row.created_at_twitter, "sentiments": {}
+                })
+                if row.model_name is not None:
+                    entry["sentiments"].setdefault(row.model_name, {
+                        "id": row.sentiment_id,
+                        "model_version": row.model_version,
+                        **{name: getattr(row, name) for name in SCORE_FIELDS},
+                    })
+        return [stored.get(tweet["tweet_id"]) for tweet in tweets]
+
+    async def _score_missing(
+        self, scorer: SentimentScorer, texts: list[str], stored: list[Optional[dict]], stats: CacheStats
+    ) -> BatchScores:
+        """One model's scores for a batch, scoring only tweets without a current sentiment from it"""
+        needed = [i for i, entry in enumerate(stored) if current_sentiment(entry, scorer) is None]
+        if len(needed) == len(texts):
+            return await self._score(scorer, texts, stats)
+        scored = await self._score(scorer, [texts[i] for i in needed], stats) if needed else None
+        return merge_scores(scorer, stored, needed, scored)
+
+    async def _score(self, scorer: SentimentScorer, texts: list[str], stats: CacheStats) -> BatchScores:
+        if self.cache is None:
+            scores = await scorer.score(texts)
+        else:
+            scores = await self.cache.score(scorer, texts, stats)
+        if scores.model_version is None:
+            scores.model_version = scorer.model_version
+        return scores
+
+    async def _aggregate_stage(
+        self, search_id: UUID, inbox: asyncio.Queue, out: asyncio.Queue, result: PipelineResult
+    ) -> None:
+        """Fold each scored batch into the running totals and send it to live viewers"""
+        while True:
+            batch = await inbox.get()
+            if batch is _DONE:
+                await out.put(_DONE)
+                return
+            # The first configured model drives the search summary
+            batch.aggregate = SentimentAggregate()
+            batch.aggregate.add_batch(len(batch.tweets), batch.scores[0] if batch.scores else None)
+            result.aggregate.merge(batch.aggregate)
+            result.reused_tweets += sum(1 for entry in batch.stored if entry is not None)
+            self._publish(search_id, batch, result)
+            await out.put(batch)
+
+    async def _persist_stage(self, search_id: UUID, inbox: asyncio.Queue) -> None:
+        """Hand each batch's rows to the bulk writer and keep the search's summary up to date"""
+        loop = asyncio.get_running_loop()
+        last_summary = loop.time()
+        # Totals of the batches handed to the writer; the aggregate stage may be further ahead
+        persisted = SentimentAggregate()
+        async with BulkWriter(self.bind) as writer:
+            while True:
+                batch = await inbox.get()
+                if batch is _DONE:
+                    break
+                self._persist(writer, search_id, batch)
+                persisted.merge(batch.aggregate)
+                await writer.maybe_flush()
+                # Only report totals that are already persisted, and not on every batch
+                if not writer.pending and loop.time() - last_summary >= self.summary_flush_interval:
+                    await self._update_search(search_id, **summary_values(persisted))
+                    last_summary = loop.time()
+
+    def _progress_data(self, search_id: UUID, result: PipelineResult, status: str) -> dict:
+        return {"search_id": str(search_id), "status": status, **result.summary_values()}
+
+    def _publish(self, search_id: UUID, batch: TweetBatch, result: PipelineResult) -> None:
+        """Send the batch's scored tweets and the running summary to live viewers"""
+        if not self.broadcaster.has_subscribers(search_id):
+            return
+        primary = batch.scores[0] if batch.scores else None
+        tweets = []
+        for i, tweet in enumerate(batch.tweets):
+            created_at = tweet["created_at_twitter"]
+            tweets.append({
+                "tweet_id": tweet["tweet_id"],
+                "text": tweet["text"],
+                "author_username": tweet["author_username"],
+                "author_name": tweet["author_name"],
+                "created_at_twitter": created_at.isoformat() if created_at else None,
+                "sentiment_label": str(primary.sentiment_label[i]) if primary else None,
+                "confidence_score": float(primary.confidence_score[i]) if primary else None,
+            })
+        self.broadcaster.publish(search_id, "tweet", {"search_id": str(search_id), "tweets": tweets})
+        self.broadcaster.publish(search_id, "progress", self._progress_data(search_id, result, "processing"))
+
+    def _persist(self, writer: BulkWriter, search_id: UUID, batch: TweetBatch) -> None:
+        for i, values in enumerate(batch.tweets):
+            sentiments = [score_values(scores, i) for scores in batch.scores]
+            stored = batch.stored[i] if batch.stored else None
+            if stored is None:
+                tweet_pk = writer.add_tweet(values, search_id)
+                for row in sentiments:
+                    writer.add_sentiment({"tweet_id": tweet_pk, **row})
+                continue
+
+            tweet_pk = stored["id"]
+            writer.link_tweet(
+                search_id,
+                {**values, "id": tweet_pk, "created_at_twitter": stored["created_at_twitter"]},
+                sentiments[0] if sentiments else None,
+            )
+            for row in sentiments:
+                previous = stored["sentiments"].get(row["model_name"])
+                if previous is None:
+                    writer.add_sentiment({"tweet_id": tweet_pk, **row})
+                elif previous["model_version"] != row["model_version"]:
+                    writer.replace_sentiment(previous["id"], {"tweet_id": tweet_pk, **row})
@@ -0,0 +1,82 @@
+"""
+Dispatching searches to the analysis pipeline
+
+With ANALYSIS_EAGER enabled, searches are queued in-process and drained by a
+fixed number of pipeline tasks on the API's own event loop, which is enough to
+load-test the whole pipeline on one box. Otherwise they go to Celery.
+"""
+import asyncio
+import logging
+from typing import Optional
+from uuid import UUID
+
+from app.core.config import settings
+from app.tasks.pipeline import AnalysisPipeline
+
+logger = logging.getLogger(__name__)
+
+
+class AnalysisWorker:
+    """In-process queue of Search ids drained by concurrent pipeline runs"""
+
+    def __init__(self, pipeline: Optional[AnalysisPipeline] = None, concurrency: int = settings.ANALYSIS_WORKERS):
+        self._pipeline = pipeline
+        self.concurrency = concurrency
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self._tasks: list[asyncio.Task] = []
+
+    @property
+    def pipeline(self) -> AnalysisPipeline:
+        # Built on first use, not at import: the configured tweet source may
+        # need settings (or models) that importing the app must not depend on
+        if self._pipeline is None:
+            self._pipeline = AnalysisPipeline()
+        return self._pipeline
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    async def start(self) -> None:
+        if self.running:
+            return
+        # Load models up front so the first search doesn't wait for them
+        await self.pipeline.load_models()
+        self._tasks = [asyncio.create_task(self._consume()) for _ in range(self.concurrency)]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def enqueue(self, search_id: UUID) -> None:
+        if not self.running:
+            await self.start()
+        await self.queue.put(search_id)
+
+    async def join(self) -> None:
+        """Wait until every queued search has been processed"""
+        await self.queue.join()
+
+    async def _consume(self) -> None:
+        while True:
+            search_id = await self.queue.get()
+            try:
+                await self.pipeline.run(search_id)
+            except Exception:
+                logger.exception("Unhandled error analyzing search %s", search_id)
+            finally:
+                self.queue.task_done()
+
+
+analysis_worker = AnalysisWorker()
+
+
+async def dispatch_analysis(search_id: UUID) -> None:
+    """Hand a newly created search to the analysis pipeline"""
+    if settings.ANALYSIS_EAGER:
+        await analysis_worker.enqueue(search_id)
+    else:
+        from app.tasks.celery_app import celery_app
+        celery_app.send_task("analyze_sentiment", args=[str(search_id)])
@@ -0,0 +1 @@
+# Empty file to make websocket a package
@@ -0,0 +1,94 @@
+"""
+In-process pub/sub for live analysis updates
+
+The pipeline publishes each frame once per search and the broadcaster fans it
+out to every subscribed connection, so N viewers of one search cost one
+pipeline run. Publishing never blocks: every connection has its own bounded
+outbox where
+
+- "tweet" frames go into a bounded FIFO that drops the oldest frame when full,
+- "progress" frames (running aggregates) coalesce into a single slot that
+  always holds the latest snapshot,
+- "complete"/"error" frames are kept until delivered and end the stream.
+"""
+import asyncio
+import logging
+from collections import deque
+from typing import Optional
+from uuid import UUID
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_TYPES = ("complete", "error")
+
+
+class Subscription:
+    """Outbox of one WebSocket connection"""
+
+    def __init__(self, max_frames: int = settings.WS_MAX_QUEUED_FRAMES):
+        self.max_frames = max_frames
+        self.dropped = 0
+        self._frames: deque = deque()
+        self._progress: Optional[dict] = None
+        self._terminal: Optional[dict] = None
+        self._ready = asyncio.Event()
+
+    def offer(self, message: dict) -> None:
+        """Queue a frame without blocking; called from the publisher"""
+        if message["type"] == "progress":
+            self._progress = message
+        elif message["type"] in TERMINAL_TYPES:
+            self._terminal = message
+        else:
+            if len(self._frames) >= self.max_frames:
+                self._frames.popleft()
+                self.dropped += 1
+            self._frames.append(message)
+        self._ready.set()
+
+    async def get(self) -> dict:
+        """Next frame to send: queued tweets, then the latest progress, then the terminal frame"""
+        while True:
+            if self._frames:
+                return self._frames.popleft()
+            if self._progress is not None:
+                message, self._progress = self._progress, None
+                return message
+            if self._terminal is not None:
+                return self._terminal
+            self._ready.clear()
+            await self._ready.wait()
+
+
+class AnalysisBroadcaster:
+    """Fans frames for a search out to its subscribers"""
+
+    def __init__(self):
+        self._topics: dict[UUID, set[Subscription]] = {}
+
+    def subscribe(self, search_id: UUID) -> Subscription:
+        subscription = Subscription()
+        self._topics.setdefault(search_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, search_id: UUID, subscription: Subscription) -> None:
+        subscribers = self._topics.get(search_id)
+        if subscribers is None:
+            return
+        subscribers.discard(subscription)
+        if not subscribers:
+            del self._topics[search_id]
+        if subscription.dropped:
+            logger.info("Dropped %d frames for a slow viewer of search %s", subscription.dropped, search_id)
+
+    def has_subscribers(self, search_id: UUID) -> bool:
+        return search_id in self._topics
+
+    def publish(self, search_id: UUID, message_type: str, data: dict) -> None:
+        for subscription in self._topics.get(search_id, ()):
+            subscription.offer({"type": message_type, "data": data})
+
+
+broadcaster = AnalysisBroadcaster()
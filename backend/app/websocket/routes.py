@@ -0,0 +1,104 @@
+import asyncio
+from typing import Optional
+from uuid import UUID
+
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect, status
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.core.security import decode_token
+from app.db.models import Search
+from app.db.session import AsyncSessionLocal
+from app.websocket.manager import TERMINAL_TYPES, Subscription, broadcaster
+
+router = APIRouter()
+
+
+def search_snapshot(search: Search) -> dict:
+    """Frame describing the current persisted state of a search"""
+    data = {
+        "search_id": str(search.id),
+        "status": search.status,
+        "total_tweets": search.total_tweets,
+        "sentiment_summary": search.sentiment_summary,
+        "emotion_summary": search.emotion_summary,
+        "emotion_stats": search.emotion_stats,
+    }
+    if search.status == "completed":
+        return {"type": "complete", "data": data}
+    if search.status == "failed":
+        return {"type": "error", "data": {**data, "message": "Analysis failed"}}
+    return {"type": "progress", "data": data}
+
+
+async def _load_search(search_id: UUID, user_id: str) -> Optional[Search]:
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(Search).filter(Search.id == search_id, Search.user_id == user_id)
+        )
+        return result.scalar_one_or_none()
+
+
+async def _send_frames(websocket: WebSocket, subscription: Subscription, search_id: UUID, user_id: str) -> None:
+    while True:
+        try:
+            message = await asyncio.wait_for(subscription.get(), timeout=settings.WS_POLL_INTERVAL)
+        except asyncio.TimeoutError:
+            # No live frames (e.g. the analysis runs in a Celery worker): fall back to the database
+            search = await _load_search(search_id, user_id)
+            if search is None:
+                return
+            subscription.offer(search_snapshot(search))
+            continue
+        await websocket.send_json(message)
+        if message["type"] in TERMINAL_TYPES:
+            return
+
+
+async def _wait_for_disconnect(websocket: WebSocket) -> None:
+    while True:
+        message = await websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            return
+
+
+@router.websocket("/ws/analyze/{search_id}")
+async def analyze_updates(websocket: WebSocket, search_id: UUID, token: Optional[str] = None):
+    """Stream scored tweets and running summaries for a search"""
+    payload = decode_token(token) if token else None
+    user_id = payload.get("sub") if payload else None
+    if user_id is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    search = await _load_search(search_id, user_id)
+    if search is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+
+    # Subscribe before taking the snapshot so no frame falls in between
+    topic = search.analysis_id
+    subscription = broadcaster.subscribe(topic)
+    try:
+        search = await _load_search(search_id, user_id)
+        if search is None:
+            # Deleted since the first load
+            await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+            return
+        subscription.offer(search_snapshot(search))
+
+        sender = asyncio.create_task(_send_frames(websocket, subscription, search_id, user_id))
+        receiver = asyncio.create_task(_wait_for_disconnect(websocket))
+        done, pending = await asyncio.wait({sender, receiver}, return_when=asyncio.FIRST_COMPLETED)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        if sender in done:
+            sender.result()
+            await websocket.close()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        broadcaster.unsubscribe(topic, subscription)
@@ -0,0 +1,72 @@
+"""
+Benchmark: GET /api/v1/auth/me with and without the principal cache
+
+Runs the app in-process (no network) against the database in DATABASE_URL:
+
+    python -m benchmarks.bench_auth --requests 5000 --concurrency 20
+"""
+import argparse
+import asyncio
+import time
+import uuid
+
+import httpx
+from sqlalchemy import delete
+
+from app.core.principals import principal_cache
+from app.core.security import create_access_token
+from app.db.models import User
+from app.db.session import AsyncSessionLocal, engine
+from app.main import app
+
+
+async def run(client: httpx.AsyncClient, token: str, requests: int, concurrency: int) -> float:
+    headers = {"Authorization": f"Bearer {token}"}
+    remaining = iter(range(requests))
+
+    async def worker():
+        for _ in remaining:
+            response = await client.get("/api/v1/auth/me", headers=headers)
+            response.raise_for_status()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return time.perf_counter() - start
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+    engine.echo = False
+
+    async with AsyncSessionLocal() as db:
+        user = User(email=f"bench-{uuid.uuid4().hex[:8]}@example.com", credits_remaining=0)
+        db.add(user)
+        await db.commit()
+        user_id = user.id
+    token = create_access_token(data={"sub": str(user_id)})
+
+    print("=" * 60)
+    print(f"GET /auth/me x {args.requests} ({args.concurrency} concurrent)")
+    print("=" * 60)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        try:
+            for label, ttl in (("No cache", 0), ("Principal cache", 30)):
+                principal_cache.clear()
+                principal_cache.tokens.ttl = principal_cache.users.ttl = ttl
+                await run(client, token, 100, args.concurrency)  # Warm up
+                elapsed = await run(client, token, args.requests, args.concurrency)
+                print(f"{label:<20} {elapsed:8.2f}s  {args.requests / elapsed:>10,.0f} req/sec")
+        finally:
+            async with AsyncSessionLocal() as db:
+                await db.execute(delete(User).where(User.id == user_id))
+                await db.commit()
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,120 @@
+"""
+Benchmark: Tweet + Sentiment persistence, ORM unit of work vs BulkWriter
+
+Runs against the database in DATABASE_URL (Postgres for the COPY path):
+
+    python -m benchmarks.bench_bulk_writer --tweets 20000 --models 2
+"""
+import argparse
+import asyncio
+import time
+import uuid
+
+from sqlalchemy import delete, select
+
+from app.db.bulk import BulkWriter
+from app.db.models import Search, SearchTweet, Sentiment, Tweet, User
+from app.db.session import AsyncSessionLocal, engine
+
+
+async def delete_user_data(user_id) -> None:
+    """Delete a benchmark user, its searches and the tweets they stored"""
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(Tweet).where(Tweet.id.in_(
+            select(SearchTweet.tweet_id).join(Search, Search.id == SearchTweet.search_id).where(Search.user_id == user_id)
+        )))
+        await db.execute(delete(User).where(User.id == user_id))
+        await db.commit()
+
+
+def make_tweets(n: int, run: str) -> list[dict]:
+    return [
+        {
+            "tweet_id": f"bench-{run}-{i}",
+            "text": f"benchmark tweet number {i} about a trending topic",
+            "author_username": f"user{i % 1000}",
+            "retweet_count": i % 17,
+            "like_count": i % 101,
+            "reply_count": i % 7,
+            "raw_data": {"lang": "en", "source": "bench"},
+        }
+        for i in range(n)
+    ]
+
+
+def sentiment_values(model: int, i: int) -> dict:
+    return {
+        "model_name": f"model{model}",
+        "model_version": "1",
+        "sentiment_label": ("positive", "negative", "neutral")[i % 3],
+        "confidence_score": 0.75,
+        "emotions": {"joy": 0.1, "anger": 0.2, "fear": 0.0, "surprise": 0.3, "sadness": 0.4},
+    }
+
+
+async def bench_orm(search_id, tweets, models, batch_size) -> float:
+    start = time.perf_counter()
+    async with AsyncSessionLocal() as db:
+        search = await db.get(Search, search_id)
+        for offset in range(0, len(tweets), batch_size):
+            for i, values in enumerate(tweets[offset:offset + batch_size], start=offset):
+                tweet = Tweet(**values)
+                tweet.searches.append(search)
+                for model in range(models):
+                    tweet.sentiments.append(Sentiment(**sentiment_values(model, i)))
+                db.add(tweet)
+            await db.commit()
+    return time.perf_counter() - start
+
+
+async def bench_bulk(search_id, tweets, models, batch_size, use_copy) -> float:
+    start = time.perf_counter()
+    async with BulkWriter(engine, batch_size=batch_size, use_copy=use_copy) as writer:
+        for i, values in enumerate(tweets):
+            tweet_pk = writer.add_tweet(values, search_id)
+            for model in range(models):
+                writer.add_sentiment({"tweet_id": tweet_pk, **sentiment_values(model, i)})
+            await writer.maybe_flush()
+    return time.perf_counter() - start
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tweets", type=int, default=20000)
+    parser.add_argument("--models", type=int, default=2)
+    parser.add_argument("--batch-size", type=int, default=2000)
+    args = parser.parse_args()
+
+    async with AsyncSessionLocal() as db:
+        user = User(email=f"bench-{uuid.uuid4().hex[:8]}@example.com")
+        db.add(user)
+        await db.flush()
+        search = Search(user_id=user.id, query="benchmark")
+        db.add(search)
+        await db.commit()
+
+    rows = args.tweets * (1 + args.models)
+    print("=" * 60)
+    print(f"Persisting {args.tweets} tweets x {args.models} models ({rows} rows)")
+    print("=" * 60)
+
+    variants = [
+        ("ORM db.add()", lambda run: bench_orm(search.id, make_tweets(args.tweets, run), args.models, args.batch_size)),
+        ("BulkWriter INSERT", lambda run: bench_bulk(search.id, make_tweets(args.tweets, run), args.models, args.batch_size, False)),
+    ]
+    if engine.dialect.name == "postgresql" and engine.dialect.driver == "asyncpg":
+        variants.append(
+            ("BulkWriter COPY", lambda run: bench_bulk(search.id, make_tweets(args.tweets, run), args.models, args.batch_size, True))
+        )
+
+    try:
+        for name, run in variants:
+            elapsed = await run(uuid.uuid4().hex[:8])
+            print(f"{name:<20} {elapsed:8.2f}s  {rows / elapsed:>10,.0f} rows/sec")
+    finally:
+        await delete_user_data(user.id)
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,77 @@
+"""
+Benchmark: sparse-matrix emotion scoring vs a per-tweet lexicon loop
+
+    python -m benchmarks.bench_emotion --tweets 200000 --batch-size 5000
+"""
+import argparse
+import random
+import time
+
+from app.ml.base import EMOTIONS
+from app.ml.emotion import EmotionScorer
+from app.ml.emotion_lexicon import EMOTION_TERMS
+from app.ml.text import tokenize
+from app.ml.vader import VaderScorer
+from benchmarks.bench_vader import FILLER
+
+
+def make_tweets(n: int) -> list[str]:
+    rng = random.Random(42)
+    emotion_words = list(EMOTION_TERMS)
+    return [
+        " ".join(rng.choice(emotion_words) if rng.random() < 0.15 else rng.choice(FILLER) for _ in range(rng.randint(8, 30)))
+        for _ in range(n)
+    ]
+
+
+def score_reference(text: str):
+    """One dict per tweet, the way emotion scores were built before"""
+    weights = dict.fromkeys(EMOTIONS, 0.0)
+    for token in tokenize(text):
+        for emotion, weight in EMOTION_TERMS.get(token, {}).items():
+            weights[emotion] += weight
+    total = sum(weights.values())
+    return {emotion: value / total for emotion, value in weights.items()} if total else None
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tweets", type=int, default=200000)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    args = parser.parse_args()
+
+    tweets = make_tweets(args.tweets)
+    scorer = EmotionScorer()
+    scorer.score_batch(tweets[:100])  # Warm up
+
+    print("=" * 60)
+    print(f"Emotion scoring {args.tweets} tweets (batch size {args.batch_size})")
+    print("=" * 60)
+
+    start = time.perf_counter()
+    for offset in range(0, len(tweets), args.batch_size):
+        scorer.score_batch(tweets[offset:offset + args.batch_size])
+    elapsed = time.perf_counter() - start
+    print(f"{'EmotionScorer (sparse)':<28} {elapsed:8.2f}s  {len(tweets) / elapsed:>10,.0f} tweets/sec")
+
+    sample = tweets[:20000]
+    start = time.perf_counter()
+    for text in sample:
+        score_reference(text)
+    elapsed = time.perf_counter() - start
+    print(f"{'Reference (per tweet)':<28} {elapsed:8.2f}s  {len(sample) / elapsed:>10,.0f} tweets/sec")
+
+    print()
+    print("=" * 60)
+    print("VaderScorer with and without emotions (shared tokenization)")
+    print("=" * 60)
+    for label, vader in (("sentiment only", VaderScorer(emotions=False)), ("sentiment + emotions", VaderScorer())):
+        start = time.perf_counter()
+        for offset in range(0, len(tweets), args.batch_size):
+            vader.score_batch(tweets[offset:offset + args.batch_size])
+        elapsed = time.perf_counter() - start
+        print(f"{label:<28} {elapsed:8.2f}s  {len(tweets) / elapsed:>10,.0f} tweets/sec")
+
+
+if __name__ == "__main__":
+    main()
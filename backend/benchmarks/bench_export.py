@@ -0,0 +1,105 @@
+"""
+Benchmark: streaming export, time to first byte, throughput and peak memory
+
+Seeds one search with --tweets tweets x --models sentiments through the bulk
+writer, then reads it back through stream_export and, for comparison, by
+loading every row before formatting:
+
+    python -m benchmarks.bench_export --tweets 200000 --models 1
+"""
+import argparse
+import asyncio
+import time
+import tracemalloc
+import uuid
+
+from app.db.bulk import BulkWriter
+from app.db.models import Search, User
+from app.db.session import AsyncSessionLocal, engine
+from app.reports.export import export_query, format_csv, stream_export
+from benchmarks.bench_bulk_writer import delete_user_data, make_tweets, sentiment_values
+
+
+async def seed(search_id, tweets: int, models: int) -> None:
+    run = uuid.uuid4().hex[:8]
+    async with BulkWriter(engine) as writer:
+        for offset in range(0, tweets, 10000):
+            for i, values in enumerate(make_tweets(min(10000, tweets - offset), f"{run}-{offset}"), start=offset):
+                tweet_pk = writer.add_tweet(values, search_id)
+                for model in range(models):
+                    writer.add_sentiment({"tweet_id": tweet_pk, **sentiment_values(model, i)})
+            await writer.flush()
+
+
+async def measure(body) -> tuple[float, float, int]:
+    """(seconds to first chunk, total seconds, bytes)"""
+    start = time.perf_counter()
+    first = None
+    size = 0
+    async for chunk in body:
+        if first is None:
+            first = time.perf_counter() - start
+        size += len(chunk)
+    elapsed = time.perf_counter() - start
+    return first or elapsed, elapsed, size
+
+
+async def peak_memory(body) -> int:
+    """Peak bytes allocated while consuming a body (separate pass, tracemalloc is slow)"""
+    tracemalloc.start()
+    async for _ in body:
+        pass
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+async def buffered_csv(search_id):
+    """What a non-streaming endpoint would do: load everything, then format"""
+    async with engine.connect() as conn:
+        rows = (await conn.execute(export_query(search_id))).all()
+    yield format_csv(rows, header=True).encode("utf-8")
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tweets", type=int, default=200000)
+    parser.add_argument("--models", type=int, default=1)
+    args = parser.parse_args()
+
+    async with AsyncSessionLocal() as db:
+        user = User(email=f"bench-{uuid.uuid4().hex[:8]}@example.com")
+        db.add(user)
+        await db.flush()
+        search = Search(user_id=user.id, query="benchmark")
+        db.add(search)
+        await db.commit()
+
+    rows = args.tweets * max(args.models, 1)
+    try:
+        await seed(search.id, args.tweets, args.models)
+
+        print("=" * 60)
+        print(f"Exporting {rows} rows ({args.tweets} tweets x {args.models} models)")
+        print("=" * 60)
+
+        variants = [
+            ("Buffered CSV", lambda: buffered_csv(search.id)),
+            ("Streaming CSV", lambda: stream_export(engine, search.id, "csv")),
+            ("Streaming NDJSON", lambda: stream_export(engine, search.id, "ndjson")),
+            ("Streaming CSV+gzip", lambda: stream_export(engine, search.id, "csv", compress=True)),
+        ]
+        for name, body in variants:
+            first, elapsed, size = await measure(body())
+            peak = await peak_memory(body())
+            print(
+                f"{name:<20} TTFB {first * 1000:7.1f} ms  {rows / elapsed:>9,.0f} rows/s  "
+                f"{size / elapsed / 2 ** 20:6.1f} MB/s  peak {peak / 2 ** 20:7.1f} MB"
+            )
+    finally:
+        await delete_user_data(user.id)
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
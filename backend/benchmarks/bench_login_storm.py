@@ -0,0 +1,89 @@
+"""
+Benchmark: latency of an unrelated endpoint (/health) during a login storm,
+with bcrypt on the event loop vs on the hashing pool
+
+Runs the app in-process against the database in DATABASE_URL:
+
+    python -m benchmarks.bench_login_storm --logins 16 --seconds 5
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+
+import httpx
+from sqlalchemy import delete
+
+from app.core import security
+from app.core.config import settings
+from app.db.models import User
+from app.db.session import AsyncSessionLocal, engine
+from app.main import app
+
+
+async def storm(client: httpx.AsyncClient, credentials: dict, logins: int, seconds: float) -> dict:
+    deadline = time.perf_counter() + seconds
+    statuses: dict = {}
+    latencies: list[float] = []
+
+    async def login_loop():
+        while time.perf_counter() < deadline:
+            response = await client.post("/api/v1/auth/login", json=credentials)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    async def probe_loop():
+        # Measured from when the probe should have fired, so time spent
+        # waiting for a blocked event loop counts too
+        while time.perf_counter() < deadline:
+            due = time.perf_counter() + 0.01
+            await asyncio.sleep(0.01)
+            await client.get("/health")
+            latencies.append(time.perf_counter() - due)
+
+    await asyncio.gather(probe_loop(), *(login_loop() for _ in range(logins)))
+    latencies.sort()
+    return {
+        "statuses": statuses,
+        "p50": statistics.median(latencies) * 1000,
+        "p99": latencies[min(int(len(latencies) * 0.99), len(latencies) - 1)] * 1000,
+        "probes": len(latencies),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=16, help="Concurrent login loops")
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args()
+    engine.echo = False
+
+    credentials = {"email": f"bench-{uuid.uuid4().hex[:8]}@example.com", "password": "benchmark-password"}
+    async with AsyncSessionLocal() as db:
+        user = User(email=credentials["email"], password_hash=security.get_password_hash(credentials["password"]))
+        db.add(user)
+        await db.commit()
+        user_id = user.id
+
+    print("=" * 60)
+    print(f"/health during {args.logins} concurrent login loops for {args.seconds}s "
+          f"(bcrypt cost {settings.BCRYPT_ROUNDS})")
+    print("=" * 60)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        try:
+            for label, workers in (("On event loop", 0), (f"Pool ({settings.PASSWORD_HASH_WORKERS} threads)", settings.PASSWORD_HASH_WORKERS)):
+                security.password_hashing_pool = security.PasswordHashingPool(workers, settings.PASSWORD_HASH_MAX_PENDING)
+                result = await storm(client, credentials, args.logins, args.seconds)
+                print(f"{label:<20} p50 {result['p50']:8.1f}ms  p99 {result['p99']:8.1f}ms  "
+                      f"({result['probes']} probes, logins by status {result['statuses']})")
+        finally:
+            async with AsyncSessionLocal() as db:
+                await db.execute(delete(User).where(User.id == user_id))
+                await db.commit()
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
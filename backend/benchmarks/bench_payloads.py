@@ -0,0 +1,198 @@
+"""
+Benchmark: raw tweet payloads inline (JSON column) vs compressed in tweet_payloads
+
+Compares payload compression codecs on synthetic API payloads, then loads
+--tweets rows into two temporary layouts and measures table size and the
+time to scan the hot columns and to fetch whole rows:
+
+    python -m benchmarks.bench_payloads --tweets 100000
+"""
+import argparse
+import asyncio
+import json
+import random
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import text
+
+from app.db.payloads import DICTIONARY_SUFFIX, PayloadCodec, train_dictionary, zstandard
+from app.db.session import engine
+
+WORDS = (
+    "market launch update price team game vote city storm release stream fans "
+    "policy report crypto model chip phone movie season energy climate rally"
+).split()
+
+
+def make_payload(i: int, rng: random.Random) -> dict:
+    """Something shaped like a Twitter API v2 tweet with its expanded author"""
+    words = rng.choices(WORDS, k=rng.randint(8, 30))
+    tags = rng.sample(WORDS, 2)
+    author_id = str(rng.randint(10 ** 8, 10 ** 12))
+    created = datetime(2026, 10, 1) + timedelta(seconds=rng.randint(0, 30 * 86400))
+    return {
+        "id": str(1_700_000_000_000_000_000 + i),
+        "text": " ".join(words) + " " + " ".join(f"#{tag}" for tag in tags),
+        "author_id": author_id,
+        "conversation_id": str(1_700_000_000_000_000_000 + rng.randint(0, i + 1)),
+        "created_at": created.isoformat() + ".000Z",
+        "lang": rng.choice(["en", "en", "en", "es", "fr"]),
+        "possibly_sensitive": False,
+        "reply_settings": "everyone",
+        "source": rng.choice(["Twitter for iPhone", "Twitter for Android", "Twitter Web App"]),
+        "edit_history_tweet_ids": [str(1_700_000_000_000_000_000 + i)],
+        "public_metrics": {
+            "retweet_count": rng.randint(0, 500), "reply_count": rng.randint(0, 80),
+            "like_count": rng.randint(0, 5000), "quote_count": rng.randint(0, 40),
+            "impression_count": rng.randint(100, 200_000),
+        },
+        "entities": {
+            "hashtags": [{"start": 10 * n, "end": 10 * n + len(tag) + 1, "tag": tag} for n, tag in enumerate(tags)],
+            "urls": [{
+                "start": 0, "end": 23, "url": f"https://t.co/{uuid.UUID(int=rng.getrandbits(128)).hex[:10]}",
+                "expanded_url": f"https://example.com/{rng.choice(WORDS)}/{rng.randint(1, 99999)}",
+                "display_url": f"example.com/{rng.choice(WORDS)}/…",
+            }],
+        },
+        "context_annotations": [{
+            "domain": {"id": "66", "name": "Interests and Hobbies Category", "description": "A grouping of interests and hobbies entities"},
+            "entity": {"id": str(rng.randint(10 ** 17, 10 ** 18)), "name": rng.choice(WORDS).title()},
+        }],
+        "author": {
+            "id": author_id,
+            "name": f"{rng.choice(WORDS).title()} {rng.choice(WORDS).title()}",
+            "username": f"{rng.choice(WORDS)}{rng.randint(1, 9999)}",
+            "verified": rng.random() < 0.05,
+            "description": " ".join(rng.choices(WORDS, k=rng.randint(0, 20))),
+            "location": rng.choice(["", "New York, NY", "London", "Berlin", "Lagos"]),
+            "profile_image_url": f"https://pbs.twimg.com/profile_images/{rng.randint(10 ** 17, 10 ** 18)}/photo_normal.jpg",
+            "public_metrics": {
+                "followers_count": rng.randint(0, 10 ** 6), "following_count": rng.randint(0, 5000),
+                "tweet_count": rng.randint(0, 10 ** 5), "listed_count": rng.randint(0, 500),
+            },
+        },
+    }
+
+
+def bench_codecs(payloads: list[dict], train_size: int, dictionary_dir: str) -> None:
+    sample = payloads[train_size:]
+    raw_size = sum(len(json.dumps(payload, separators=(",", ":"))) for payload in sample)
+    codecs = [("zlib", PayloadCodec("zlib", dictionary_dir=None))]
+    if zstandard is not None:
+        codecs.append(("zstd", PayloadCodec("zstd", dictionary_dir=None)))
+        dictionary = train_dictionary(payloads[:train_size])
+        (Path(dictionary_dir) / f"{dictionary.dict_id()}{DICTIONARY_SUFFIX}").write_bytes(dictionary.as_bytes())
+        codecs.append(("zstd + dictionary", PayloadCodec("zstd", dictionary_dir=dictionary_dir)))
+
+    print(f"{'JSON':<20} {raw_size / len(sample):8.0f} B/payload")
+    for name, codec in codecs:
+        start = time.perf_counter()
+        encoded = [codec.encode(payload) for payload in sample]
+        encode_time = time.perf_counter() - start
+        start = time.perf_counter()
+        for codec_name, data in encoded:
+            codec.decode(codec_name, data)
+        decode_time = time.perf_counter() - start
+        size = sum(len(data) for _, data in encoded)
+        print(
+            f"{name:<20} {size / len(sample):8.0f} B/payload  {raw_size / size:5.2f}x  "
+            f"encode {encode_time / len(sample) * 1e6:6.1f} us  decode {decode_time / len(sample) * 1e6:6.1f} us"
+        )
+
+
+async def best_of(conn, sql: str, repeats: int) -> float:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        await conn.execute(text(sql))
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+async def bench_tables(payloads: list[dict], repeats: int, codec: PayloadCodec) -> None:
+    hot_rows, inline_rows, payload_rows = [], [], []
+    for payload in payloads:
+        tweet_pk = uuid.uuid4()
+        hot = (
+            tweet_pk, payload["id"], payload["text"], payload["author"]["username"], payload["author"]["name"],
+            datetime.fromisoformat(payload["created_at"][:19]), payload["public_metrics"]["retweet_count"],
+            payload["public_metrics"]["like_count"], payload["public_metrics"]["reply_count"],
+            payload["author"]["verified"], payload["author"]["location"] or None, datetime.utcnow(),
+        )
+        hot_rows.append(hot)
+        inline_rows.append(hot + (json.dumps(payload),))
+        payload_rows.append((tweet_pk, *codec.encode(payload)))
+    hot_columns = [
+        "id", "tweet_id", "text", "author_username", "author_name", "created_at_twitter",
+        "retweet_count", "like_count", "reply_count", "is_verified", "location", "created_at",
+    ]
+
+    async with engine.execution_options(isolation_level="AUTOCOMMIT").connect() as conn:
+        await conn.execute(text("CREATE TEMP TABLE bench_inline (LIKE tweets INCLUDING DEFAULTS, raw_data json)"))
+        await conn.execute(text("CREATE TEMP TABLE bench_hot (LIKE tweets INCLUDING DEFAULTS)"))
+        await conn.execute(text("CREATE TEMP TABLE bench_payloads (LIKE tweet_payloads INCLUDING DEFAULTS)"))
+        raw = (await conn.get_raw_connection()).driver_connection
+        await raw.copy_records_to_table("bench_inline", records=inline_rows, columns=hot_columns + ["raw_data"])
+        await raw.copy_records_to_table("bench_hot", records=hot_rows, columns=hot_columns)
+        await raw.copy_records_to_table("bench_payloads", records=payload_rows, columns=["tweet_id", "codec", "data"])
+        for table in ("bench_inline", "bench_hot", "bench_payloads"):
+            await conn.execute(text(f"VACUUM ANALYZE {table}"))
+
+        sizes = {}
+        for table in ("bench_inline", "bench_hot", "bench_payloads"):
+            heap, total = (await conn.execute(text(
+                f"SELECT pg_relation_size('{table}'), pg_total_relation_size('{table}')"
+            ))).one()
+            sizes[table] = (heap, total)
+        mb = 1024 * 1024
+        print(f"{'':<28} {'heap':>9} {'total':>9}")
+        print(f"{'tweets with raw_data':<28} {sizes['bench_inline'][0] / mb:8.1f}M {sizes['bench_inline'][1] / mb:8.1f}M")
+        print(f"{'tweets (hot columns)':<28} {sizes['bench_hot'][0] / mb:8.1f}M {sizes['bench_hot'][1] / mb:8.1f}M")
+        print(f"{'tweet_payloads':<28} {sizes['bench_payloads'][0] / mb:8.1f}M {sizes['bench_payloads'][1] / mb:8.1f}M")
+        combined = sizes["bench_hot"][1] + sizes["bench_payloads"][1]
+        print(f"{'  together':<28} {'':>9} {combined / mb:8.1f}M  ({sizes['bench_inline'][1] / combined:.2f}x smaller)")
+
+        scan = "SELECT count(*), sum(like_count), avg(length(text)) FROM {}"
+        fetch = "SELECT * FROM {} ORDER BY created_at_twitter LIMIT 20000"
+        print()
+        for label, sql in (("Scan hot columns", scan), ("Fetch 20k full rows", fetch)):
+            inline = await best_of(conn, sql.format("bench_inline"), repeats)
+            hot = await best_of(conn, sql.format("bench_hot"), repeats)
+            print(f"{label:<20} inline {inline * 1000:8.1f} ms   side table {hot * 1000:8.1f} ms  ({inline / hot:.2f}x)")
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tweets", type=int, default=100000)
+    parser.add_argument("--train", type=int, default=2000, help="Payloads used to train the zstd dictionary")
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    payloads = [make_payload(i, rng) for i in range(args.tweets)]
+
+    sample = payloads[:args.train + 20000]
+    print("=" * 60)
+    print(f"Compressing {len(sample) - args.train} payloads (dictionary trained on {args.train})")
+    print("=" * 60)
+    with tempfile.TemporaryDirectory() as dictionary_dir:
+        bench_codecs(sample, args.train, dictionary_dir)
+        codec = PayloadCodec(dictionary_dir=dictionary_dir)
+
+        print()
+        print("=" * 60)
+        print(f"{args.tweets} tweets, raw_data inline vs tweet_payloads ({codec.codec}"
+              f"{' + dictionary' if codec.dictionary_id else ''})")
+        print("=" * 60)
+        try:
+            await bench_tables(payloads, args.repeats, codec)
+        finally:
+            await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
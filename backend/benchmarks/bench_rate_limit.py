@@ -0,0 +1,66 @@
+"""
+Benchmark: per-request overhead of RateLimitMiddleware (in-memory backend)
+
+Calls the middleware directly around a no-op ASGI app, so only the limiter
+is measured:
+
+    python -m benchmarks.bench_rate_limit --requests 200000 --users 1000
+"""
+import argparse
+import asyncio
+import time
+
+from app.core.rate_limit import InMemoryBackend, RateLimitMiddleware
+from app.core.security import create_access_token
+
+
+async def noop_app(scope, receive, send):
+    pass
+
+
+async def run(app, scopes: list[dict], requests: int) -> float:
+    async def send(message):
+        pass
+
+    start = time.perf_counter()
+    for i in range(requests):
+        await app(scopes[i % len(scopes)], None, send)
+    return time.perf_counter() - start
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=200000)
+    parser.add_argument("--users", type=int, default=1000)
+    args = parser.parse_args()
+
+    scopes = []
+    for i in range(args.users):
+        token = create_access_token(data={"sub": f"bench-user-{i}", "tier": "pro"})
+        scopes.append({
+            "type": "http",
+            "path": "/api/v1/searches/",
+            "headers": [(b"host", b"bench"), (b"authorization", f"Bearer {token}".encode())],
+            "client": (f"10.0.{i // 256}.{i % 256}", 1234),
+        })
+    anonymous = [{**scope, "headers": [(b"host", b"bench")]} for scope in scopes]
+
+    # Limits high enough that nothing is rejected; rejection is cheaper than passing through
+    limiter = RateLimitMiddleware(noop_app, InMemoryBackend())
+    limiter.limits = {tier: 10 ** 9 for tier in limiter.limits}
+    limiter.anonymous_limit = 10 ** 9
+
+    print("=" * 60)
+    print(f"{args.requests} requests over {args.users} clients")
+    print("=" * 60)
+
+    baseline = await run(noop_app, scopes, args.requests)
+    for label, requests_scopes in (("Authenticated", scopes), ("Anonymous (per IP)", anonymous)):
+        await run(limiter, requests_scopes, len(requests_scopes))  # Warm the token cache
+        elapsed = await run(limiter, requests_scopes, args.requests)
+        overhead_us = (elapsed - baseline) / args.requests * 1e6
+        print(f"{label:<20} {overhead_us:8.2f} us/request overhead")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,61 @@
+"""
+Benchmark: concurrent scoring with and without registry micro-batching
+
+--callers concurrent callers (searches being analyzed at once) each score
+--requests small batches of --batch-size tweets, first with one score_batch
+call per request, then through the registry's micro-batcher:
+
+    python -m benchmarks.bench_registry --callers 32 --batch-size 50
+"""
+import argparse
+import asyncio
+import time
+
+from app.ml.registry import ModelRegistry
+from app.ml.vader import VaderScorer
+from benchmarks.bench_vader import make_tweets
+
+
+async def run_callers(scorer, tweets: list[str], callers: int, requests: int, batch_size: int) -> float:
+    async def caller(n: int) -> None:
+        for r in range(requests):
+            offset = ((n * requests + r) * batch_size) % (len(tweets) - batch_size)
+            await scorer.score(tweets[offset:offset + batch_size])
+
+    start = time.perf_counter()
+    await asyncio.gather(*(caller(n) for n in range(callers)))
+    return time.perf_counter() - start
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--callers", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--max-batch", type=int, default=2048)
+    parser.add_argument("--max-wait-ms", type=float, default=2.0)
+    args = parser.parse_args()
+
+    tweets = make_tweets(50000)
+    total = args.callers * args.requests * args.batch_size
+
+    print("=" * 60)
+    print(f"{args.callers} callers x {args.requests} requests of {args.batch_size} tweets")
+    print("=" * 60)
+
+    scorer = VaderScorer()
+    scorer.score_batch(tweets[:100])  # Warm up
+    elapsed = await run_callers(scorer, tweets, args.callers, args.requests, args.batch_size)
+    print(f"{'one call per request':<28} {elapsed:7.2f}s  {total / elapsed:>10,.0f} tweets/sec  "
+          f"{args.callers * args.requests} calls")
+
+    registry = ModelRegistry(max_batch_size=args.max_batch, max_wait_ms=args.max_wait_ms)
+    registry.register("vader", lambda: scorer)
+    model = registry.get("vader")
+    elapsed = await run_callers(model, tweets, args.callers, args.requests, args.batch_size)
+    print(f"{'micro-batched':<28} {elapsed:7.2f}s  {total / elapsed:>10,.0f} tweets/sec  "
+          f"{model.batcher.calls} calls")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,90 @@
+"""
+Benchmark: tweet source throughput
+
+Fetches --tweets tweets from HttpTweetSource against an in-process API that
+answers each page after --latency ms, sequentially (one window, no
+prefetch) and with concurrent windows and prefetch, then replays the same
+tweets from an NDJSON fixture. Needs no network or database:
+
+    python -m benchmarks.bench_sources --tweets 20000 --latency 80
+"""
+import argparse
+import asyncio
+import json
+import tempfile
+import time
+from contextlib import aclosing
+from pathlib import Path
+
+import httpx
+
+from app.sources.api import HttpTweetSource
+from app.sources.replay import ReplayTweetSource
+
+
+def fake_api(pages_per_window: int, page_size: int, latency: float) -> httpx.MockTransport:
+    async def handler(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(latency)
+        window = request.url.params.get("start_time", "all")
+        page = int(request.url.params.get("next_token", "0"))
+        body = {
+            "data": [
+                {"id": f"{window}-{page}-{i}", "text": f"tweet {page} {i} about the launch", "author_id": str(i % 50),
+                 "created_at": "2026-10-01T12:00:00.000Z", "public_metrics": {"like_count": i, "retweet_count": 0}}
+                for i in range(page_size)
+            ],
+            "includes": {"users": [{"id": str(i), "username": f"user{i}", "name": f"User {i}"} for i in range(50)]},
+            "meta": {"next_token": str(page + 1)} if page + 1 < pages_per_window else {},
+        }
+        return httpx.Response(200, json=body)
+
+    return httpx.MockTransport(handler)
+
+
+async def drain(source) -> tuple[list[dict], float]:
+    start = time.perf_counter()
+    tweets = []
+    async with aclosing(source.stream("launch", "7d")) as pages:
+        async for page in pages:
+            tweets.extend(page)
+    await source.close()
+    return tweets, time.perf_counter() - start
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tweets", type=int, default=20000)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=80.0, help="Milliseconds per API response")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--prefetch", type=int, default=4)
+    args = parser.parse_args()
+
+    pages = max(1, args.tweets // args.page_size)
+    latency = args.latency / 1000
+
+    print("=" * 60)
+    print(f"HTTP source: {pages} pages of {args.page_size}, {args.latency:.0f} ms per response")
+    print("=" * 60)
+    variants = [("sequential", 1, 1), (f"{args.concurrency} windows, prefetch {args.prefetch}", args.concurrency, args.prefetch)]
+    for label, concurrency, prefetch in variants:
+        source = HttpTweetSource(
+            url="https://api.test/search", page_size=args.page_size, concurrency=concurrency,
+            prefetch_pages=prefetch, transport=fake_api(max(1, pages // concurrency), args.page_size, latency),
+        )
+        recorded, elapsed = await drain(source)
+        print(f"{label:<28} {len(recorded):7d} tweets  {elapsed:7.2f} s  {len(recorded) / elapsed:9.0f} tweets/s")
+
+    print()
+    print("=" * 60)
+    print(f"Replay source: {len(recorded)} recorded tweets")
+    print("=" * 60)
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "launch.ndjson"
+        path.write_text("".join(json.dumps(tweet) + "\n" for tweet in recorded))
+        replayed, elapsed = await drain(ReplayTweetSource(str(path), page_size=args.page_size))
+        print(f"{'replay':<28} {len(replayed):7d} tweets  {elapsed:7.2f} s  {len(replayed) / elapsed:9.0f} tweets/s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
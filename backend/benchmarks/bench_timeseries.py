@@ -0,0 +1,111 @@
+"""
+Benchmark: hourly trend query, GROUP BY over tweets/sentiments vs sentiment_rollups
+
+Seeds one search with --tweets tweets spread over --days days (through the
+bulk writer, so rollups are maintained as the rows are written) and times
+both ways of reading the hourly series:
+
+    python -m benchmarks.bench_timeseries --tweets 200000 --days 30
+"""
+import argparse
+import asyncio
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, select
+
+from app.db.bulk import BulkWriter
+from app.db.models import Search, SearchTweet, Sentiment, SentimentRollup, Tweet, User
+from app.db.session import AsyncSessionLocal, engine
+from benchmarks.bench_bulk_writer import delete_user_data, make_tweets, sentiment_values
+
+
+async def seed(search_id, tweets: int, days: int, rollups: bool) -> float:
+    run = uuid.uuid4().hex[:8]
+    start_time = datetime(2026, 1, 1)
+    step = timedelta(days=days) / tweets
+    start = time.perf_counter()
+    async with BulkWriter(engine, rollups=rollups) as writer:
+        for offset in range(0, tweets, 10000):
+            rows = make_tweets(min(10000, tweets - offset), f"{run}-{offset}")
+            for i, values in enumerate(rows, start=offset):
+                tweet_pk = writer.add_tweet({**values, "created_at_twitter": start_time + i * step}, search_id)
+                writer.add_sentiment({"tweet_id": tweet_pk, **sentiment_values(0, i)})
+            await writer.flush()
+    return time.perf_counter() - start
+
+
+def raw_query(search_id):
+    hour = func.date_trunc("hour", Tweet.created_at_twitter)
+    return (
+        select(
+            hour,
+            func.count(),
+            func.count().filter(Sentiment.sentiment_label == "positive"),
+            func.count().filter(Sentiment.sentiment_label == "negative"),
+            func.count().filter(Sentiment.sentiment_label == "neutral"),
+        )
+        .select_from(SearchTweet)
+        .join(Tweet, Tweet.id == SearchTweet.tweet_id)
+        .join(Sentiment, Sentiment.tweet_id == Tweet.id)
+        .where(SearchTweet.search_id == search_id, Tweet.created_at_twitter.isnot(None))
+        .group_by(hour)
+        .order_by(hour)
+    )
+
+
+def rollup_query(search_id):
+    return (
+        select(SentimentRollup)
+        .where(SentimentRollup.search_id == search_id, SentimentRollup.granularity == "1h")
+        .order_by(SentimentRollup.bucket_start)
+    )
+
+
+async def best_of(stmt, repeats: int) -> tuple[float, int]:
+    best = float("inf")
+    rows = 0
+    for _ in range(repeats):
+        async with AsyncSessionLocal() as db:
+            start = time.perf_counter()
+            rows = len((await db.execute(stmt)).all())
+            best = min(best, time.perf_counter() - start)
+    return best, rows
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tweets", type=int, default=200000)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    async with AsyncSessionLocal() as db:
+        user = User(email=f"bench-{uuid.uuid4().hex[:8]}@example.com")
+        db.add(user)
+        await db.flush()
+        plain, rolled = Search(user_id=user.id, query="benchmark"), Search(user_id=user.id, query="benchmark")
+        db.add_all([plain, rolled])
+        await db.commit()
+
+    try:
+        print("=" * 60)
+        print(f"{args.tweets} tweets over {args.days} days, hourly series")
+        print("=" * 60)
+        without = await seed(plain.id, args.tweets, args.days, rollups=False)
+        with_rollups = await seed(rolled.id, args.tweets, args.days, rollups=True)
+        print(f"{'Write, no rollups':<22} {without:8.2f}s")
+        print(f"{'Write, with rollups':<22} {with_rollups:8.2f}s  ({(with_rollups / without - 1) * 100:+.1f}%)")
+
+        raw, raw_rows = await best_of(raw_query(rolled.id), args.repeats)
+        rollup, rollup_rows = await best_of(rollup_query(rolled.id), args.repeats)
+        print(f"{'GROUP BY raw rows':<22} {raw * 1000:8.1f} ms  ({raw_rows} buckets)")
+        print(f"{'sentiment_rollups':<22} {rollup * 1000:8.1f} ms  ({rollup_rows} buckets)")
+    finally:
+        await delete_user_data(user.id)
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,61 @@
+"""
+Benchmark: vectorized VaderScorer vs the per-tweet reference implementation
+
+    python -m benchmarks.bench_vader --tweets 200000 --batch-size 5000
+"""
+import argparse
+import random
+import time
+
+from app.ml import lexicon
+from app.ml.vader import VaderScorer, score_text_reference
+
+FILLER = (
+    "the a to of and in is it that this for on with as was at by be are vote "
+    "people today policy government new just now all about more time one"
+).split()
+
+
+def make_tweets(n: int) -> list[str]:
+    rng = random.Random(42)
+    sentiment_words = list(lexicon.VALENCE) + list(lexicon.BOOSTERS) + list(lexicon.NEGATIONS)
+    tweets = []
+    for _ in range(n):
+        words = [
+            rng.choice(sentiment_words) if rng.random() < 0.25 else rng.choice(FILLER)
+            for _ in range(rng.randint(8, 30))
+        ]
+        tweets.append(" ".join(words) + ("!" if rng.random() < 0.3 else ""))
+    return tweets
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tweets", type=int, default=200000)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    args = parser.parse_args()
+
+    tweets = make_tweets(args.tweets)
+    scorer = VaderScorer()
+    scorer.score_batch(tweets[:100])  # Warm up
+
+    print("=" * 60)
+    print(f"Scoring {args.tweets} tweets (batch size {args.batch_size})")
+    print("=" * 60)
+
+    start = time.perf_counter()
+    for offset in range(0, len(tweets), args.batch_size):
+        scorer.score_batch(tweets[offset:offset + args.batch_size])
+    elapsed = time.perf_counter() - start
+    print(f"{'VaderScorer (batch)':<24} {elapsed:8.2f}s  {len(tweets) / elapsed:>10,.0f} tweets/sec")
+
+    sample = tweets[:20000]
+    start = time.perf_counter()
+    for text in sample:
+        score_text_reference(text)
+    elapsed = time.perf_counter() - start
+    print(f"{'Reference (per tweet)':<24} {elapsed:8.2f}s  {len(sample) / elapsed:>10,.0f} tweets/sec")
+
+
+if __name__ == "__main__":
+    main()
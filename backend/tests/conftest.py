@@ -0,0 +1,62 @@
+"""
+Shared fixtures
+
+`sqlite_engine` is a migrated-enough SQLite database for tests of database
+code that has a SQLite path (the bulk writer's INSERT fallback, the
+pipeline, deletes). The Postgres-only bits of the schema get SQLite
+stand-ins: TSVECTOR columns are TEXT and the functions used in computed
+columns and indexes are registered on every connection.
+"""
+import asyncio
+import re
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.pool import NullPool
+
+from app.db import models  # noqa: F401  (registers the tables)
+from app.db.session import Base
+
+
+@compiles(TSVECTOR, "sqlite")
+def _tsvector_as_text(element, compiler, **kw):
+    return "TEXT"
+
+
+def _regexp_replace(value, pattern, replacement, flags=""):
+    if value is None:
+        return None
+    return re.sub(pattern, replacement, value, count=0 if "g" in flags else 1)
+
+
+def _register_functions(dbapi_connection, connection_record):
+    dbapi_connection.create_function("to_tsvector", 2, lambda config, value: value, deterministic=True)
+    dbapi_connection.create_function("regexp_replace", 3, _regexp_replace, deterministic=True)
+    dbapi_connection.create_function("regexp_replace", 4, _regexp_replace, deterministic=True)
+    dbapi_connection.create_function("btrim", 1, lambda value: value.strip() if value is not None else None, deterministic=True)
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+
+@pytest.fixture
+def sqlite_engine(tmp_path):
+    # NullPool: tests run each scenario in its own asyncio.run, and connections must not outlive their loop
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'voxlens.db'}", poolclass=NullPool)
+    event.listen(engine.sync_engine, "connect", _register_functions)
+
+    async def create():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+    asyncio.run(create())
+    yield engine
+    asyncio.run(engine.dispose())
+
+
+@pytest.fixture
+def sqlite_sessions(sqlite_engine):
+    return async_sessionmaker(sqlite_engine, expire_on_commit=False)
@@ -0,0 +1,72 @@
+"""
+Streaming aggregates must match a one-shot computation, however they are split
+"""
+import random
+import statistics
+
+import pytest
+
+from app.ml.base import BatchScores
+from app.tasks.aggregation import SentimentAggregate
+
+LABELS = ["positive", "negative", "neutral"]
+
+
+def random_batch(rng: random.Random, size: int) -> BatchScores:
+    return BatchScores(
+        model_name="test",
+        sentiment_label=[rng.choice(LABELS) for _ in range(size)],
+        confidence_score=[rng.random() for _ in range(size)],
+        is_sarcastic=[rng.random() < 0.1 for _ in range(size)],
+        emotions=[
+            {"joy": rng.random(), "anger": rng.random()} if rng.random() < 0.8 else None
+            for _ in range(size)
+        ],
+    )
+
+
+def test_merged_partials_match_single_aggregate():
+    rng = random.Random(3)
+    batches = [random_batch(rng, rng.randint(1, 200)) for _ in range(30)]
+
+    single = SentimentAggregate()
+    for batch in batches:
+        single.add_batch(len(batch), batch)
+
+    # Two "workers" each take every other batch, then ship their state as JSON
+    partials = [SentimentAggregate(), SentimentAggregate()]
+    for i, batch in enumerate(batches):
+        partials[i % 2].add_batch(len(batch), batch)
+    merged = SentimentAggregate.from_dict(partials[0].to_dict())
+    merged.merge(SentimentAggregate.from_dict(partials[1].to_dict()))
+
+    assert merged.total_tweets == single.total_tweets
+    assert merged.sentiment_summary() == single.sentiment_summary()
+    assert merged.emotions.keys() == single.emotions.keys()
+    for emotion, moments in single.emotions.items():
+        assert merged.emotions[emotion].count == moments.count
+        assert merged.emotions[emotion].mean == pytest.approx(moments.mean)
+        assert merged.emotions[emotion].variance == pytest.approx(moments.variance)
+
+
+def test_emotion_moments_match_statistics():
+    rng = random.Random(5)
+    batch = random_batch(rng, 500)
+    aggregate = SentimentAggregate()
+    aggregate.add_batch(len(batch), batch)
+
+    joy = [emotions["joy"] for emotions in batch.emotions if emotions]
+    stats = aggregate.emotion_stats()["joy"]
+    assert stats["count"] == len(joy)
+    assert stats["mean"] == pytest.approx(statistics.fmean(joy), abs=1e-4)
+    assert stats["std"] == pytest.approx(statistics.pstdev(joy), abs=1e-4)
+    # The summary clients read is the mean per emotion
+    assert aggregate.emotion_summary()["joy"] == stats["mean"]
+
+
+def test_empty_aggregate():
+    aggregate = SentimentAggregate()
+    aggregate.add_batch(10)
+    assert aggregate.total_tweets == 10
+    assert aggregate.sentiment_summary() is None
+    assert aggregate.emotion_summary() is None and aggregate.emotion_stats() is None
@@ -0,0 +1,122 @@
+"""
+Alert thresholds are percentage-point moves of any sentiment share; one
+scheduler cycle analyzes each due topic once and checks all its subscribers
+"""
+import asyncio
+from collections import Counter
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from sqlalchemy import select
+
+from app.api.v1.searches import get_searches
+from app.core.config import settings
+from app.db.models import SavedSearch, Search, User
+from app.tasks import alerts, worker
+from app.tasks.aggregation import SentimentAggregate
+from app.tasks.alerts import AlertScheduler, is_triggered, sentiment_shift
+
+BEFORE = {"positive": 45.0, "negative": 30.0, "neutral": 25.0, "sarcastic": 5.0}
+
+
+def test_shift_is_the_largest_label_move():
+    after = {"positive": 30.0, "negative": 52.0, "neutral": 18.0, "sarcastic": 40.0}
+    # Sarcasm is not a sentiment share and doesn't count
+    assert sentiment_shift(BEFORE, after) == 22.0
+
+
+def test_no_shift_without_a_baseline():
+    assert sentiment_shift(None, BEFORE) is None
+    assert sentiment_shift(BEFORE, None) is None
+    assert not is_triggered(0.0, None)
+
+
+def test_threshold_is_inclusive_and_defaults():
+    assert is_triggered(15.0, 15.0)
+    assert not is_triggered(25.0, 15.0)
+    assert is_triggered(None, settings.ALERT_DEFAULT_THRESHOLD)
+    assert not is_triggered(None, settings.ALERT_DEFAULT_THRESHOLD - 0.1)
+
+
+class StubPipeline:
+    """Completes every search with the same summary, without fetching anything"""
+
+    def __init__(self, sessions, label_counts):
+        self.sessions = sessions
+        self.aggregate = SentimentAggregate(total_tweets=sum(label_counts.values()), label_counts=Counter(label_counts))
+        self.runs = []
+
+    async def run(self, search_id):
+        self.runs.append(search_id)
+        async with self.sessions() as db:
+            search = await db.get(Search, search_id)
+            search.status, search.completed_at = "completed", datetime.utcnow()
+            search.sentiment_summary = self.aggregate.sentiment_summary()
+            await db.commit()
+        return SimpleNamespace(aggregate=self.aggregate)
+
+
+def test_cycle_analyzes_each_topic_once(sqlite_engine, sqlite_sessions):
+    baseline = {"positive": 20.0, "negative": 60.0, "neutral": 20.0}
+    now = datetime.utcnow()
+
+    async def main():
+        async with sqlite_sessions() as db:
+            users = [User(email=f"alerts{i}@example.com") for i in range(3)]
+            db.add_all(users)
+            await db.flush()
+            saved = [
+                # One topic, two spellings
+                SavedSearch(user_id=users[0].id, query="Bitcoin", alert_enabled=True, alert_threshold=10.0,
+                            last_sentiment_summary=baseline, created_at=now - timedelta(days=2)),
+                SavedSearch(user_id=users[1].id, query="  bitcoin ", alert_enabled=True, alert_threshold=80.0,
+                            last_sentiment_summary=baseline, created_at=now - timedelta(days=1)),
+                # Checked recently, and alerts off
+                SavedSearch(user_id=users[2].id, query="ethereum", alert_enabled=True, last_checked=now),
+                SavedSearch(user_id=users[2].id, query="dogecoin", alert_enabled=False),
+            ]
+            db.add_all(saved)
+            await db.commit()
+
+        pipeline = StubPipeline(sqlite_sessions, {"positive": 3, "negative": 1})
+        events = []
+
+        async def notify(event):
+            events.append(event)
+
+        scheduler = AlertScheduler(pipeline, session_factory=sqlite_sessions, bind=sqlite_engine, notify=notify)
+        stats = await scheduler.run_cycle()
+        again = await scheduler.run_cycle()
+        async with sqlite_sessions() as db:
+            rows = {row.id: row for row in (await db.execute(select(SavedSearch))).scalars()}
+            analyzed = await db.get(Search, pipeline.runs[0])
+            history = await get_searches(
+                page=1, page_size=20, cursor=None, include_total=None, query=None, status_filter=None,
+                current_user=users[0], db=db,
+            )
+        return saved, stats, again, pipeline.runs, events, rows, analyzed, history
+
+    saved, stats, again, runs, events, rows, analyzed, history = asyncio.run(main())
+    assert (stats.topics, stats.analyses, stats.deferred, stats.checked, stats.triggered) == (1, 1, 0, 2, 1)
+    # Everything due was checked, so the next cycle has nothing to do
+    assert again.topics == 0 and len(runs) == 1
+    # Owned by the earliest subscriber, but not in their history
+    assert analyzed.user_id == saved[0].user_id and analyzed.query == "Bitcoin"
+    assert analyzed.origin == "alert" and history["searches"] == [] and history["total"] == 0
+
+    (event,) = events
+    assert event.saved_search_id == saved[0].id and event.shift == 55.0
+    first, second, recent, disabled = (rows[search.id] for search in saved)
+    assert first.last_alert_at is not None and second.last_alert_at is None
+    assert first.last_sentiment_summary["positive"] == 75.0 == second.last_sentiment_summary["positive"]
+    assert recent.last_checked == now and disabled.last_checked is None
+
+
+def test_pipeline_is_built_on_first_use(monkeypatch):
+    built = []
+    monkeypatch.setattr(alerts, "AnalysisPipeline", lambda: built.append("alerts") or "pipeline")
+    monkeypatch.setattr(worker, "AnalysisPipeline", lambda: built.append("worker") or "pipeline")
+    scheduler, analysis_worker = AlertScheduler(), worker.AnalysisWorker()
+    assert built == []
+    assert scheduler.pipeline == analysis_worker.pipeline == "pipeline"
+    assert scheduler.pipeline == "pipeline" and built == ["alerts", "worker"]
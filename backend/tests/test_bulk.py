@@ -0,0 +1,191 @@
+"""
+BulkWriter on SQLite: the multi-row INSERT fallback, ON CONFLICT skips (also
+against another writer), and flushes that fail keeping their rows for the
+next one
+"""
+import asyncio
+import uuid
+from datetime import datetime
+
+import pytest
+from sqlalchemy import func, select
+
+from app.db.bulk import BulkWriter
+from app.db.models import Search, SearchTweet, Sentiment, SentimentRollup, Tweet, TweetPayload, User
+
+
+def tweet(tweet_id: str, hour: int = 9) -> dict:
+    return {
+        "tweet_id": tweet_id,
+        "text": f"tweet {tweet_id}",
+        "created_at_twitter": datetime(2026, 10, 1, hour, 15),
+        "raw_data": {"id": tweet_id, "lang": "en"},
+    }
+
+
+def sentiment(tweet_pk, label="positive") -> dict:
+    return {"tweet_id": tweet_pk, "model_name": "vader", "model_version": "1", "sentiment_label": label,
+            "confidence_score": 0.5, "emotions": {"joy": 0.5}}
+
+
+async def create_search(sessions, query="launch") -> uuid.UUID:
+    async with sessions() as db:
+        user = User(email=f"{query}-{uuid.uuid4().hex[:6]}@example.com")
+        db.add(user)
+        await db.flush()
+        search = Search(user_id=user.id, query=query, status="processing")
+        db.add(search)
+        await db.commit()
+        return search.id
+
+
+async def counts(sessions) -> tuple:
+    async with sessions() as db:
+        return tuple([
+            await db.scalar(select(func.count()).select_from(model))
+            for model in (Tweet, Sentiment, SearchTweet, TweetPayload)
+        ])
+
+
+def test_insert_fallback_writes_everything(sqlite_engine, sqlite_sessions):
+    async def main():
+        search_id = await create_search(sqlite_sessions)
+        async with BulkWriter(sqlite_engine, batch_size=1000, flush_interval=0) as writer:
+            assert not writer.use_copy
+            for i in range(25):
+                tweet_pk = writer.add_tweet(tweet(str(i), hour=9 + i % 2), search_id)
+                writer.add_sentiment(sentiment(tweet_pk, "positive" if i % 5 else "negative"))
+            assert writer.pending == 75
+        async with sqlite_sessions() as db:
+            hours = (await db.execute(
+                select(SentimentRollup.tweet_count, SentimentRollup.negative)
+                .where(SentimentRollup.granularity == "1h").order_by(SentimentRollup.bucket_start)
+            )).all()
+            payload = (await db.execute(select(TweetPayload))).scalars().first()
+        return writer, await counts(sqlite_sessions), hours, payload
+
+    writer, stored, hours, payload = asyncio.run(main())
+    assert stored == (25, 25, 25, 25)
+    assert (writer.tweets_written, writer.sentiments_written, writer.links_written, writer.pending) == (25, 25, 25, 0)
+    assert [tuple(row) for row in hours] == [(13, 3), (12, 2)]
+    assert payload.value["lang"] == "en"
+
+
+def test_on_conflict_skips_stored_tweets_and_their_sentiments(sqlite_engine, sqlite_sessions):
+    async def main():
+        search_id = await create_search(sqlite_sessions)
+        async with BulkWriter(sqlite_engine, flush_interval=0) as writer:
+            writer.add_sentiment(sentiment(writer.add_tweet(tweet("1"), search_id)))
+            assert await writer.flush() == 1
+            # Same tweet_id, new client-side id: skipped, and so are its sentiment and payload
+            writer.add_sentiment(sentiment(writer.add_tweet(tweet("1"), search_id), "negative"))
+            writer.add_sentiment(sentiment(writer.add_tweet(tweet("2"), search_id)))
+            assert await writer.flush() == 1
+        async with sqlite_sessions() as db:
+            labels = (await db.execute(
+                select(Tweet.tweet_id, Sentiment.sentiment_label).join(Sentiment).order_by(Tweet.tweet_id)
+            )).all()
+        return writer, await counts(sqlite_sessions), labels
+
+    writer, stored, labels = asyncio.run(main())
+    assert stored == (2, 2, 2, 2)
+    assert [tuple(row) for row in labels] == [("1", "positive"), ("2", "positive")]
+    assert writer.tweets_written == 2 and writer.sentiments_written == 2
+
+
+def test_tweet_lost_to_another_writer_is_linked_to_the_stored_row(sqlite_engine, sqlite_sessions):
+    async def main():
+        first, second = await create_search(sqlite_sessions, "first"), await create_search(sqlite_sessions, "second")
+        slow = BulkWriter(sqlite_engine, flush_interval=0)
+        lost = slow.add_tweet(tweet("1", hour=10), first)
+        slow.add_sentiment(sentiment(lost))
+        slow.add_sentiment(sentiment(slow.add_tweet(tweet("2", hour=10), first)))
+
+        # Another search stores tweet 1 between the slow writer's add and flush
+        async with BulkWriter(sqlite_engine, flush_interval=0) as fast:
+            fast.add_sentiment(sentiment(fast.add_tweet(tweet("1", hour=10), second)))
+        assert await slow.flush() == 1
+
+        async with sqlite_sessions() as db:
+            stored_id = await db.scalar(select(Tweet.id).where(Tweet.tweet_id == "1"))
+            links = (await db.execute(
+                select(SearchTweet.search_id, SearchTweet.tweet_id).where(SearchTweet.tweet_id == stored_id)
+            )).all()
+            hour = await db.scalar(
+                select(SentimentRollup.tweet_count)
+                .where(SentimentRollup.search_id == first, SentimentRollup.granularity == "1h")
+            )
+        return first, second, lost, stored_id, links, hour, await counts(sqlite_sessions)
+
+    first, second, lost, stored_id, links, hour, stored = asyncio.run(main())
+    assert stored_id != lost
+    assert sorted(search_id for search_id, _ in links) == sorted([first, second])
+    # One tweet 1 with one sentiment; the slow writer's copy and its sentiment are dropped
+    assert stored == (2, 2, 3, 2)
+    assert hour == 2
+
+
+class Outage:
+    """Wraps a writer method to fail its first `calls` calls"""
+
+    def __init__(self, method, calls: int = 1):
+        self.method = method
+        self.failures_left = calls
+
+    async def __call__(self, *args, **kwargs):
+        if self.failures_left:
+            self.failures_left -= 1
+            raise RuntimeError("connection reset")
+        return await self.method(*args, **kwargs)
+
+
+def test_failed_flush_keeps_its_rows(sqlite_engine, sqlite_sessions):
+    async def main():
+        search_id = await create_search(sqlite_sessions)
+        writer = BulkWriter(sqlite_engine, flush_interval=0)
+        # Fails after the tweets and sentiments are inserted, so the rollback matters
+        writer._upsert_rollups = Outage(writer._upsert_rollups)
+        for i in range(3):
+            writer.add_sentiment(sentiment(writer.add_tweet(tweet(str(i)), search_id)))
+        with pytest.raises(RuntimeError):
+            await writer.flush()
+        assert writer.pending == 9
+        assert await counts(sqlite_sessions) == (0, 0, 0, 0)
+
+        writer.add_sentiment(sentiment(writer.add_tweet(tweet("3"), search_id)))
+        assert await writer.flush() == 4
+        async with sqlite_sessions() as db:
+            day = await db.scalar(select(SentimentRollup.tweet_count).where(SentimentRollup.granularity == "1d"))
+        return writer, await counts(sqlite_sessions), day
+
+    writer, stored, day = asyncio.run(main())
+    assert stored == (4, 4, 4, 4) and day == 4
+    assert writer.pending == 0 and writer.tweets_written == 4
+
+
+def test_failed_background_flush_is_retried_on_exit(sqlite_engine, sqlite_sessions):
+    async def main():
+        search_id = await create_search(sqlite_sessions)
+        async with BulkWriter(sqlite_engine, batch_size=1000, flush_interval=0.01) as writer:
+            writer._insert_links = outage = Outage(writer._insert_links, calls=1000)
+            for i in range(3):
+                writer.add_tweet(tweet(str(i)), search_id)
+            await asyncio.sleep(0.05)  # Every background flush fails and logs
+            assert outage.failures_left < 1000 and writer.pending == 6
+            outage.failures_left = 0
+        return await counts(sqlite_sessions)
+
+    assert asyncio.run(main()) == (3, 0, 3, 3)
+
+
+def test_exit_raises_when_the_last_flush_fails(sqlite_engine, sqlite_sessions):
+    async def main():
+        search_id = await create_search(sqlite_sessions)
+        writer = BulkWriter(sqlite_engine, flush_interval=0)
+        writer._insert_links = Outage(writer._insert_links)
+        with pytest.raises(RuntimeError):
+            async with writer:
+                writer.add_tweet(tweet("1"), search_id)
+        return writer.pending, await counts(sqlite_sessions)
+
+    assert asyncio.run(main()) == (2, (0, 0, 0, 0))
@@ -0,0 +1,105 @@
+"""
+SentimentCache hands back the same scores as the model, emotion score arrays
+included, from memory, the file store and the database store, and only shares
+entries between texts the model can't tell apart
+"""
+import asyncio
+
+import numpy as np
+import pytest
+
+from app.ml.base import EMOTIONS, BatchScores, SentimentScorer
+from app.ml.cache import CacheStats, DatabaseCacheStore, FileCacheStore, SentimentCache
+from app.ml.registry import RegisteredModel
+from app.ml.vader import VaderScorer
+from app.tasks.aggregation import SentimentAggregate
+
+TEXTS = ["I love this launch", "terrible, terrible service", "Shipping on Tuesday", "RT @a: I love this launch"]
+
+
+def scorer() -> VaderScorer:
+    return VaderScorer(emotion_terms={"love": {"joy": 1.0}, "terrible": {"fear": 0.5, "anger": 0.25}})
+
+
+def assert_same_emotions(cached, direct):
+    assert cached.emotion_scores is not None and cached.emotion_scores.shape == (len(TEXTS), len(EMOTIONS))
+    # NaN rows (no emotion words) stay NaN
+    np.testing.assert_allclose(cached.emotion_scores, direct.emotion_scores, atol=1e-4)
+    assert [cached.emotions_at(i) for i in range(len(TEXTS))] == [direct.emotions_at(i) for i in range(len(TEXTS))]
+    summaries = []
+    for scores in (cached, direct):
+        aggregate = SentimentAggregate()
+        aggregate.add_batch(len(TEXTS), scores)
+        summaries.append(aggregate.emotion_stats())
+    assert summaries[0] == summaries[1]
+
+
+def test_memory_tier_keeps_emotion_scores():
+    model = scorer()
+    direct = model.score_batch(TEXTS)
+    assert direct.emotion_scores is not None
+
+    async def main():
+        cache, stats = SentimentCache(), CacheStats()
+        missed = await cache.score(model, TEXTS, stats)
+        hit = await cache.score(model, TEXTS, stats)
+        return missed, hit, stats
+
+    missed, hit, stats = asyncio.run(main())
+    # The retweet normalizes to the first text
+    assert (stats.model_calls, stats.misses, stats.memory_hits) == (3, 4, 4)
+    for cached in (missed, hit):
+        assert list(cached.sentiment_label) == list(direct.sentiment_label)
+        assert_same_emotions(cached, direct)
+
+
+@pytest.mark.parametrize("store_kind", ["file", "db"])
+def test_persistent_tiers_keep_emotion_scores(store_kind, tmp_path, sqlite_engine):
+    model = scorer()
+    direct = model.score_batch(TEXTS)
+
+    def store():
+        if store_kind == "file":
+            return FileCacheStore(str(tmp_path / "cache.db"))
+        return DatabaseCacheStore(sqlite_engine)
+
+    async def main():
+        await SentimentCache(store()).score(model, TEXTS[:2])
+        # A new process: empty memory tier, half the texts in the store
+        stats = CacheStats()
+        mixed = await SentimentCache(store()).score(model, TEXTS, stats)
+        return mixed, stats
+
+    mixed, stats = asyncio.run(main())
+    assert stats.store_hits == 3 and stats.model_calls == 1
+    assert_same_emotions(mixed, direct)
+
+
+class CasedScorer(SentimentScorer):
+    """Stand-in for a cased model that reads URLs: shouting is negative"""
+
+    model_name = "cased"
+
+    def score_batch(self, texts):
+        labels = ["negative" if text.isupper() or "bad.example" in text else "positive" for text in texts]
+        return BatchScores(model_name=self.model_name, sentiment_label=labels, confidence_score=[1.0] * len(texts))
+
+
+def test_cache_keys_follow_the_model_normalization():
+    texts = [
+        "GREAT LAUNCH", "great launch", "RT @a:  great\tlaunch",
+        "see https://good.example/x", "see https://bad.example/x",
+    ]
+
+    async def calls(model):
+        stats = CacheStats()
+        scores = await SentimentCache().score(model, texts, stats)
+        return list(scores.sentiment_label), stats.model_calls
+
+    labels, model_calls = asyncio.run(calls(RegisteredModel(CasedScorer(), max_batch_size=64, max_wait=0)))
+    # Case and URLs reach the model; whitespace and the RT prefix don't
+    assert labels == ["negative", "positive", "positive", "positive", "negative"]
+    assert model_calls == 4
+
+    _, model_calls = asyncio.run(calls(scorer()))
+    assert model_calls == 2  # vader ignores both
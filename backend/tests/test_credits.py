@@ -0,0 +1,109 @@
+"""
+Credit accounting. Charging one row in sequence runs on SQLite; the
+concurrency tests need a migrated Postgres database:
+
+    TEST_DATABASE_URL=postgresql+asyncpg://... pytest tests/test_credits.py
+"""
+import asyncio
+import os
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.core.config import settings
+from app.core.credits import consume_credit
+from app.db.models import User
+
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+
+needs_postgres = pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL is not set")
+
+
+async def add_user(sessions, credits: int, reset_date, tier: str = "free") -> User:
+    async with sessions() as db:
+        user = User(email=f"credits-{uuid.uuid4().hex[:8]}@example.com", tier=tier,
+                    credits_remaining=credits, credits_reset_date=reset_date)
+        db.add(user)
+        await db.commit()
+    return user
+
+
+async def with_user(credits: int, reset_date: datetime, check):
+    engine = create_async_engine(TEST_DATABASE_URL, pool_size=20, max_overflow=80)
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+    user = await add_user(sessions, credits, reset_date)
+    try:
+        await check(sessions, user.id)
+    finally:
+        async with sessions() as db:
+            await db.execute(delete(User).where(User.id == user.id))
+            await db.commit()
+        await engine.dispose()
+
+
+async def charge(sessions, user_id, amount: int = 1):
+    async with sessions() as db:
+        remaining = await consume_credit(db, user_id, amount)
+        await db.commit()
+        return remaining
+
+
+async def credits_of(sessions, user_id) -> int:
+    async with sessions() as db:
+        return (await db.execute(select(User.credits_remaining).where(User.id == user_id))).scalar_one()
+
+
+def test_charges_in_sequence(sqlite_sessions):
+    later = datetime.utcnow() + timedelta(days=10)
+
+    async def main():
+        user = await add_user(sqlite_sessions, 5, later)
+        assert await charge(sqlite_sessions, user.id, 3) == 2
+        assert await charge(sqlite_sessions, user.id, 3) is None  # Not enough, nothing charged
+        assert await charge(sqlite_sessions, user.id) == 1
+        assert await charge(sqlite_sessions, user.id) == 0
+        assert await charge(sqlite_sessions, user.id) is None
+        assert await credits_of(sqlite_sessions, user.id) == 0
+
+        # Reset due: the tier's allowance is granted first, then charged
+        async with sqlite_sessions() as db:
+            stored = await db.get(User, user.id)
+            stored.credits_reset_date = datetime.utcnow() - timedelta(days=1)
+            await db.commit()
+        assert await charge(sqlite_sessions, user.id, 2) == settings.FREE_TIER_CREDITS - 2
+        async with sqlite_sessions() as db:
+            assert (await db.get(User, user.id)).credits_reset_date > later
+        assert await charge(sqlite_sessions, user.id) == settings.FREE_TIER_CREDITS - 3
+
+        # Never reset before (NULL date) counts as due
+        pro = await add_user(sqlite_sessions, 0, None, tier="pro")
+        assert await charge(sqlite_sessions, pro.id) == settings.PRO_TIER_CREDITS - 1
+        assert await charge(sqlite_sessions, pro.id) == settings.PRO_TIER_CREDITS - 2
+
+    asyncio.run(main())
+
+
+@needs_postgres
+def test_no_overspend_under_parallel_requests():
+    async def check(sessions, user_id):
+        results = await asyncio.gather(*(charge(sessions, user_id) for _ in range(100)))
+        granted = [remaining for remaining in results if remaining is not None]
+        assert len(granted) == 30
+        assert sorted(granted) == list(range(30))
+        assert await credits_of(sessions, user_id) == 0
+
+    asyncio.run(with_user(30, datetime.utcnow() + timedelta(days=10), check))
+
+
+@needs_postgres
+def test_monthly_reset_happens_in_the_same_statement():
+    async def check(sessions, user_id):
+        assert await charge(sessions, user_id) == settings.FREE_TIER_CREDITS - 1
+        async with sessions() as db:
+            user = await db.get(User, user_id)
+            assert user.credits_reset_date > datetime.utcnow() + timedelta(days=29)
+
+    asyncio.run(with_user(0, datetime.utcnow() - timedelta(days=1), check))
@@ -0,0 +1,157 @@
+"""
+Coalescing of identical searches: keys, which searches can be shared within
+the freshness window, attaching, and deleting a search others are attached to
+"""
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import func, select
+
+from app.api.v1.searches import delete_search
+from app.core.config import settings
+from app.db.models import Search, SearchTweet, SentimentRollup, Tweet, User
+from app.tasks.dedup import attach_to, dedup_key, find_shared_result
+
+KEY = dedup_key("Product Launch", "7d")
+
+
+def test_dedup_key_normalizes_the_query():
+    assert dedup_key("  product   LAUNCH ", "7d") == KEY
+    assert dedup_key("product launch", "24h") != KEY
+    assert dedup_key("product launches", "7d") != KEY
+    assert len(KEY) == 64
+
+
+async def add_user(sessions, email="owner@example.com") -> User:
+    async with sessions() as db:
+        user = User(email=email)
+        db.add(user)
+        await db.commit()
+        return user
+
+
+async def add_search(sessions, user, **values) -> Search:
+    async with sessions() as db:
+        search = Search(user_id=user.id, query="product launch", dedup_key=KEY, **values)
+        db.add(search)
+        await db.commit()
+        return search
+
+
+async def shared_result(sessions) -> Search:
+    async with sessions() as db:
+        return await find_shared_result(db, KEY)
+
+
+def test_find_shared_result_within_the_window(sqlite_sessions):
+    now = datetime.utcnow()
+    window = timedelta(seconds=settings.SEARCH_DEDUP_WINDOW_SECONDS)
+
+    async def main():
+        user = await add_user(sqlite_sessions)
+        # Too old, failed, or attached to another search: never shared
+        await add_search(sqlite_sessions, user, status="completed", created_at=now - 2 * window,
+                         completed_at=now - window - timedelta(seconds=5))
+        await add_search(sqlite_sessions, user, status="processing", created_at=now - window - timedelta(seconds=5))
+        await add_search(sqlite_sessions, user, status="failed", created_at=now)
+        assert await shared_result(sqlite_sessions) is None
+
+        completed = await add_search(sqlite_sessions, user, status="completed", created_at=now - window,
+                                     completed_at=now - timedelta(seconds=30))
+        assert (await shared_result(sqlite_sessions)).id == completed.id
+
+        # The newest candidate wins; searches attached to it are not candidates themselves
+        running = await add_search(sqlite_sessions, user, status="processing", created_at=now - timedelta(seconds=10))
+        await add_search(sqlite_sessions, user, status="processing", created_at=now, shared_from_id=running.id)
+        assert (await shared_result(sqlite_sessions)).id == running.id
+
+    asyncio.run(main())
+
+
+def test_attach_to_copies_the_current_state():
+    canonical = Search(
+        query="product launch", status="completed", total_tweets=120, completed_at=datetime(2026, 10, 1, 12),
+        sentiment_summary={"positive": 50.0}, emotion_summary={"joy": 0.4}, entities={"brands": ["x"]},
+    )
+    canonical.id = "canonical-id"
+    search = Search(query="Product launch", status="pending")
+    attach_to(search, canonical)
+    assert search.shared_from_id == canonical.id
+    assert (search.status, search.total_tweets, search.completed_at) == ("completed", 120, canonical.completed_at)
+    assert search.sentiment_summary == canonical.sentiment_summary and search.entities == canonical.entities
+    assert search.result_source == "shared" and search.analysis_id == canonical.id
+    assert canonical.result_source == "fresh"
+
+
+async def add_analysis(sessions, owner, attached_users, status="completed"):
+    """A canonical search with two linked tweets and a rollup, and searches attached to it"""
+    canonical = await add_search(sessions, owner, status=status, completed_at=datetime.utcnow())
+    async with sessions() as db:
+        for tweet_id in ("1", "2"):
+            tweet = Tweet(tweet_id=tweet_id, text=f"tweet {tweet_id}")
+            db.add(tweet)
+            await db.flush()
+            db.add(SearchTweet(search_id=canonical.id, tweet_id=tweet.id))
+        db.add(SentimentRollup(search_id=canonical.id, granularity="1d", bucket_start=datetime(2026, 10, 1), tweet_count=2))
+        await db.commit()
+    attached = []
+    for user in attached_users:
+        search = Search(user_id=user.id, query="product launch", dedup_key=KEY)
+        attach_to(search, canonical)
+        async with sessions() as db:
+            db.add(search)
+            await db.commit()
+        attached.append(search)
+    return canonical, attached
+
+
+async def count(sessions, model, *where) -> int:
+    async with sessions() as db:
+        return await db.scalar(select(func.count()).select_from(model).where(*where))
+
+
+def test_deleting_the_canonical_search_hands_the_analysis_over(sqlite_sessions):
+    async def main():
+        owner = await add_user(sqlite_sessions)
+        others = [await add_user(sqlite_sessions, f"user{i}@example.com") for i in range(2)]
+        canonical, (first, second) = await add_analysis(sqlite_sessions, owner, others)
+        async with sqlite_sessions() as db:
+            await delete_search(canonical.id, owner, db)
+        async with sqlite_sessions() as db:
+            first, second = await db.get(Search, first.id), await db.get(Search, second.id)
+        return first, second, (
+            await count(sqlite_sessions, Tweet),
+            await count(sqlite_sessions, SearchTweet, SearchTweet.search_id == first.id),
+            await count(sqlite_sessions, SentimentRollup, SentimentRollup.search_id == first.id),
+        )
+
+    first, second, (tweets, links, rollups) = asyncio.run(main())
+    assert first.result_source == "fresh" and first.analysis_id == first.id
+    assert second.shared_from_id == first.id
+    assert (tweets, links, rollups) == (2, 2, 1)
+    assert first.status == "completed" and first.total_tweets == second.total_tweets
+
+
+def test_deleting_an_attached_search_keeps_the_analysis(sqlite_sessions):
+    async def main():
+        owner, other = await add_user(sqlite_sessions), await add_user(sqlite_sessions, "other@example.com")
+        canonical, (attached,) = await add_analysis(sqlite_sessions, owner, [other])
+        async with sqlite_sessions() as db:
+            await delete_search(attached.id, other, db)
+        return await count(sqlite_sessions, Tweet), await count(sqlite_sessions, SearchTweet)
+
+    assert asyncio.run(main()) == (2, 2)
+
+
+def test_a_running_search_with_attachments_cannot_be_deleted(sqlite_sessions):
+    async def main():
+        owner, other = await add_user(sqlite_sessions), await add_user(sqlite_sessions, "other@example.com")
+        canonical, _ = await add_analysis(sqlite_sessions, owner, [other], status="processing")
+        async with sqlite_sessions() as db:
+            with pytest.raises(HTTPException) as raised:
+                await delete_search(canonical.id, owner, db)
+        return raised.value.status_code, await count(sqlite_sessions, Search)
+
+    assert asyncio.run(main()) == (409, 2)
@@ -0,0 +1,68 @@
+"""
+Sparse emotion scoring matches a per-tweet lexicon lookup, and its arrays fold
+into the summary exactly like per-tweet emotion dicts
+"""
+import numpy as np
+
+from app.ml.base import EMOTIONS, BatchScores
+from app.ml.emotion import EmotionScorer
+from app.ml.text import tokenize
+from app.ml.vader import VaderScorer
+from app.tasks.aggregation import SentimentAggregate
+
+TERMS = {
+    "happy": {"joy": 0.8},
+    "furious": {"anger": 1.0},
+    "shocked": {"surprise": 0.6, "fear": 0.2},
+    "sad": {"sadness": 0.5},
+}
+TEXTS = [
+    "So happy today, happy happy!",
+    "I am furious and shocked",
+    "nothing to see here",
+    "",
+    "Sad. So SAD and furious",
+]
+
+
+def reference(text: str) -> list:
+    weights = dict.fromkeys(EMOTIONS, 0.0)
+    for token in tokenize(text):
+        for emotion, weight in TERMS.get(token, {}).items():
+            weights[emotion] += weight
+    total = sum(weights.values())
+    return [weights[emotion] / total for emotion in EMOTIONS] if total else [np.nan] * len(EMOTIONS)
+
+
+def test_matches_reference_with_nan_for_no_emotion():
+    scores = EmotionScorer(TERMS).score_batch(TEXTS)
+    assert scores.shape == (len(TEXTS), len(EMOTIONS))
+    np.testing.assert_allclose(scores, [reference(text) for text in TEXTS])
+    assert np.isnan(scores[2]).all() and np.isnan(scores[3]).all()
+    np.testing.assert_allclose(np.nansum(scores, axis=1)[[0, 1, 4]], 1.0)
+
+
+def test_summary_from_arrays_equals_summary_from_dicts():
+    scorer = VaderScorer(emotion_terms=TERMS)
+    scores = scorer.score_batch(TEXTS)
+    assert scores.emotion_scores is not None
+    dicts = [scores.emotions_at(i) for i in range(len(TEXTS))]
+    assert dicts[2] is None and dicts[0] == {"joy": 1.0, "anger": 0.0, "fear": 0.0, "surprise": 0.0, "sadness": 0.0}
+
+    from_arrays, from_dicts = SentimentAggregate(), SentimentAggregate()
+    from_arrays.add_batch(len(TEXTS), scores)
+    from_dicts.add_batch(len(TEXTS), BatchScores(
+        model_name="vader", sentiment_label=scores.sentiment_label,
+        confidence_score=scores.confidence_score, emotions=dicts,
+    ))
+    assert from_arrays.emotion_summary() == from_dicts.emotion_summary()
+    assert from_arrays.emotion_stats() == from_dicts.emotion_stats()
+    assert from_arrays.emotion_stats()["joy"]["count"] == 3
+
+
+def test_emotions_can_be_turned_off():
+    with_emotions = VaderScorer(emotion_terms=TERMS)
+    without = VaderScorer(emotions=False)
+    assert without.score_batch(TEXTS).emotion_scores is None
+    assert with_emotions.model_version != without.model_version
+    np.testing.assert_allclose(with_emotions.compound(TEXTS), without.compound(TEXTS))
@@ -0,0 +1,63 @@
+"""
+Export formatting: every row must survive a round trip through its format,
+and a streamed export reads the same rows on SQLite as on Postgres
+"""
+import asyncio
+import csv
+import gzip
+import io
+import json
+from datetime import datetime
+
+from app.db.models import Search, SearchTweet, Sentiment, Tweet, User
+from app.reports.export import FIELD_NAMES, format_csv, format_ndjson, stream_export
+
+ROWS = [
+    ("1", datetime(2026, 1, 2, 3, 4, 5), "alice", "Alice", 'said "hi",\nthen left', 3, 4, 5, True, None,
+     "vader", "1.0+abc", "positive", 0.9, False, None, '{"joy": 0.8, "anger": 0.1}'),
+    ("2", None, None, None, "no sentiment yet", 0, 0, 0, False, "Paris",
+     None, None, None, None, None, None, None),
+]
+
+
+def test_ndjson_lines_are_valid_json_with_emotions_spliced_in():
+    lines = format_ndjson(ROWS).splitlines()
+    first, second = (json.loads(line) for line in lines)
+    assert list(first) == FIELD_NAMES
+    assert first["created_at_twitter"] == "2026-01-02T03:04:05"
+    assert first["text"] == 'said "hi",\nthen left'
+    assert first["emotions"] == {"joy": 0.8, "anger": 0.1}
+    assert second["emotions"] is None and second["location"] == "Paris"
+
+
+def test_csv_round_trip_and_header_only_once():
+    text = format_csv(ROWS[:1], header=True) + format_csv(ROWS[1:])
+    records = list(csv.DictReader(io.StringIO(text)))
+    assert len(records) == 2
+    assert records[0]["text"] == 'said "hi",\nthen left'
+    assert json.loads(records[0]["emotions"]) == {"joy": 0.8, "anger": 0.1}
+    assert records[1]["sentiment_label"] == ""
+
+
+def test_stream_export_on_sqlite(sqlite_engine, sqlite_sessions):
+    async def main():
+        async with sqlite_sessions() as db:
+            user = User(email="export@example.com")
+            db.add(user)
+            await db.flush()
+            search = Search(user_id=user.id, query="export", status="completed")
+            db.add(search)
+            await db.flush()
+            for i in range(3):
+                tweet = Tweet(tweet_id=str(i), text=f"tweet {i}")
+                db.add(tweet)
+                await db.flush()
+                db.add(SearchTweet(search_id=search.id, tweet_id=tweet.id))
+                db.add(Sentiment(tweet_id=tweet.id, model_name="vader", sentiment_label="neutral"))
+            await db.commit()
+        chunks = [chunk async for chunk in stream_export(sqlite_engine, search.id, "csv", compress=True, chunk_rows=2)]
+        return b"".join(chunks)
+
+    records = list(csv.DictReader(io.StringIO(gzip.decompress(asyncio.run(main())).decode("utf-8"))))
+    assert sorted(record["tweet_id"] for record in records) == ["0", "1", "2"]
+    assert {record["sentiment_label"] for record in records} == {"neutral"}
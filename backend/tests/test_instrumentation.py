@@ -0,0 +1,31 @@
+from app.db.instrumentation import EngineMetrics, LatencyHistogram, normalize_sql
+
+
+def test_normalize_sql_collapses_literals_and_lists():
+    assert (
+        normalize_sql("SELECT a FROM t WHERE h IN ($1::BYTEA, $2::BYTEA) AND x = 'it''s'\n  LIMIT 10")
+        == "SELECT a FROM t WHERE h IN (...) AND x = ? LIMIT ?"
+    )
+    assert normalize_sql("INSERT INTO t (a, b) VALUES ($1, $2), ($3, $4), ($5, $6)") == (
+        "INSERT INTO t (a, b) VALUES (...)"
+    )
+
+
+def test_histogram_quantiles_use_bucket_bounds():
+    histogram = LatencyHistogram()
+    for elapsed_ms in [0.5] * 90 + [30.0] * 9 + [700.0]:
+        histogram.observe(elapsed_ms)
+    assert histogram.count == 100
+    assert histogram.quantile(0.5) == 1
+    assert histogram.quantile(0.95) == 50
+    assert histogram.quantile(1.0) == 700.0
+
+
+def test_statement_cap_folds_into_other():
+    metrics = EngineMetrics("test", max_statements=2, slow_query_ms=1e9)
+    for table in ("a", "b", "c", "d"):
+        metrics.observe_statement(f"SELECT * FROM {table} WHERE id = $1", 1.0)
+    metrics.observe_statement("SELECT * FROM a WHERE id = $2", 1.0)
+    assert set(metrics.statements) == {"SELECT * FROM a WHERE id = ?", "SELECT * FROM b WHERE id = ?", "<other>"}
+    assert metrics.statements["<other>"].count == 2
+    assert metrics.statements["SELECT * FROM a WHERE id = ?"].count == 2
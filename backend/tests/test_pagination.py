@@ -0,0 +1,115 @@
+"""
+Keyset pagination: cursors round-trip, anything else is a 400, and paging
+through searches created in the same instant returns each one exactly once
+"""
+import asyncio
+import base64
+import json
+import uuid
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+
+from app.api.v1.searches import get_searches
+from app.core.pagination import decode_cursor, encode_cursor, keyset_page
+from app.db.models import Search, User
+
+CREATED_AT = datetime(2026, 10, 18, 12, 30, 15, 123456)
+
+
+def raw_cursor(payload) -> str:
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+
+
+def test_round_trip():
+    row_id = uuid.uuid4()
+    cursor = encode_cursor(CREATED_AT, row_id)
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (CREATED_AT, row_id)
+    assert decode_cursor(encode_cursor(0.25, row_id), key_type=float) == (0.25, row_id)
+
+
+@pytest.mark.parametrize("cursor", [
+    "",
+    "not a cursor!",
+    "ü",
+    raw_cursor({"a": 1}),
+    raw_cursor([CREATED_AT.isoformat()]),
+    raw_cursor([CREATED_AT.isoformat(), "not-a-uuid"]),
+    raw_cursor([None, str(uuid.uuid4())]),
+    raw_cursor(["yesterday", str(uuid.uuid4())]),
+    raw_cursor(["2026-10-18T12:30:15+02:00", str(uuid.uuid4())]),
+    raw_cursor([CREATED_AT.isoformat(), str(uuid.uuid4())])[:-3],
+    "W" * 5000,
+])
+def test_invalid_cursors_raise_value_error(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+def test_float_key_rejects_non_numbers():
+    with pytest.raises(ValueError):
+        decode_cursor(raw_cursor([[1], str(uuid.uuid4())]), key_type=float)
+
+
+def test_keyset_page_only_returns_a_cursor_when_there_is_more():
+    rows = [Search(id=uuid.uuid4(), created_at=CREATED_AT) for _ in range(3)]
+    assert keyset_page(rows, 3) == (rows, None)
+    page, cursor = keyset_page(rows, 2)
+    assert page == rows[:2] and decode_cursor(cursor) == (CREATED_AT, rows[1].id)
+
+
+async def history(sessions, user, cursor=None, page_size=3, page=1) -> dict:
+    async with sessions() as db:
+        return await get_searches(
+            page=page, page_size=page_size, cursor=cursor, include_total=None,
+            query=None, status_filter=None, current_user=user, db=db,
+        )
+
+
+def test_paging_is_stable_across_equal_created_at(sqlite_sessions):
+    async def main():
+        async with sqlite_sessions() as db:
+            user = User(email="history@example.com")
+            db.add(user)
+            await db.flush()
+            # Same instant for all but one
+            searches = [Search(user_id=user.id, query=f"q{i}", created_at=CREATED_AT) for i in range(7)]
+            searches.append(Search(user_id=user.id, query="older", created_at=datetime(2026, 10, 1)))
+            db.add_all(searches)
+            await db.commit()
+
+        pages, cursor = [], None
+        while True:
+            response = await history(sqlite_sessions, user, cursor)
+            # Only cursor pages skip the count
+            assert (response["total"] is None) == (cursor is not None)
+            pages.append([search.query for search in response["searches"]])
+            cursor = response["next_cursor"]
+            if cursor is None:
+                return searches, pages
+
+    searches, pages = asyncio.run(main())
+    assert [len(page) for page in pages] == [3, 3, 2]
+    expected = [search.query for search in sorted(searches[:7], key=lambda search: search.id, reverse=True)]
+    assert [query for page in pages for query in page] == expected + ["older"]
+
+
+def test_offset_mode_counts_and_invalid_cursor_is_400(sqlite_sessions):
+    async def main():
+        async with sqlite_sessions() as db:
+            user = User(email="offset@example.com")
+            db.add(user)
+            await db.flush()
+            db.add_all([Search(user_id=user.id, query=f"q{i}") for i in range(4)])
+            await db.commit()
+        second = await history(sqlite_sessions, user, page=2)
+        with pytest.raises(HTTPException) as raised:
+            await history(sqlite_sessions, user, cursor=raw_cursor(["2026-10-18", "x"]))
+        return second, raised.value.status_code
+
+    second, status_code = asyncio.run(main())
+    assert second["total"] == 4 and second["page"] == 2 and len(second["searches"]) == 1
+    assert second["next_cursor"] is None
+    assert status_code == 400
@@ -0,0 +1,47 @@
+"""
+Payload codecs round-trip, and dictionary-compressed rows name the
+dictionary they need
+"""
+import pytest
+
+from app.db.payloads import DICTIONARY_SUFFIX, PayloadCodec, train_dictionary, zstandard
+
+PAYLOADS = [
+    {"id": str(i), "text": f"tweet number {i} about #launch", "lang": "en",
+     "public_metrics": {"like_count": i % 50, "retweet_count": i % 7},
+     "author": {"id": str(1000 + i % 40), "username": f"user{i % 40}", "verified": i % 9 == 0}}
+    for i in range(600)
+]
+
+requires_zstd = pytest.mark.skipif(zstandard is None, reason="zstandard is not installed")
+
+
+def test_zlib_round_trip():
+    codec = PayloadCodec("zlib", dictionary_dir=None)
+    name, data = codec.encode(PAYLOADS[3])
+    assert name == "zlib"
+    assert codec.decode(name, data) == PAYLOADS[3]
+
+
+@requires_zstd
+def test_zstd_round_trip_and_reads_zlib_rows():
+    codec = PayloadCodec("zstd", dictionary_dir=None)
+    name, data = codec.encode(PAYLOADS[3])
+    assert name == "zstd"
+    assert codec.decode(name, data) == PAYLOADS[3]
+    assert codec.decode(*PayloadCodec("zlib", dictionary_dir=None).encode(PAYLOADS[4])) == PAYLOADS[4]
+
+
+@requires_zstd
+def test_dictionary(tmp_path):
+    dictionary = train_dictionary(PAYLOADS[:500], size=2048)
+    (tmp_path / f"{dictionary.dict_id()}{DICTIONARY_SUFFIX}").write_bytes(dictionary.as_bytes())
+
+    codec = PayloadCodec("zstd", dictionary_dir=str(tmp_path))
+    name, data = codec.encode(PAYLOADS[550])
+    assert name == f"zstd:{dictionary.dict_id()}"
+    assert len(data) < len(PayloadCodec("zstd", dictionary_dir=None).encode(PAYLOADS[550])[1])
+    assert codec.decode(name, data) == PAYLOADS[550]
+
+    with pytest.raises(RuntimeError):
+        PayloadCodec("zstd", dictionary_dir=None).decode(name, data)
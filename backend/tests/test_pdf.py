@@ -0,0 +1,52 @@
+"""
+Hand-written PDF output must be structurally valid: every xref offset points
+at its object and page streams decompress
+"""
+import re
+import zlib
+
+from app.reports.pdf import render_report, wrap
+
+DATA = {
+    "query": "electric (cars) \\批判",
+    "time_range": "24h",
+    "completed_at": "2026-10-18T12:00",
+    "total_tweets": 1234,
+    "sentiment_summary": {"positive": 45.0, "negative": 30.0, "neutral": 25.0, "sarcastic": 5.0},
+    "emotion_summary": {"joy": 0.4, "anger": 0.1},
+    "emotion_stats": {"joy": {"mean": 0.4, "std": 0.1, "count": 10}},
+    "top_tweets": [
+        {"author_username": "alice", "sentiment_label": "positive", "like_count": 10, "retweet_count": 2,
+         "text": "word " * 400},
+    ] * 10,
+}
+
+
+def test_xref_offsets_point_at_objects():
+    pdf = render_report(DATA)
+    assert pdf.startswith(b"%PDF-1.4") and pdf.rstrip().endswith(b"%%EOF")
+    xref = int(re.search(rb"startxref\n(\d+)", pdf).group(1))
+    assert pdf[xref:xref + 4] == b"xref"
+    entries = re.findall(rb"(\d{10}) 00000 n", pdf[xref:])
+    for number, offset in enumerate(entries, start=1):
+        assert pdf[int(offset):].startswith(f"{number} 0 obj".encode())
+
+
+def test_long_content_spills_onto_more_pages():
+    pdf = render_report(DATA)
+    count = int(re.search(rb"/Count (\d+)", pdf).group(1))
+    assert count > 1
+    streams = re.findall(rb"stream\n(.*?)\nendstream", pdf, re.S)
+    assert len(streams) == count
+    first_page = zlib.decompress(streams[0]).decode("latin-1")
+    # Parentheses and backslashes are escaped, non-Latin-1 text is replaced
+    assert "electric \\(cars\\) \\\\??" in first_page
+    # Emotion means, with the std dev where emotion_stats has one
+    assert "joy                 0.400    0.100" in first_page
+    assert "anger               0.100        -" in first_page
+
+
+def test_wrap_respects_width_and_splits_long_words():
+    lines = wrap("short words here " + "x" * 50, size=10, width=100)
+    assert all(len(line) <= 20 for line in lines)
+    assert "".join(lines).endswith("x" * 10)
@@ -0,0 +1,230 @@
+"""
+The analysis pipeline end to end on SQLite: an in-memory fetcher's tweets go
+through every stage, are stored with their sentiments and summarized on the
+search, also when dispatched through the in-process worker. Searches that
+find the same tweets share their rows.
+"""
+import asyncio
+
+from sqlalchemy import func, select
+
+from app.api.v1.searches import delete_search
+from app.core.config import settings
+from app.db.bulk import BulkWriter
+from app.db.models import Search, SearchTweet, Sentiment, SentimentRollup, Tweet, User
+from app.ml.base import EMOTIONS
+from app.ml.cache import SentimentCache
+from app.ml.vader import VaderScorer
+from app.tasks import worker
+from app.tasks.pipeline import AnalysisPipeline
+from app.websocket.manager import AnalysisBroadcaster
+
+TEXTS = ["I love this, great launch", "This is terrible and awful", "Shipping on Tuesday"]
+
+
+def tweets(ids, prefix="t"):
+    return [
+        {"id": f"{prefix}{i}", "text": f"{TEXTS[i % 3]} #{i}", "created_at": f"2026-10-0{1 + i % 2}T09:30:00Z"}
+        for i in ids
+    ]
+
+
+def memory_fetcher(pages):
+    async def fetch(search):
+        for page in pages:
+            yield page
+    return fetch
+
+
+def make_pipeline(engine, sessions, pages, **options):
+    return AnalysisPipeline(
+        fetcher=memory_fetcher(pages),
+        scorers=[VaderScorer(emotion_terms={"love": {"joy": 1.0}, "terrible": {"fear": 0.5}})],
+        cache=SentimentCache(),  # Memory only
+        session_factory=sessions,
+        bind=engine,
+        broadcaster=AnalysisBroadcaster(),
+        batch_size=options.pop("batch_size", 4),
+        max_inflight_batches=2,
+        summary_flush_interval=0,
+        **options,
+    )
+
+
+async def create_search(sessions, query="launch", user_id=None, **values) -> Search:
+    async with sessions() as db:
+        if user_id is None:
+            user = User(email=f"{query.replace(' ', '-')}@example.com")
+            db.add(user)
+            await db.flush()
+            user_id = user.id
+        search = Search(user_id=user_id, query=query, status="pending", **values)
+        db.add(search)
+        await db.commit()
+        return search
+
+
+async def count(sessions, model, *where) -> int:
+    async with sessions() as db:
+        return await db.scalar(select(func.count()).select_from(model).where(*where))
+
+
+def test_run_stores_and_summarizes(sqlite_engine, sqlite_sessions):
+    # Duplicates and empty texts are dropped by the normalize stage
+    pages = [tweets(range(7)), tweets(range(5, 12)) + [{"id": "empty", "text": "  "}]]
+
+    async def main():
+        search = await create_search(sqlite_sessions)
+        result = await make_pipeline(sqlite_engine, sqlite_sessions, pages).run(search.id)
+        async with sqlite_sessions() as db:
+            stored = await db.get(Search, search.id)
+        return result, stored, (
+            await count(sqlite_sessions, Tweet),
+            await count(sqlite_sessions, Sentiment),
+            await count(sqlite_sessions, SentimentRollup, SentimentRollup.granularity == "1d"),
+        )
+
+    result, search, (tweet_count, sentiment_count, days) = asyncio.run(main())
+    assert result.total_tweets == 12
+    assert (tweet_count, sentiment_count, days) == (12, 12, 2)
+    assert search.status == "completed" and search.completed_at is not None
+    assert search.total_tweets == 12
+    assert search.sentiment_summary == result.aggregate.sentiment_summary()
+    assert search.sentiment_summary["positive"] > 0 and search.sentiment_summary["negative"] > 0
+    assert set(search.emotion_summary) == set(EMOTIONS)
+
+    # A search that is no longer pending is not analyzed again
+    assert asyncio.run(make_pipeline(sqlite_engine, sqlite_sessions, pages).run(search.id)) is None
+
+
+def test_max_tweets_stops_the_fetch(sqlite_engine, sqlite_sessions):
+    pages = [tweets(range(i, i + 5)) for i in range(0, 50, 5)]
+
+    async def main():
+        search = await create_search(sqlite_sessions)
+        return await make_pipeline(sqlite_engine, sqlite_sessions, pages, max_tweets=12).run(search.id)
+
+    assert asyncio.run(main()).total_tweets == 12
+
+
+def test_failing_fetcher_fails_the_search(sqlite_engine, sqlite_sessions):
+    async def broken(search):
+        yield tweets(range(3))
+        raise RuntimeError("source went away")
+
+    async def main():
+        search = await create_search(sqlite_sessions)
+        pipeline = make_pipeline(sqlite_engine, sqlite_sessions, [])
+        pipeline.fetcher = broken
+        assert await pipeline.run(search.id) is None
+        async with sqlite_sessions() as db:
+            return await db.get(Search, search.id)
+
+    assert asyncio.run(main()).status == "failed"
+
+
+def test_dispatch_runs_on_the_in_process_worker(sqlite_engine, sqlite_sessions, monkeypatch):
+    pipeline = make_pipeline(sqlite_engine, sqlite_sessions, [tweets(range(6))])
+    analysis_worker = worker.AnalysisWorker(pipeline, concurrency=2)
+    monkeypatch.setattr(worker, "analysis_worker", analysis_worker)
+    monkeypatch.setattr(settings, "ANALYSIS_EAGER", True)
+
+    async def main():
+        first = await create_search(sqlite_sessions, "first")
+        second = await create_search(sqlite_sessions, "second")
+        await worker.dispatch_analysis(first.id)
+        await worker.dispatch_analysis(second.id)
+        assert analysis_worker.running
+        await analysis_worker.join()
+        await analysis_worker.stop()
+        async with sqlite_sessions() as db:
+            searches = [await db.get(Search, search.id) for search in (first, second)]
+        return searches, await count(sqlite_sessions, Tweet)
+
+    searches, tweet_count = asyncio.run(main())
+    assert [search.status for search in searches] == ["completed", "completed"]
+    # The second search linked the tweets the first one stored
+    assert [search.total_tweets for search in searches] == [6, 6] and tweet_count == 6
+    assert not analysis_worker.running
+
+
+def test_search_fails_when_its_rows_cannot_be_written(sqlite_engine, sqlite_sessions, monkeypatch):
+    async def refuse(self, conn, links):
+        raise RuntimeError("disk full")
+
+    monkeypatch.setattr(BulkWriter, "_insert_links", refuse)
+
+    async def main():
+        search = await create_search(sqlite_sessions)
+        assert await make_pipeline(sqlite_engine, sqlite_sessions, [tweets(range(6))]).run(search.id) is None
+        async with sqlite_sessions() as db:
+            return await db.get(Search, search.id), await count(sqlite_sessions, Tweet)
+
+    search, tweet_count = asyncio.run(main())
+    assert search.status == "failed" and search.sentiment_summary is None
+    assert tweet_count == 0
+
+
+def test_overlapping_searches_share_tweets(sqlite_engine, sqlite_sessions):
+    async def main():
+        first = await create_search(sqlite_sessions, "first")
+        second = await create_search(sqlite_sessions, "second")
+        await make_pipeline(sqlite_engine, sqlite_sessions, [tweets(range(6))]).run(first.id)
+
+        pipeline = make_pipeline(sqlite_engine, sqlite_sessions, [tweets(range(3, 9))])
+        scored = []
+        score = pipeline.scorers[0].score
+
+        async def counting_score(texts):
+            scored.extend(texts)
+            return await score(texts)
+
+        pipeline.scorers[0].score = counting_score
+        result = await pipeline.run(second.id)
+        async with sqlite_sessions() as db:
+            stored = await db.get(Search, second.id)
+            rollup_total = await db.scalar(
+                select(func.sum(SentimentRollup.tweet_count))
+                .where(SentimentRollup.search_id == second.id, SentimentRollup.granularity == "1d")
+            )
+            rollup_labels = await db.scalar(
+                select(func.sum(SentimentRollup.positive + SentimentRollup.negative + SentimentRollup.neutral))
+                .where(SentimentRollup.search_id == second.id, SentimentRollup.granularity == "1d")
+            )
+        return result, stored, scored, rollup_total, rollup_labels, (
+            await count(sqlite_sessions, Tweet),
+            await count(sqlite_sessions, Sentiment),
+            await count(sqlite_sessions, SearchTweet, SearchTweet.search_id == first.id),
+            await count(sqlite_sessions, SearchTweet, SearchTweet.search_id == second.id),
+        )
+
+    result, search, scored, rollup_total, rollup_labels, counts = asyncio.run(main())
+    # t3..t5 are stored once, keep their one sentiment and are linked to both searches
+    assert counts == (9, 9, 6, 6)
+    assert result.reused_tweets == 3 and len(scored) == 3
+    # Reused tweets count in the summary (their stored sentiments) and in the rollups
+    assert result.aggregate.scored == 6 and search.total_tweets == 6
+    assert rollup_total == rollup_labels == 6
+    assert search.sentiment_summary == result.aggregate.sentiment_summary()
+
+
+def test_deleting_a_search_keeps_tweets_other_searches_link(sqlite_engine, sqlite_sessions):
+    async def main():
+        first = await create_search(sqlite_sessions, "first")
+        second = await create_search(sqlite_sessions, "second")
+        await make_pipeline(sqlite_engine, sqlite_sessions, [tweets(range(6))]).run(first.id)
+        await make_pipeline(sqlite_engine, sqlite_sessions, [tweets(range(3, 9))]).run(second.id)
+        async with sqlite_sessions() as db:
+            owner = await db.get(User, first.user_id)
+            await delete_search(first.id, owner, db)
+        async with sqlite_sessions() as db:
+            kept = (await db.execute(select(Tweet.tweet_id).order_by(Tweet.tweet_id))).scalars().all()
+        return kept, (
+            await count(sqlite_sessions, Sentiment),
+            await count(sqlite_sessions, SearchTweet),
+            await count(sqlite_sessions, SentimentRollup, SentimentRollup.search_id == first.id),
+        )
+
+    kept, (sentiments, links, first_rollups) = asyncio.run(main())
+    assert kept == [f"t{i}" for i in range(3, 9)]
+    assert (sentiments, links, first_rollups) == (6, 6, 0)
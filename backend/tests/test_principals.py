@@ -0,0 +1,105 @@
+"""
+PrincipalCache: the TTL cache, token decoding, and user snapshots that are
+dropped when a session changes the user
+"""
+import asyncio
+from datetime import timedelta
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import event
+
+from app.api.v1.auth import get_current_user
+from app.core.principals import PrincipalCache, TTLCache, principal_cache
+from app.core.security import create_access_token
+from app.db.models import User
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_ttl_cache_expires_and_evicts():
+    clock = FakeClock()
+    cache = TTLCache(maxsize=2, ttl=10, clock=clock)
+    cache.put("a", 1)
+    cache.put("b", 2, ttl=60)  # Capped at the cache TTL
+    clock.now = 5
+    assert cache.get("a") == 1
+    cache.put("c", 3)  # Evicts "b", the least recently used
+    assert cache.get("b") is None
+    clock.now = 10
+    assert cache.get("a") is None
+    assert cache.get("c") == 3
+
+
+def test_disabled_cache_stores_nothing():
+    cache = TTLCache(maxsize=10, ttl=0)
+    cache.put("a", 1)
+    assert len(cache) == 0
+
+
+def test_decode_caches_valid_tokens_only():
+    principals = PrincipalCache(maxsize=10, ttl=30)
+    token = create_access_token(data={"sub": "user"})
+    assert principals.decode(token)["sub"] == "user"
+    assert principals.decode(token)["sub"] == "user"
+    assert len(principals.tokens) == 1
+
+    assert principals.decode("not-a-token") is None
+    expired = create_access_token(data={"sub": "user"}, expires_delta=timedelta(seconds=-1))
+    assert principals.decode(expired) is None
+    assert len(principals.tokens) == 1
+
+
+def test_user_changes_reach_get_current_user(sqlite_engine, sqlite_sessions):
+    selects = []
+    event.listen(
+        sqlite_engine.sync_engine, "before_cursor_execute",
+        lambda conn, cursor, statement, *args: selects.append(statement) if statement.startswith("SELECT") else None,
+    )
+
+    async def current(token):
+        async with sqlite_sessions() as db:
+            user = await get_current_user(token, db)
+            return user.credits_remaining, user.tier
+
+    async def change(user_id, **values):
+        async with sqlite_sessions() as db:
+            user = await db.get(User, user_id)
+            for key, value in values.items():
+                setattr(user, key, value)
+            await db.commit()
+
+    async def main():
+        async with sqlite_sessions() as db:
+            user = User(email="cached@example.com", credits_remaining=50, tier="free")
+            db.add(user)
+            await db.commit()
+        token = create_access_token(data={"sub": str(user.id)})
+        principal_cache.clear()
+
+        assert await current(token) == (50, "free")
+        loaded = len(selects)
+        assert await current(token) == (50, "free")
+        assert len(selects) == loaded  # Served from the snapshot
+
+        await change(user.id, credits_remaining=49)
+        assert await current(token) == (49, "free")
+        await change(user.id, tier="pro")
+        assert await current(token) == (49, "pro")
+
+        await change(user.id, is_active=False)
+        with pytest.raises(HTTPException) as raised:
+            await current(token)
+        return raised.value
+
+    try:
+        rejected = asyncio.run(main())
+    finally:
+        principal_cache.clear()
+    assert rejected.status_code == 400 and rejected.detail == "Inactive user"
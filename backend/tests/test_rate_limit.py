@@ -0,0 +1,120 @@
+import asyncio
+import os
+import uuid
+
+import pytest
+
+from app.core.config import settings
+from app.core.rate_limit import InMemoryBackend, RateLimitMiddleware, RedisBackend
+from app.core.security import create_access_token
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+async def ok_app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+
+def request(middleware, path="/api/v1/searches/", token=None, ip="10.0.0.1") -> int:
+    headers = [(b"authorization", f"Bearer {token}".encode())] if token else []
+    scope = {"type": "http", "path": path, "headers": headers, "client": (ip, 1234)}
+    statuses = []
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            statuses.append(message["status"])
+
+    asyncio.run(middleware(scope, None, send))
+    return statuses[0]
+
+
+def test_burst_then_steady_rate():
+    clock = FakeClock()
+    middleware = RateLimitMiddleware(ok_app, InMemoryBackend(clock=clock))
+    token = create_access_token(data={"sub": "free-user", "tier": "free"})
+    limit = settings.RATE_LIMIT_PER_MINUTE
+
+    assert [request(middleware, token=token) for _ in range(limit)] == [200] * limit
+    assert request(middleware, token=token) == 429
+    clock.now += 60 / limit  # One interval later, exactly one more request fits
+    assert request(middleware, token=token) == 200
+    assert request(middleware, token=token) == 429
+
+
+def test_limits_by_tier_and_ip():
+    clock = FakeClock()
+    middleware = RateLimitMiddleware(ok_app, InMemoryBackend(clock=clock))
+    pro = create_access_token(data={"sub": "pro-user", "tier": "pro"})
+    statuses = [request(middleware, token=pro) for _ in range(settings.RATE_LIMIT_PRO_PER_MINUTE + 1)]
+    assert statuses.count(200) == settings.RATE_LIMIT_PRO_PER_MINUTE
+
+    anonymous = [request(middleware, ip="10.0.0.2") for _ in range(settings.RATE_LIMIT_ANONYMOUS_PER_MINUTE + 1)]
+    assert anonymous[-1] == 429
+    assert request(middleware, ip="10.0.0.3") == 200
+    assert request(middleware, path="/health", ip="10.0.0.2") == 200
+
+
+def redis_clients():
+    """fakeredis runs the Lua script when lupa is installed; TEST_REDIS_URL adds a real server"""
+    clients = []
+    try:
+        import fakeredis.aioredis
+        import lupa  # noqa: F401
+        clients.append(pytest.param(lambda: fakeredis.aioredis.FakeRedis(), id="fakeredis"))
+    except ImportError:
+        clients.append(pytest.param(None, id="fakeredis", marks=pytest.mark.skip(reason="fakeredis[lua] is not installed")))
+    url = os.environ.get("TEST_REDIS_URL")
+    if url:
+        import redis.asyncio as redis
+        clients.append(pytest.param(lambda: redis.from_url(url), id="redis"))
+    return clients
+
+
+@pytest.mark.parametrize("make_client", redis_clients())
+def test_redis_backend_script(make_client):
+    async def main():
+        client = make_client()
+        prefix = f"ratelimit-test:{uuid.uuid4().hex}:"
+        backend = RedisBackend("unused", prefix=prefix, client=client)
+        try:
+            # Burst of tolerance / interval + 1, then rejected until one interval passes
+            hits = [await backend.hit("user:a", 1.0, 2.0) for _ in range(4)]
+            ttl = await client.pttl(prefix + "user:a")
+            other = await backend.hit("user:b", 1.0, 2.0)
+
+            middleware = RateLimitMiddleware(ok_app, backend)
+            token = create_access_token(data={"sub": f"redis-{uuid.uuid4().hex}", "tier": "free"})
+            statuses = [await send_request(middleware, token) for _ in range(settings.RATE_LIMIT_PER_MINUTE + 1)]
+        finally:
+            await client.delete(*[key async for key in client.scan_iter(match=prefix + "*")])
+            await client.aclose()
+        return hits, ttl, other, statuses
+
+    hits, ttl, other, statuses = asyncio.run(main())
+    assert [allowed for allowed, _ in hits] == [True, True, True, False]
+    assert [retry_after for _, retry_after in hits[:3]] == [0.0, 0.0, 0.0]
+    assert 0.0 < hits[3][1] <= 1.0
+    # The key expires when its allowance is full again
+    assert 2000 < ttl <= 3000
+    assert other == (True, 0.0)
+    assert statuses[-1] == 429 and statuses.count(200) == settings.RATE_LIMIT_PER_MINUTE
+
+
+async def send_request(middleware, token) -> int:
+    statuses = []
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            statuses.append(message["status"])
+
+    scope = {"type": "http", "path": "/api/v1/searches/", "headers": [(b"authorization", f"Bearer {token}".encode())],
+             "client": ("10.0.0.9", 1234)}
+    await middleware(scope, None, send)
+    return statuses[0]
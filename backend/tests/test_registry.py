@@ -0,0 +1,66 @@
+"""
+Registry models load once, and concurrent calls are micro-batched into few
+inference calls that hand every caller its own slice of the scores
+"""
+import asyncio
+
+import numpy as np
+import pytest
+
+from app.ml.base import BatchScores, SentimentScorer
+from app.ml.registry import ModelRegistry
+
+
+class LengthScorer(SentimentScorer):
+    model_name = "length"
+    model_version = "2"
+    loads = 0
+
+    def __init__(self):
+        LengthScorer.loads += 1
+        self.batches: list[int] = []
+
+    def score_batch(self, texts):
+        self.batches.append(len(texts))
+        lengths = np.array([len(text) for text in texts], dtype=np.float64)
+        return BatchScores(
+            model_name=self.model_name,
+            sentiment_label=np.where(lengths > 3, "positive", "negative"),
+            confidence_score=lengths,
+            model_version=self.model_version,
+        )
+
+
+def test_models_load_once_by_name():
+    registry = ModelRegistry()
+    registry.register("length", LengthScorer)
+    registry.register("vader", "app.ml.vader:VaderScorer")
+    LengthScorer.loads = 0
+
+    assert not registry.is_loaded("vader")
+    first, vader = asyncio.run(registry.load(["length", "vader"]))
+    assert registry.get("length") is first and LengthScorer.loads == 1
+    assert vader.model_name == "vader" and vader.model_version.startswith("1.0+")
+    with pytest.raises(ValueError):
+        registry.get("roberta")
+
+
+def test_concurrent_calls_share_inference_calls():
+    registry = ModelRegistry(max_batch_size=8, max_wait_ms=20)
+    registry.register("length", LengthScorer)
+    model = registry.get("length")
+    requests = [["a" * (i + j) for j in range(3)] for i in range(5)]
+
+    async def main():
+        return await asyncio.gather(*(model.score(texts) for texts in requests))
+
+    results = asyncio.run(main())
+    # 15 texts in batches of at most 8 (whole requests are never split)
+    assert model.model.batches == [6, 6, 3]
+    assert model.batcher.requests == 5
+    for texts, scores in zip(requests, results):
+        assert list(scores.confidence_score) == [len(text) for text in texts]
+        assert scores.model_version == "2"
+
+    # Works again on a fresh event loop, as with one asyncio.run per Celery task
+    assert list(asyncio.run(model.score(["abcd"])).sentiment_label) == ["positive"]
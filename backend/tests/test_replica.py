@@ -0,0 +1,71 @@
+"""
+ReplicaRouter: reads fall back to the primary when the replica cannot be
+reached, and the replica is only tried again once the retry window is over
+"""
+import asyncio
+
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.db import session as db_session
+from app.db.session import ReplicaRouter
+
+
+class Clock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_replica_down_falls_back_until_the_retry_window_ends(tmp_path, sqlite_engine, monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(db_session.time, "monotonic", clock)
+    # The directory does not exist yet, so every connect to the replica fails
+    replica = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'replica' / 'replica.db'}")
+    attempts = []
+    event.listen(replica.sync_engine, "do_connect", lambda *args: attempts.append(clock.now))
+    router = ReplicaRouter(replica, sqlite_engine, retry_seconds=30)
+
+    async def read(expected_bind):
+        session = await router.session()
+        try:
+            assert session.bind is expected_bind
+            assert await session.scalar(text("SELECT 1")) == 1
+        finally:
+            await session.close()
+
+    async def main():
+        await read(sqlite_engine)
+        assert attempts == [1000.0]
+
+        # Inside the window the replica is not even tried
+        clock.now += 29
+        await read(sqlite_engine)
+        assert attempts == [1000.0]
+
+        # Still down once the window is over: tried once more, new window
+        clock.now += 1
+        await read(sqlite_engine)
+        assert attempts == [1000.0, 1030.0]
+
+        (tmp_path / "replica").mkdir()
+        clock.now += 15
+        await read(sqlite_engine)
+        clock.now += 15
+        await read(replica)
+        await read(replica)
+        assert attempts[2:] == [1060.0]  # Pooled afterwards
+        await replica.dispose()
+
+    asyncio.run(main())
+
+
+def test_no_replica_reads_from_the_primary(sqlite_engine):
+    async def main():
+        session = await ReplicaRouter(None, sqlite_engine, retry_seconds=30).session()
+        async with session:
+            return session.bind
+
+    assert asyncio.run(main()) is sqlite_engine
@@ -0,0 +1,178 @@
+"""
+Report jobs on SQLite: which reports are reused, claiming and failing a job,
+the janitor, and what downloading a report in each state returns
+"""
+import asyncio
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+from fastapi.responses import FileResponse
+from sqlalchemy import select
+
+from app.api.v1 import reports as reports_api
+from app.core.config import settings
+from app.db.models import Report, Search, SearchTweet, Tweet, User
+from app.reports.jobs import ReportGenerator, find_cached_report
+from app.reports.storage import ReportStore
+
+COMPLETED_AT = datetime(2026, 10, 18, 9, 0)
+
+
+async def add_search(sessions) -> tuple[User, Search]:
+    async with sessions() as db:
+        user = User(email="reports@example.com")
+        db.add(user)
+        await db.flush()
+        search = Search(
+            user_id=user.id, query="launch", status="completed", completed_at=COMPLETED_AT, total_tweets=2,
+            sentiment_summary={"positive": 50.0, "negative": 50.0, "neutral": 0.0, "sarcastic": 0.0},
+        )
+        db.add(search)
+        await db.flush()
+        for i, likes in enumerate((5, 50)):
+            tweet = Tweet(tweet_id=str(i), text=f"tweet {i}", author_username=f"user{i}", like_count=likes)
+            db.add(tweet)
+            await db.flush()
+            db.add(SearchTweet(search_id=search.id, tweet_id=tweet.id))
+        await db.commit()
+    return user, search
+
+
+async def add_report(sessions, search, report_format="pdf", **values) -> Report:
+    values.setdefault("source_completed_at", search.completed_at)
+    values.setdefault("expires_at", datetime.utcnow() + timedelta(days=1))
+    async with sessions() as db:
+        report = Report(search_id=search.id, user_id=search.user_id, format=report_format, **values)
+        db.add(report)
+        await db.commit()
+        return report
+
+
+async def cached(sessions, search, report_format="pdf"):
+    async with sessions() as db:
+        report = await find_cached_report(db, search, report_format)
+        return report.id if report else None
+
+
+def test_find_cached_report(sqlite_sessions):
+    now = datetime.utcnow()
+    stale = now - timedelta(seconds=settings.REPORT_JOB_TIMEOUT_SECONDS + 60)
+
+    async def main():
+        _, search = await add_search(sqlite_sessions)
+        # Never reused: failed, expired, and a job lost to a restart
+        await add_report(sqlite_sessions, search, status="failed")
+        await add_report(sqlite_sessions, search, status="completed", expires_at=now - timedelta(minutes=1))
+        await add_report(sqlite_sessions, search, status="processing", created_at=stale)
+        assert await cached(sqlite_sessions, search) is None
+
+        running = await add_report(sqlite_sessions, search, status="processing", created_at=now - timedelta(seconds=5))
+        assert await cached(sqlite_sessions, search) == running.id
+        assert await cached(sqlite_sessions, search, "csv") is None
+
+        completed = await add_report(sqlite_sessions, search, status="completed", created_at=now)
+        assert await cached(sqlite_sessions, search) == completed.id
+
+        # Re-running the search makes every earlier report stale
+        search.completed_at = COMPLETED_AT + timedelta(hours=1)
+        assert await cached(sqlite_sessions, search) is None
+
+    asyncio.run(main())
+
+
+class BrokenStore(ReportStore):
+    async def write(self, key, data):
+        # Leave a partial file behind, like a write that died halfway
+        self.path(key).parent.mkdir(parents=True, exist_ok=True)
+        self.path(key).write_bytes(data[:10])
+        raise OSError("disk full")
+
+
+async def report_row(sessions, report_id) -> Report:
+    async with sessions() as db:
+        return await db.get(Report, report_id)
+
+
+def test_run_claims_pending_reports_once(tmp_path, sqlite_engine, sqlite_sessions):
+    store = ReportStore(str(tmp_path / "reports"))
+    generator = ReportGenerator(sqlite_sessions, sqlite_engine, store=store, pool=lambda: None)
+
+    async def main():
+        _, search = await add_search(sqlite_sessions)
+        report = await add_report(sqlite_sessions, search, status="pending")
+        done = await asyncio.gather(generator.run(report.id), generator.run(report.id))
+        assert await generator.run(report.id) is None
+        return done, await report_row(sqlite_sessions, report.id)
+
+    done, report = asyncio.run(main())
+    # One of the two concurrent runs claimed it, the other skipped
+    assert sorted(result is None for result in done) == [False, True]
+    assert report.status == "completed" and report.file_url == f"{report.id}.pdf"
+    assert store.path(report.file_url).read_bytes().startswith(b"%PDF-1.4")
+    assert report.file_size_kb >= 1
+
+
+def test_failed_run_marks_the_report_and_removes_the_file(tmp_path, sqlite_engine, sqlite_sessions):
+    store = BrokenStore(str(tmp_path / "reports"))
+    generator = ReportGenerator(sqlite_sessions, sqlite_engine, store=store, pool=lambda: None)
+
+    async def main():
+        _, search = await add_search(sqlite_sessions)
+        report = await add_report(sqlite_sessions, search, status="pending")
+        assert await generator.run(report.id) is None
+        return await report_row(sqlite_sessions, report.id)
+
+    report = asyncio.run(main())
+    assert report.status == "failed" and report.file_url is None
+    assert list(store.root.iterdir()) == []
+
+
+def test_purge_expired_removes_rows_and_files(tmp_path, sqlite_engine, sqlite_sessions):
+    store = ReportStore(str(tmp_path / "reports"))
+    generator = ReportGenerator(sqlite_sessions, sqlite_engine, store=store, pool=lambda: None)
+    expired = datetime.utcnow() - timedelta(minutes=1)
+
+    async def main():
+        _, search = await add_search(sqlite_sessions)
+        for i in range(5):
+            await store.write(f"old{i}.pdf", b"old")
+            await add_report(sqlite_sessions, search, status="completed", file_url=f"old{i}.pdf", expires_at=expired)
+        await add_report(sqlite_sessions, search, status="failed", expires_at=expired)
+        await store.write("kept.pdf", b"kept")
+        kept = await add_report(sqlite_sessions, search, status="completed", file_url="kept.pdf")
+        removed = await generator.purge_expired(batch_size=2)
+        async with sqlite_sessions() as db:
+            left = (await db.execute(select(Report.id))).scalars().all()
+        return removed, left, kept
+
+    removed, left, kept = asyncio.run(main())
+    assert removed == 6 and left == [kept.id]
+    assert [path.name for path in store.root.iterdir()] == ["kept.pdf"]
+
+
+def test_download_by_status(tmp_path, sqlite_sessions, monkeypatch):
+    store = ReportStore(str(tmp_path / "reports"))
+    monkeypatch.setattr(reports_api, "report_store", store)
+
+    async def download(user, report):
+        async with sqlite_sessions() as db:
+            return await reports_api.get_report(report.id, user, db)
+
+    async def main():
+        user, search = await add_search(sqlite_sessions)
+        await store.write("ready.pdf", b"%PDF-1.4")
+        pending = await download(user, await add_report(sqlite_sessions, search, status="pending"))
+        failed = await download(user, await add_report(sqlite_sessions, search, status="failed"))
+        ready = await download(user, await add_report(sqlite_sessions, search, status="completed", file_url="ready.pdf"))
+        lost = await add_report(sqlite_sessions, search, status="completed", file_url="elsewhere.pdf")
+        with pytest.raises(HTTPException) as raised:
+            await download(user, lost)
+        return pending, failed, ready, raised.value.status_code
+
+    pending, failed, ready, lost_status = asyncio.run(main())
+    assert pending.status_code == 202 and pending.headers["retry-after"] == str(reports_api.POLL_AFTER_SECONDS)
+    assert failed.status_code == 410 and json.loads(failed.body)["status"] == "failed"
+    assert isinstance(ready, FileResponse) and ready.path == store.path("ready.pdf")
+    assert lost_status == 500
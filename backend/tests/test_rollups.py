@@ -0,0 +1,64 @@
+"""
+Rollup increments: hourly buckets, days summed from the same hours, labels
+from each tweet's first sentiment
+"""
+import uuid
+from datetime import datetime
+
+from app.db.rollups import align_series, rollup_rows
+
+SEARCH = uuid.uuid4()
+
+
+def tweet(hour: int, day: int = 1, minute: int = 30):
+    return {"id": uuid.uuid4(), "search_id": SEARCH, "created_at_twitter": datetime(2026, 10, day, hour, minute)}
+
+
+def sentiment(tweet_row, label, model="vader", emotions=None, sarcastic=False):
+    return {"tweet_id": tweet_row["id"], "model_name": model, "sentiment_label": label,
+            "is_sarcastic": sarcastic, "emotions": emotions}
+
+
+def by_bucket(rows):
+    return {(row["granularity"], row["bucket_start"]): row for row in rows}
+
+
+def test_hours_and_days():
+    tweets = [tweet(9), tweet(9, minute=59), tweet(10), tweet(23, day=2)]
+    sentiments = [
+        sentiment(tweets[0], "positive", emotions={"joy": 0.5, "anger": 0.1}),
+        sentiment(tweets[0], "negative", model="roberta"),  # Not the first model: ignored
+        sentiment(tweets[1], "negative", sarcastic=True, emotions={"joy": 0.25}),
+        sentiment(tweets[2], "neutral"),
+    ]
+    rows = by_bucket(rollup_rows(tweets, sentiments))
+    assert len(rows) == 5
+
+    nine = rows[("1h", datetime(2026, 10, 1, 9))]
+    assert (nine["tweet_count"], nine["positive"], nine["negative"], nine["sarcastic"]) == (2, 1, 1, 1)
+    assert nine["emotion_count"] == 2 and nine["joy_sum"] == 0.75 and nine["anger_sum"] == 0.1
+
+    first_day = rows[("1d", datetime(2026, 10, 1))]
+    assert (first_day["tweet_count"], first_day["positive"], first_day["negative"], first_day["neutral"]) == (3, 1, 1, 1)
+
+    # Unscored tweets are counted but have no label
+    second_day = rows[("1d", datetime(2026, 10, 2))]
+    assert second_day["tweet_count"] == 1 and second_day["positive"] + second_day["negative"] == 0
+
+
+def test_tweets_without_a_timestamp_are_skipped():
+    undated = {"id": uuid.uuid4(), "search_id": SEARCH, "created_at_twitter": None}
+    assert rollup_rows([undated], [sentiment(undated, "positive")]) == []
+
+
+def test_align_series_fills_missing_buckets_with_none():
+    first, second, third = (datetime(2026, 10, day) for day in (1, 2, 3))
+    timestamps, aligned = align_series([
+        [{"timestamp": first}, {"timestamp": second}],
+        [],
+        [{"timestamp": third}, {"timestamp": first}],
+    ])
+    assert timestamps == [first, second, third]
+    assert [[point and point["timestamp"] for point in points] for points in aligned] == [
+        [first, second, None], [None, None, None], [first, None, third]
+    ]
@@ -0,0 +1,61 @@
+import asyncio
+import threading
+
+import pytest
+from fastapi import HTTPException
+
+from app.api.v1.auth import refresh_token
+from app.core import security
+from app.core.config import settings
+from app.core.security import PasswordHashingBusy, PasswordHashingPool
+from app.db.models import User
+
+
+def test_rehash_when_cost_changes(monkeypatch):
+    monkeypatch.setattr(settings, "BCRYPT_ROUNDS", 4)
+    hashed = security.get_password_hash("secret")
+    assert security.verify_password("secret", hashed)
+    assert not security.password_needs_rehash(hashed)
+
+    monkeypatch.setattr(settings, "BCRYPT_ROUNDS", 5)
+    assert security.password_needs_rehash(hashed)
+    assert security.password_needs_rehash("not-a-bcrypt-hash")
+
+
+def test_pool_sheds_load_beyond_max_pending():
+    release = threading.Event()
+
+    async def main():
+        pool = PasswordHashingPool(workers=1, max_pending=2)
+        running = [asyncio.create_task(pool.run(release.wait)) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        with pytest.raises(PasswordHashingBusy):
+            await pool.run(release.wait)
+        release.set()
+        await asyncio.gather(*running)
+        assert pool.pending == 0
+
+    asyncio.run(main())
+
+
+def test_refresh_takes_the_tier_from_the_user(sqlite_sessions):
+    async def main():
+        async with sqlite_sessions() as db:
+            user = User(email="upgrade@example.com", tier="free")
+            db.add(user)
+            await db.commit()
+            old_refresh = security.create_refresh_token(data={"sub": str(user.id), "tier": "free"})
+            user.tier = "pro"
+            await db.commit()
+            tokens = await refresh_token(old_refresh, db)
+
+            await db.delete(user)
+            await db.commit()
+            with pytest.raises(HTTPException) as raised:
+                await refresh_token(tokens["refresh_token"], db)
+        return tokens, raised.value.status_code
+
+    tokens, status_code = asyncio.run(main())
+    assert security.decode_token(tokens["access_token"])["tier"] == "pro"
+    assert security.decode_token(tokens["refresh_token"])["tier"] == "pro"
+    assert status_code == 401
@@ -0,0 +1,105 @@
+"""
+Replayed fixtures come back in pages, and the HTTP source follows cursors
+across its time windows, retries throttled and failed requests and maps
+API tweets for the pipeline
+"""
+import asyncio
+import gzip
+import json
+from contextlib import aclosing
+
+import httpx
+
+from app.sources.api import HttpTweetSource, RatePacer
+from app.sources.replay import ReplayTweetSource
+
+
+async def collect(source, query="q", time_range="7d", limit=None) -> list[list[dict]]:
+    pages = []
+    async with aclosing(source.stream(query, time_range)) as stream:
+        async for page in stream:
+            pages.append(page)
+            if limit is not None and len(pages) >= limit:
+                break
+    await source.close()
+    return pages
+
+
+def test_replay_pages_across_files(tmp_path):
+    (tmp_path / "a.ndjson").write_text("".join(json.dumps({"id": str(i), "text": f"t{i}"}) + "\n" for i in range(5)) + "\n")
+    with gzip.open(tmp_path / "b.ndjson.gz", "wt") as handle:
+        handle.writelines(json.dumps({"id": str(i), "text": f"t{i}"}) + "\n" for i in range(5, 8))
+
+    pages = asyncio.run(collect(ReplayTweetSource(str(tmp_path), page_size=2)))
+    assert [len(page) for page in pages] == [2, 2, 1, 2, 1]
+    assert [tweet["id"] for page in pages for tweet in page] == [str(i) for i in range(8)]
+
+
+def page_body(window: str, page: int, last: bool) -> dict:
+    body = {
+        "data": [
+            {"id": f"{window}-{page}-{i}", "text": "hello", "author_id": "7",
+             "created_at": "2026-10-01T12:00:00.000Z", "public_metrics": {"like_count": 3, "retweet_count": 1}}
+            for i in range(2)
+        ],
+        "includes": {"users": [{"id": "7", "username": "ann", "name": "Ann", "verified": True}]},
+        "meta": {} if last else {"next_token": f"{window}-{page + 1}"},
+    }
+    return body
+
+
+def test_http_pages_windows_and_retries():
+    calls = []
+    failed = set()
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        params = request.url.params
+        calls.append(dict(params))
+        window = params["start_time"]
+        page = int(params.get("next_token", "x-0").rsplit("-", 1)[1])
+        if page == 1 and (window, page) not in failed:
+            failed.add((window, page))
+            return httpx.Response(503 if len(failed) % 2 else 429, headers={"retry-after": "0"})
+        return httpx.Response(200, json=page_body(window, page, last=page == 2))
+
+    source = HttpTweetSource(
+        url="https://api.test/search", bearer_token="token", concurrency=3, prefetch_pages=2,
+        max_retries=2, backoff_base=0.001, transport=httpx.MockTransport(handler),
+    )
+    pages = asyncio.run(collect(source))
+
+    tweets = [tweet for page in pages for tweet in page]
+    assert len(pages) == 9 and len(tweets) == 18
+    assert len({call["start_time"] for call in calls}) == 3
+    assert len(calls) == 12  # 9 pages plus one retried failure per window
+    assert tweets[0]["author_username"] == "ann" and tweets[0]["is_verified"] is True
+    assert tweets[0]["like_count"] == 3 and tweets[0]["raw_data"]["author"]["name"] == "Ann"
+
+
+def test_http_stops_when_closed_early():
+    requests = 0
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal requests
+        requests += 1
+        page = int(request.url.params.get("next_token", "x-0").rsplit("-", 1)[1])
+        return httpx.Response(200, json=page_body("w", page, last=False))
+
+    source = HttpTweetSource(
+        url="https://api.test/search", concurrency=1, prefetch_pages=2, transport=httpx.MockTransport(handler),
+    )
+    pages = asyncio.run(collect(source, limit=3))
+    assert len(pages) == 3
+    assert requests <= 6  # Three consumed, at most the prefetch buffer plus one in flight ahead
+
+
+def test_pacer_spreads_remaining_requests():
+    now = [1000.0]
+    pacer = RatePacer(clock=lambda: now[0])
+    assert pacer.delay() == 0
+    pacer.update(httpx.Headers({"x-rate-limit-remaining": "10", "x-rate-limit-reset": "1020"}))
+    delays = [pacer.delay() for _ in range(3)]
+    assert delays == [0.0, 2.0, 4.0]
+
+    pacer.update(httpx.Headers({"x-rate-limit-remaining": "0", "x-rate-limit-reset": "1060"}))
+    assert pacer.delay() == 60.0
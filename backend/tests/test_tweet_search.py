@@ -0,0 +1,139 @@
+"""
+Full-text search over a search's tweets. Access checks and cursor errors run
+on SQLite; ranking and paging need a migrated Postgres database:
+
+    TEST_DATABASE_URL=postgresql+asyncpg://... pytest tests/test_tweet_search.py
+"""
+import asyncio
+import os
+import uuid
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.api.v1.searches import search_tweets
+from app.db.models import Search, SearchTweet, Tweet, User
+from app.tasks.dedup import attach_to
+
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+
+needs_postgres = pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL is not set")
+
+TEXTS = [
+    "battery battery battery life is great",
+    "the battery died after an hour",
+    "battery fine but the screen cracked",
+    "screen is bright and sharp",
+    "shipping was slow",
+]
+
+
+async def add_analysis(sessions, texts=TEXTS):
+    """Two users: an owner whose search is linked to `texts`, and one attached to it"""
+    suffix = uuid.uuid4().hex[:8]
+    async with sessions() as db:
+        owner, other = User(email=f"owner-{suffix}@example.com"), User(email=f"other-{suffix}@example.com")
+        db.add_all([owner, other])
+        await db.flush()
+        search = Search(user_id=owner.id, query="phone", status="completed")
+        db.add(search)
+        await db.flush()
+        for i, text in enumerate(texts):
+            tweet = Tweet(tweet_id=f"{suffix}-{i}", text=text)
+            db.add(tweet)
+            await db.flush()
+            db.add(SearchTweet(search_id=search.id, tweet_id=tweet.id))
+        attached = Search(user_id=other.id, query="phone")
+        attach_to(attached, search)
+        db.add(attached)
+        await db.commit()
+    return owner, other, search, attached
+
+
+async def find(sessions, search_id, user, q, cursor=None, page_size=20):
+    async with sessions() as db:
+        return await search_tweets(search_id, q=q, page_size=page_size, cursor=cursor, current_user=user, db=db)
+
+
+def test_other_users_searches_are_not_found(sqlite_sessions):
+    async def main():
+        owner, other, search, _ = await add_analysis(sqlite_sessions)
+        with pytest.raises(HTTPException) as raised:
+            await find(sqlite_sessions, search.id, other, "battery")
+        return raised.value.status_code
+
+    assert asyncio.run(main()) == 404
+
+
+def test_invalid_cursor_is_400(sqlite_sessions):
+    async def main():
+        owner, _, search, _ = await add_analysis(sqlite_sessions)
+        with pytest.raises(HTTPException) as raised:
+            await find(sqlite_sessions, search.id, owner, "battery", cursor="garbage")
+        return raised.value.status_code
+
+    assert asyncio.run(main()) == 400
+
+
+async def with_postgres(check):
+    engine = create_async_engine(TEST_DATABASE_URL)
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+    owner, other, search, attached = await add_analysis(sessions)
+    try:
+        await check(sessions, owner, other, search, attached)
+    finally:
+        async with sessions() as db:
+            await db.execute(delete(Tweet).where(Tweet.id.in_(
+                select(SearchTweet.tweet_id).where(SearchTweet.search_id == search.id)
+            )))
+            await db.execute(delete(User).where(User.id.in_([owner.id, other.id])))
+            await db.commit()
+        await engine.dispose()
+
+
+@needs_postgres
+def test_best_matches_first_and_web_search_syntax():
+    async def check(sessions, owner, other, search, attached):
+        hits = (await find(sessions, search.id, owner, "battery"))["tweets"]
+        assert [hit["text"] for hit in hits][0] == TEXTS[0]
+        assert {hit["text"] for hit in hits} == set(TEXTS[:3])
+        assert all(hit["search_id"] == search.id for hit in hits)
+        assert [hit["rank"] for hit in hits] == sorted((hit["rank"] for hit in hits), reverse=True)
+
+        hits = (await find(sessions, search.id, owner, "battery -screen"))["tweets"]
+        assert {hit["text"] for hit in hits} == set(TEXTS[:2])
+        hits = (await find(sessions, search.id, owner, '"screen cracked" or shipping'))["tweets"]
+        assert {hit["text"] for hit in hits} == {TEXTS[2], TEXTS[4]}
+
+        # An attached search reads the tweets of the search it shares
+        hits = (await find(sessions, attached.id, other, "screen"))["tweets"]
+        assert {hit["text"] for hit in hits} == {TEXTS[2], TEXTS[3]}
+        assert all(hit["search_id"] == attached.id for hit in hits)
+
+    asyncio.run(with_postgres(check))
+
+
+@needs_postgres
+def test_cursor_pages_through_equal_ranks_once():
+    async def check(sessions, owner, other, search, attached):
+        # Same text, same rank: the tweet id breaks the tie
+        async with sessions() as db:
+            for i in range(7):
+                tweet = Tweet(tweet_id=f"{search.id}-same-{i}", text="screen protector")
+                db.add(tweet)
+                await db.flush()
+                db.add(SearchTweet(search_id=search.id, tweet_id=tweet.id))
+            await db.commit()
+
+        seen, cursor = [], None
+        while True:
+            page = await find(sessions, search.id, owner, "screen", cursor=cursor, page_size=3)
+            seen.extend(hit["id"] for hit in page["tweets"])
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+        assert len(seen) == len(set(seen)) == 9
+
+    asyncio.run(with_postgres(check))
@@ -0,0 +1,73 @@
+"""
+Parity tests: vectorized VaderScorer vs the per-tweet reference implementation
+"""
+import random
+
+import numpy as np
+
+from app.ml import lexicon
+from app.ml.vader import VaderScorer, score_text_reference
+
+FILLER = ["the", "vote", "today", "people", "policy", "and", "but", "it", "is", "was", "this"]
+
+
+def random_tweets(n: int, seed: int = 7) -> list[str]:
+    rng = random.Random(seed)
+    vocabulary = (
+        list(lexicon.VALENCE) + list(lexicon.BOOSTERS) + list(lexicon.NEGATIONS) + FILLER + ["!", "!!"]
+    )
+    tweets = []
+    for _ in range(n):
+        words = [rng.choice(vocabulary) for _ in range(rng.randint(0, 25))]
+        if rng.random() < 0.2:
+            words = [word.upper() for word in words]
+        tweets.append(" ".join(words))
+    return tweets
+
+
+def test_parity_with_reference():
+    scorer = VaderScorer(valence=lexicon.VALENCE)
+    tweets = random_tweets(5000)
+
+    scores = scorer.score_batch(tweets)
+    compound = scorer.compound(tweets)
+    reference = [score_text_reference(text) for text in tweets]
+
+    assert list(scores.sentiment_label) == [label for label, _, _ in reference]
+    np.testing.assert_allclose(scores.confidence_score, [conf for _, conf, _ in reference], atol=1e-9)
+    np.testing.assert_allclose(compound, [comp for _, _, comp in reference], atol=1e-9)
+
+
+def test_boosters_after_negation_match_reference():
+    scorer = VaderScorer(valence=lexicon.VALENCE)
+    tweets = [
+        "not very good", "isn't extremely bad", "not slightly bad", "never really fine",
+        "not very very good", "not barely okay",
+        # Dampeners push the weak word across zero before the last one applies
+        "barely hardly kinda issue", "not barely hardly issue", "hardly barely kinda slow",
+    ]
+    reference = [score_text_reference(text)[2] for text in tweets]
+    np.testing.assert_allclose(scorer.compound(tweets), reference, atol=1e-12)
+    for text in tweets:
+        np.testing.assert_allclose(scorer.compound([text]), [score_text_reference(text)[2]], atol=1e-12)
+
+
+def test_negation_and_boosters():
+    scorer = VaderScorer(valence=lexicon.VALENCE)
+    good, not_good, very_good = scorer.compound(["good", "not good", "very good"])
+    assert not_good < 0 < good < very_good
+
+
+def test_window_does_not_cross_tweets():
+    scorer = VaderScorer(valence=lexicon.VALENCE)
+    together = scorer.compound(["this is not", "good"])
+    alone = scorer.compound(["good"])
+    assert together[1] == alone[0]
+    assert together[0] == 0.0
+
+
+def test_empty_inputs():
+    scorer = VaderScorer(valence=lexicon.VALENCE)
+    assert len(scorer.score_batch([])) == 0
+    scores = scorer.score_batch(["", "!!!"])
+    assert list(scores.sentiment_label) == ["neutral", "neutral"]
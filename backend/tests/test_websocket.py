@@ -0,0 +1,115 @@
+"""
+Live analysis frames: per-connection outboxes coalesce progress and drop the
+oldest tweet frames when full, the broadcaster fans frames out to every
+viewer of a search, and the endpoint copes with a search deleted mid-connect
+"""
+import asyncio
+import uuid
+
+from fastapi import status
+
+from app.core.security import create_access_token
+from app.db.models import Search
+from app.websocket import routes
+from app.websocket.manager import AnalysisBroadcaster, Subscription
+
+
+def drain(subscription: Subscription, count: int) -> list[dict]:
+    async def main():
+        return [await asyncio.wait_for(subscription.get(), timeout=1) for _ in range(count)]
+    return asyncio.run(main())
+
+
+def nothing_queued(subscription: Subscription) -> bool:
+    async def main():
+        try:
+            await asyncio.wait_for(subscription.get(), timeout=0.01)
+        except asyncio.TimeoutError:
+            return True
+        return False
+    return asyncio.run(main())
+
+
+def frame(message_type: str, n: int) -> dict:
+    return {"type": message_type, "data": {"n": n}}
+
+
+def test_progress_coalesces_into_the_latest_snapshot():
+    subscription = Subscription(max_frames=10)
+    for n in range(5):
+        subscription.offer(frame("progress", n))
+    subscription.offer(frame("tweet", 0))
+    # Queued tweets go first, then only the newest progress
+    assert drain(subscription, 2) == [frame("tweet", 0), frame("progress", 4)]
+    assert subscription.dropped == 0
+
+
+def test_full_outbox_drops_the_oldest_tweet_frames():
+    subscription = Subscription(max_frames=3)
+    for n in range(5):
+        subscription.offer(frame("tweet", n))
+    subscription.offer(frame("complete", 0))
+    assert subscription.dropped == 2
+    assert drain(subscription, 4) == [frame("tweet", 2), frame("tweet", 3), frame("tweet", 4), frame("complete", 0)]
+    # The terminal frame stays until the connection ends
+    assert drain(subscription, 1) == [frame("complete", 0)]
+
+
+def test_get_waits_for_the_next_frame():
+    subscription = Subscription()
+
+    async def main():
+        waiting = asyncio.create_task(subscription.get())
+        await asyncio.sleep(0)
+        assert not waiting.done()
+        subscription.offer(frame("tweet", 1))
+        return await asyncio.wait_for(waiting, timeout=1)
+
+    assert asyncio.run(main()) == frame("tweet", 1)
+
+
+def test_broadcaster_fans_out_to_every_subscriber():
+    broadcaster = AnalysisBroadcaster()
+    search_id, other_id = uuid.uuid4(), uuid.uuid4()
+    viewers = [broadcaster.subscribe(search_id) for _ in range(3)]
+    other = broadcaster.subscribe(other_id)
+
+    broadcaster.publish(search_id, "tweet", {"n": 1})
+    for viewer in viewers:
+        assert drain(viewer, 1) == [frame("tweet", 1)]
+    assert nothing_queued(other)
+
+    for viewer in viewers:
+        broadcaster.unsubscribe(search_id, viewer)
+    assert not broadcaster.has_subscribers(search_id) and broadcaster.has_subscribers(other_id)
+    # Publishing to a search nobody watches is a no-op
+    broadcaster.publish(search_id, "tweet", {"n": 2})
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.accepted = False
+        self.close_code = None
+
+    async def accept(self):
+        self.accepted = True
+
+    async def close(self, code: int = 1000):
+        self.close_code = code
+
+
+def test_search_deleted_while_connecting_closes_the_socket(monkeypatch):
+    search = Search(id=uuid.uuid4(), user_id=uuid.uuid4(), status="processing")
+    loads = iter([search, None])
+
+    async def load_search(search_id, user_id):
+        return next(loads)
+
+    monkeypatch.setattr(routes, "_load_search", load_search)
+    monkeypatch.setattr(routes, "broadcaster", AnalysisBroadcaster())
+    websocket = FakeWebSocket()
+    token = create_access_token(data={"sub": str(search.user_id)})
+
+    asyncio.run(routes.analyze_updates(websocket, search.id, token=token))
+    assert websocket.accepted and websocket.close_code == status.WS_1008_POLICY_VIOLATION
+    assert not routes.broadcaster.has_subscribers(search.id)
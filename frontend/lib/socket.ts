@@ -1,48 +1,95 @@
-import { io, Socket } from 'socket.io-client';
 import type { WebSocketMessage } from '@/types';
 
 const WS_URL = process.env.NEXT_PUBLIC_WS_URL || 'ws://localhost:8000';
 
+const RECONNECT_ATTEMPTS = 5;
+const RECONNECT_DELAY_MS = 1000;
+// Closed by the server on purpose: bad token or unknown search, don't retry
+const POLICY_VIOLATION = 1008;
+
+/**
+ * Live analysis updates from /ws/analyze/{searchId}: a plain WebSocket
+ * authenticated with the access token, sending {type, data} JSON frames
+ */
 export class WebSocketClient {
-  private socket: Socket | null = null;
+  private socket: WebSocket | null = null;
   private listeners: Map<string, Set<(data: unknown) => void>> = new Map();
+  private reconnectTimer: ReturnType<typeof setTimeout> | null = null;
+  private attempts = 0;
+  private finished = false;
 
-  connect(searchId: string): void {
-    if (this.socket?.connected) {
-      this.disconnect();
+  connect(searchId: string, token: string): void {
+    if (this.socket) {
+      this.close();
     }
+    this.finished = false;
+    this.attempts = 0;
+    this.open(searchId, token);
+  }
 
-    this.socket = io(WS_URL, {
-      path: `/ws/analyze/${searchId}`,
-      transports: ['websocket'],
-      reconnection: true,
-      reconnectionAttempts: 5,
-      reconnectionDelay: 1000,
-    });
+  private open(searchId: string, token: string): void {
+    const url = `${WS_URL}/ws/analyze/${encodeURIComponent(searchId)}?token=${encodeURIComponent(token)}`;
+    const socket = new WebSocket(url);
+    this.socket = socket;
 
-    this.socket.on('connect', () => {
+    socket.onopen = () => {
+      this.attempts = 0;
       console.log('WebSocket connected');
-    });
+    };
 
-    this.socket.on('disconnect', () => {
-      console.log('WebSocket disconnected');
-    });
-
-    this.socket.on('message', (message: WebSocketMessage) => {
+    socket.onmessage = (event: MessageEvent) => {
+      let message: WebSocketMessage;
+      try {
+        message = JSON.parse(event.data as string);
+      } catch {
+        console.error('Invalid WebSocket frame:', event.data);
+        return;
+      }
+      // The server closes the connection after the complete or error frame
+      if (message.type === 'complete' || message.type === 'error') {
+        this.finished = true;
+      }
       this.emit(message.type, message.data);
-    });
+    };
 
-    this.socket.on('error', (error: Error) => {
-      console.error('WebSocket error:', error);
-      this.emit('error', error);
-    });
-  }
+    socket.onerror = () => {
+      console.error('WebSocket error');
+    };
 
-  disconnect(): void {
-    if (this.socket) {
-      this.socket.disconnect();
+    socket.onclose = (event: CloseEvent) => {
+      console.log('WebSocket disconnected');
+      if (this.socket !== socket) {
+        return;
+      }
       this.socket = null;
+      if (this.finished) {
+        return;
+      }
+      if (event.code === POLICY_VIOLATION) {
+        this.emit('error', { message: 'Not allowed to follow this search' });
+        return;
+      }
+      if (this.attempts < RECONNECT_ATTEMPTS) {
+        this.attempts += 1;
+        this.reconnectTimer = setTimeout(() => this.open(searchId, token), RECONNECT_DELAY_MS);
+      } else {
+        this.emit('error', { message: 'Lost connection to live updates' });
+      }
+    };
+  }
+
+  private close(): void {
+    if (this.reconnectTimer) {
+      clearTimeout(this.reconnectTimer);
+      this.reconnectTimer = null;
     }
+    const socket = this.socket;
+    this.socket = null;
+    socket?.close();
+  }
+
+  disconnect(): void {
+    this.close();
     this.listeners.clear();
   }
 
@@ -68,7 +115,7 @@ export class WebSocketClient {
   }
 
   isConnected(): boolean {
-    return this.socket?.connected ?? false;
+    return this.socket?.readyState === WebSocket.OPEN;
   }
 }
 
@@ -24,6 +24,7 @@ export interface Search {
   totalTweets: number;
   sentimentSummary?: SentimentSummary;
   emotionSummary?: EmotionSummary;
+  emotionStats?: EmotionStats;
   entities?: Entity[];
   createdAt: string;
   completedAt?: string;
@@ -79,6 +80,14 @@ export interface EmotionSummary {
   sadness: number;
 }
 
+export interface EmotionStat {
+  mean: number;
+  std: number;
+  count: number;
+}
+
+export type EmotionStats = Partial<Record<keyof EmotionSummary, EmotionStat>>;
+
 export interface Entity {
   text: string;
   type: 'PERSON' | 'ORG' | 'GPE' | 'LOC' | 'EVENT';